@@ -0,0 +1,336 @@
+"""
+Load test of the dashboard endpoints against a local S3 stand-in.
+
+Generates a synthetic bucket, then for each worker count starts uvicorn in a subprocess serving
+that bucket through LocalS3Client (S3_LOCAL_ROOT), with the configured S3 latency and error rate.
+A fixed number of concurrent keep-alive clients request /api/forecast/latest and
+/api/hourly-data/latest in turn. Throughput and p50/p95/p99 latency are reported per worker count
+and concurrency level.
+
+The clients run in this process, so on a small machine they compete with the server for CPU.
+Use --url to load an already running server (e.g. a staging instance) from another machine.
+
+Usage (from the backend directory):
+    python -m benchmarks.load
+    python -m benchmarks.load --workers 1,2,4 --concurrency 16,64 --duration 30
+    python -m benchmarks.load --s3-latency-ms 40 --s3-jitter-ms 20 --s3-error-rate 0.05
+    python -m benchmarks.load --url https://staging.example.com --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from benchmarks import RESULTS_DIR, free_port, git_commit
+from benchmarks.synthetic import generate_bucket
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_PATHS = "/api/forecast/latest,/api/hourly-data/latest"
+
+
+class Connection:
+    """Minimal HTTP/1.1 keep-alive client for GET requests, so the load generator needs no extra packages."""
+
+    def __init__(self, host: str, port: int, use_ssl: bool):
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def _connect(self) -> None:
+        self._reader, self._writer = await asyncio.open_connection(
+            self.host, self.port, ssl=self.use_ssl or None, server_hostname=self.host if self.use_ssl else None
+        )
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def get(self, path: str, headers: Dict[str, str]) -> Tuple[int, int]:
+        """
+        Send a GET request and read the whole response.
+
+        Returns:
+            Tuple of (status code, body bytes)
+        """
+        if self._writer is None:
+            await self._connect()
+        lines = [f"GET {path} HTTP/1.1", f"Host: {self.host}"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        self._writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await self._writer.drain()
+
+        head = await self._reader.readuntil(b"\r\n\r\n")
+        status_line, *header_lines = head.decode("latin-1").split("\r\n")
+        status = int(status_line.split(" ", 2)[1])
+        response_headers = {}
+        for line in header_lines:
+            if line:
+                name, _, value = line.partition(":")
+                response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get("transfer-encoding", "").lower() == "chunked":
+            size = 0
+            while True:
+                chunk_size = int((await self._reader.readline()).split(b";")[0], 16)
+                await self._reader.readexactly(chunk_size + 2)
+                size += chunk_size
+                if chunk_size == 0:
+                    break
+        elif "content-length" in response_headers:
+            size = len(await self._reader.readexactly(int(response_headers["content-length"])))
+        else:
+            size = len(await self._reader.read())
+            self.close()
+            return status, size
+
+        if response_headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, size
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))]
+
+
+def summarize(latencies: List[float], errors: int, seconds: float) -> dict:
+    """Throughput and latency percentiles (successful requests) in milliseconds."""
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    requests = len(latencies_ms) + errors
+
+    def rounded(value: Optional[float]) -> Optional[float]:
+        return round(value, 3) if value is not None else None
+
+    return {
+        "requests": requests,
+        "errors": errors,
+        "error_rate": round(errors / requests, 4) if requests else 0.0,
+        "throughput_rps": round(len(latencies_ms) / seconds, 1),
+        "p50_ms": rounded(percentile(latencies_ms, 0.50)),
+        "p95_ms": rounded(percentile(latencies_ms, 0.95)),
+        "p99_ms": rounded(percentile(latencies_ms, 0.99)),
+        "max_ms": rounded(latencies_ms[-1] if latencies_ms else None),
+    }
+
+
+async def drive(base_url: str, paths: List[str], concurrency: int, duration: float, warmup: float,
+                headers: Dict[str, str], timeout: float) -> dict:
+    """
+    Run `concurrency` clients, each sending one request at a time, for warmup + duration seconds.
+    Only requests started after the warmup are recorded.
+    """
+    url = urlsplit(base_url)
+    use_ssl = url.scheme == "https"
+    port = url.port or (443 if use_ssl else 80)
+    prefix = url.path.rstrip("/")
+
+    latencies: Dict[str, List[float]] = {path: [] for path in paths}
+    errors: Dict[str, Counter] = {path: Counter() for path in paths}
+    measure_from = time.perf_counter() + warmup
+    stop_at = measure_from + duration
+
+    async def client(index: int) -> None:
+        connection = Connection(url.hostname, port, use_ssl)
+        turn = index
+        while True:
+            started = time.perf_counter()
+            if started >= stop_at:
+                break
+            path = paths[turn % len(paths)]
+            turn += 1
+            error = None
+            try:
+                status, _ = await asyncio.wait_for(connection.get(prefix + path, headers), timeout)
+                if status != 200:
+                    error = str(status)
+            except (OSError, ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                    asyncio.TimeoutError) as e:
+                connection.close()
+                error = type(e).__name__
+            if started < measure_from:
+                continue
+            if error is None:
+                latencies[path].append(time.perf_counter() - started)
+            else:
+                errors[path][error] += 1
+        connection.close()
+
+    await asyncio.gather(*(client(index) for index in range(concurrency)))
+
+    all_latencies = [latency for values in latencies.values() for latency in values]
+    all_errors = sum((counter for counter in errors.values()), Counter())
+    return {
+        "concurrency": concurrency,
+        "duration_seconds": duration,
+        "overall": summarize(all_latencies, sum(all_errors.values()), duration),
+        "endpoints": {
+            path: summarize(latencies[path], sum(errors[path].values()), duration) for path in paths
+        },
+        "errors": dict(all_errors),
+    }
+
+
+def _environment(bucket_dir: Path, args: argparse.Namespace) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("S3_BUCKET_NAME", "loadtest")
+    env.setdefault("LOG_LEVEL", "WARNING")
+    env["S3_LOCAL_ROOT"] = str(bucket_dir)
+    env["S3_LOCAL_LATENCY_MS"] = str(args.s3_latency_ms)
+    env["S3_LOCAL_JITTER_MS"] = str(args.s3_jitter_ms)
+    env["S3_LOCAL_ERROR_RATE"] = str(args.s3_error_rate)
+    return env
+
+
+def start_server(workers: int, bucket_dir: Path, args: argparse.Namespace,
+                 timeout: float = 120.0) -> Tuple[subprocess.Popen, str]:
+    """Start uvicorn with the given number of workers and wait until /health answers."""
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR, env=_environment(bucket_dir, args)
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if proc.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with status {proc.returncode}")
+        try:
+            with urllib.request.urlopen(f"{base_url}/health", timeout=1) as response:
+                if response.status == 200:
+                    return proc, base_url
+        except OSError:
+            time.sleep(0.05)
+    stop_server(proc)
+    raise RuntimeError(f"/health did not answer within {timeout}s")
+
+
+def stop_server(proc: subprocess.Popen) -> None:
+    proc.terminate()
+    try:
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def print_run(label: str, run: dict) -> None:
+    overall = run["overall"]
+    print(f"  {label:<12} concurrency={run['concurrency']:<4} {overall['throughput_rps']:>9.1f} req/s  "
+          f"p50={overall['p50_ms'] or 0:>8.2f}  p95={overall['p95_ms'] or 0:>8.2f}  "
+          f"p99={overall['p99_ms'] or 0:>8.2f} ms  errors={overall['error_rate']:.2%}")
+    for path, result in run["endpoints"].items():
+        print(f"    {path:<34} {result['throughput_rps']:>9.1f} req/s  p50={result['p50_ms'] or 0:>8.2f}  "
+              f"p95={result['p95_ms'] or 0:>8.2f}  p99={result['p99_ms'] or 0:>8.2f} ms")
+
+
+def main_cli(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the dashboard endpoints against a local S3 stand-in")
+    parser.add_argument("--workers", default="1,2",
+                        help="Comma-separated uvicorn worker counts to compare (default: 1,2)")
+    parser.add_argument("--concurrency", default="32", help="Comma-separated concurrent client counts (default: 32)")
+    parser.add_argument("--duration", type=float, default=15.0, help="Measured seconds per run")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Unmeasured seconds before each run")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Per-request timeout in seconds")
+    parser.add_argument("--paths", default=DEFAULT_PATHS, help=f"Comma-separated paths to request in turn (default: {DEFAULT_PATHS})")
+    parser.add_argument("--accept-encoding", default="gzip, br",
+                        help="Accept-Encoding sent by the clients, as a browser would ('' for none)")
+    parser.add_argument("--url", help="Load this running server instead of starting uvicorn locally")
+    # Local S3 stand-in
+    parser.add_argument("--s3-latency-ms", type=float, default=20.0, help="Latency added to every S3 call")
+    parser.add_argument("--s3-jitter-ms", type=float, default=10.0, help="Extra random latency per S3 call")
+    parser.add_argument("--s3-error-rate", type=float, default=0.0, help="Fraction of S3 calls failing with 503")
+    parser.add_argument("--scale", type=float, default=1.0, help="Training dataset size relative to 2002-today")
+    parser.add_argument("--hourly-hours", type=int, default=24 * 7, help="Number of hourly_data objects")
+    parser.add_argument("--hourly-padding-bytes", type=int, default=0, help="Extra bytes per hourly_data object")
+    parser.add_argument("--data-dir", type=Path, help="Where to generate the bucket (default: temporary directory)")
+    parser.add_argument("--output", type=Path, help="Results file (default: benchmarks/results/load-<time>-<commit>.json)")
+    args = parser.parse_args(argv)
+
+    paths = [path for path in args.paths.split(",") if path]
+    concurrencies = [int(value) for value in args.concurrency.split(",") if value]
+    headers = {"Accept": "application/json"}
+    if args.accept_encoding:
+        headers["Accept-Encoding"] = args.accept_encoding
+
+    def run(base_url: str) -> List[dict]:
+        return [
+            asyncio.run(drive(base_url, paths, concurrency, args.duration, args.warmup, headers, args.timeout))
+            for concurrency in concurrencies
+        ]
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "cpu_count": os.cpu_count(),
+        "paths": paths,
+        "runs": [],
+    }
+
+    if args.url:
+        report["url"] = args.url
+        print(f"Loading {args.url} ...")
+        for result in run(args.url):
+            report["runs"].append({"workers": None, **result})
+            print_run("remote", result)
+    else:
+        report["s3"] = {
+            "latency_ms": args.s3_latency_ms, "jitter_ms": args.s3_jitter_ms, "error_rate": args.s3_error_rate
+        }
+        with tempfile.TemporaryDirectory(prefix="ieso-load-") as tmp:
+            bucket_dir = args.data_dir or Path(tmp)
+            print(f"Generating synthetic bucket (scale {args.scale:g}x) in {bucket_dir} ...")
+            report["dataset"] = generate_bucket(
+                bucket_dir, scale=args.scale, hourly_hours=args.hourly_hours,
+                hourly_padding_bytes=args.hourly_padding_bytes
+            )
+            print(f"S3 stand-in: {args.s3_latency_ms:g} ms + up to {args.s3_jitter_ms:g} ms latency, "
+                  f"{args.s3_error_rate:.1%} errors")
+            for workers in (int(value) for value in args.workers.split(",") if value):
+                proc, base_url = start_server(workers, bucket_dir, args)
+                try:
+                    for result in run(base_url):
+                        report["runs"].append({"workers": workers, **result})
+                        print_run(f"workers={workers}", result)
+                finally:
+                    stop_server(proc)
+
+        # Throughput of each worker count relative to the smallest one at the same concurrency
+        baseline = {}
+        for result in report["runs"]:
+            base = baseline.setdefault(result["concurrency"], result)
+            if base is not result and base["overall"]["throughput_rps"]:
+                scaling = result["overall"]["throughput_rps"] / base["overall"]["throughput_rps"]
+                result["scaling"] = round(scaling, 2)
+                print(f"  {result['workers']} workers vs {base['workers']} at concurrency "
+                      f"{result['concurrency']}: {scaling:.2f}x throughput")
+
+    output = args.output
+    if output is None:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        output = RESULTS_DIR / f"load-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}-{commit}.json"
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,269 @@
+"""
+Parser and lookup micro-benchmarks against synthetic IESO datasets.
+
+Runs the backend's real code paths (S3Service, demand store, forecast and hourly builders)
+against a LocalS3Client serving generated data, and writes the timings as JSON so results
+can be compared between commits.
+
+Usage (from the backend directory):
+    python -m benchmarks.run
+    python -m benchmarks.run --scales 1,2,5 --repeats 20
+    python -m benchmarks.run --compare benchmarks/results/<previous>.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, List, Optional
+
+# Settings are read at import time, so configure them before importing the app
+os.environ.setdefault("S3_BUCKET_NAME", "benchmark")
+os.environ.setdefault("REFRESH_ENABLED", "false")
+
+from benchmarks import RESULTS_DIR, git_commit  # noqa: E402
+from benchmarks.synthetic import generate_bucket  # noqa: E402
+from config import settings  # noqa: E402
+from services import columnar_dataset as columnar  # noqa: E402
+from services.demand_store import demand_store  # noqa: E402
+from services.hourly_segments import (  # noqa: E402
+    hourly_segments, load_hourly_points, parsed_hourly_cache
+)
+from services.latest_index import hourly_data_index  # noqa: E402
+from services.local_s3 import LocalS3Client  # noqa: E402
+from services.ontario_time import get_today_ontario_date  # noqa: E402
+from services.rollups import build_rollups, demand_rollups  # noqa: E402
+from services.s3_service import s3_service  # noqa: E402
+import main  # noqa: E402
+
+REGRESSION_THRESHOLD = 0.20
+
+
+def reset_state() -> None:
+    """Drop every in-process cache so the next call starts cold."""
+    s3_service.cache.clear()
+    parsed_hourly_cache.clear()
+    demand_store.series = None
+    demand_store._validated_at = None
+    hourly_data_index.latest = None
+    hourly_data_index.last_key = None
+    hourly_data_index.floor = None
+    hourly_segments._manifest = {"segments": {}}
+    hourly_segments._manifest_etag = None
+    hourly_segments._checked_at = None
+
+
+def measure(name: str, scale: float, fn: Callable[[], object], repeats: int,
+            setup: Optional[Callable[[], None]] = None) -> dict:
+    """Time fn over several repeats (setup runs before each repeat and is not timed)."""
+    durations: List[float] = []
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+
+    durations_ms = sorted(d * 1000 for d in durations)
+    p95_index = min(len(durations_ms) - 1, int(round(0.95 * (len(durations_ms) - 1))))
+    result = {
+        "name": name,
+        "scale": scale,
+        "repeats": repeats,
+        "min_ms": round(durations_ms[0], 4),
+        "median_ms": round(statistics.median(durations_ms), 4),
+        "mean_ms": round(statistics.fmean(durations_ms), 4),
+        "p95_ms": round(durations_ms[p95_index], 4),
+    }
+    print(f"  {name:<36} scale={scale:<4} median={result['median_ms']:>10.3f} ms  p95={result['p95_ms']:>10.3f} ms")
+    return result
+
+
+def run_scale(scale: float, repeats: int, cold_repeats: int, hourly_hours: int, data_dir: Path) -> dict:
+    """Generate a dataset at the given scale and run every benchmark against it."""
+    root = data_dir / f"scale-{scale:g}"
+    print(f"Generating synthetic bucket (scale {scale:g}x) in {root} ...")
+    summary = generate_bucket(root, scale=scale, hourly_hours=hourly_hours)
+    print(f"  {summary['training_rows']} training rows ({summary['training_bytes'] / 1e6:.1f} MB), "
+          f"{summary['hourly_objects']} hourly objects")
+
+    s3_service.s3_client = LocalS3Client(str(root))
+    today = get_today_ontario_date()
+    results = []
+
+    def actual_demand():
+        main.get_actual_demand_from_training_dataset(today)
+
+    # Full download + parse of daily.csv (first request after a deploy)
+    settings.actual_demand_lookup_mode = "memory"
+    settings.demand_snapshot_enabled = False
+    results.append(measure("actual_demand.cold_parse", scale, actual_demand, cold_repeats, setup=reset_state))
+
+    # Memory-mapping the binary snapshot written by another worker
+    settings.demand_snapshot_enabled = True
+    settings.demand_snapshot_dir = str(data_dir / f"snapshots-{scale:g}")
+    reset_state()
+    actual_demand()
+    results.append(measure("actual_demand.cold_snapshot", scale, actual_demand, repeats, setup=reset_state))
+
+    # Lookups once the series is loaded
+    reset_state()
+    actual_demand()
+    results.append(measure("actual_demand.warm", scale, actual_demand, repeats))
+
+    # Peak/low rollups: building the tables for a dataset version, then slicing a year of months
+    series = demand_store.get_series()
+    results.append(measure("rollups.build", scale, lambda: build_rollups(series), cold_repeats))
+    year_ago = today.replace(year=today.year - 1)
+    demand_rollups.get(series)
+    results.append(measure(
+        "rollups.select_monthly", scale, lambda: demand_rollups.get(series)["monthly"].select(year_ago, today), repeats
+    ))
+
+    # Binary search with Range reads, no full download
+    settings.actual_demand_lookup_mode = "range"
+    results.append(measure("actual_demand.range_lookup", scale, actual_demand, repeats, setup=reset_state))
+
+    # The same from the Parquet copy: only the Date/Hour/Ontario Demand chunks (and for one day,
+    # one row group) are downloaded (needs pyarrow)
+    if columnar.pq is not None:
+        columnar.columnar_dataset.write_from_csv()
+        settings.columnar_dataset_enabled = True
+        settings.demand_snapshot_enabled = False
+        results.append(measure("actual_demand.columnar_lookup", scale, actual_demand, repeats, setup=reset_state))
+        settings.actual_demand_lookup_mode = "memory"
+        results.append(measure("actual_demand.cold_columnar", scale, actual_demand, cold_repeats, setup=reset_state))
+        settings.columnar_dataset_enabled = False
+        settings.demand_snapshot_enabled = True
+
+    # A new dataset version with one more day of rows: only the appended bytes are downloaded and parsed
+    dataset = root / "training_dataset" / "daily.csv"
+    reset_state()
+    demand_store.get_series()
+
+    def append_day():
+        day = demand_store.series.end_date + timedelta(days=1)
+        with open(dataset, "a") as f:
+            f.writelines(f"{day.isoformat()},{hour},16000,15000,10.0,50,10.0,1,0\n" for hour in range(1, 25))
+        demand_store._validated_at = None
+
+    results.append(measure("actual_demand.delta_refresh", scale, demand_store.get_series, repeats, setup=append_day))
+
+    # Forecast CSV parse + merge with actual demand (dataset already loaded)
+    settings.actual_demand_lookup_mode = "memory"
+    reset_state()
+    actual_demand()
+    results.append(measure(
+        "forecast.build_payload", scale, lambda: asyncio.run(main.build_forecast_payload()), repeats
+    ))
+
+    # Newest hourly object: full listing, then incremental listings
+    results.append(measure(
+        "hourly.build_payload.cold", scale, lambda: asyncio.run(main.build_hourly_payload()),
+        cold_repeats, setup=reset_state
+    ))
+    results.append(measure(
+        "hourly.build_payload.warm", scale, lambda: asyncio.run(main.build_hourly_payload()), repeats
+    ))
+
+    # Supply-mix history: the last week of hourly objects fetched in parallel, then from the parsed cache
+    latest = hourly_data_index.refresh()
+    week = hourly_data_index.objects_between(latest['LastModified'] - timedelta(days=7), latest['LastModified'])
+    results.append(measure(
+        "hourly.history_week.cold", scale, lambda: asyncio.run(load_hourly_points(week)),
+        cold_repeats, setup=parsed_hourly_cache.clear
+    ))
+    results.append(measure(
+        "hourly.history_week.warm", scale, lambda: asyncio.run(load_hourly_points(week)), repeats
+    ))
+
+    # The same week read from compacted daily segments
+    asyncio.run(hourly_segments.compact())
+    segments, raw = hourly_segments.plan(latest['LastModified'] - timedelta(days=7), latest['LastModified'])
+
+    def reset_segments():
+        parsed_hourly_cache.clear()
+        hourly_segments._segments.clear()
+
+    results.append(measure(
+        "hourly.history_week.segments", scale,
+        lambda: asyncio.run(hourly_segments.load_points(
+            segments, raw, latest['LastModified'] - timedelta(days=7), latest['LastModified']
+        )),
+        cold_repeats, setup=reset_segments
+    ))
+
+    return {"dataset": summary, "results": results}
+
+
+def compare(current: dict, baseline_path: Path) -> bool:
+    """Print per-benchmark changes against a previous results file. Returns True if anything regressed."""
+    baseline = json.loads(baseline_path.read_text())
+    previous = {(r["name"], r["scale"]): r for run in baseline["runs"] for r in run["results"]}
+    regressed = False
+
+    print(f"\nComparison with {baseline_path.name} (commit {baseline.get('commit', 'unknown')}):")
+    for run in current["runs"]:
+        for result in run["results"]:
+            old = previous.get((result["name"], result["scale"]))
+            if old is None or not old["median_ms"]:
+                continue
+            change = (result["median_ms"] - old["median_ms"]) / old["median_ms"]
+            flag = ""
+            if change > REGRESSION_THRESHOLD:
+                flag = "  <-- REGRESSION"
+                regressed = True
+            print(f"  {result['name']:<36} scale={result['scale']:<4} "
+                  f"{old['median_ms']:>10.3f} -> {result['median_ms']:>10.3f} ms ({change:+.1%}){flag}")
+    return regressed
+
+
+def main_cli(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run backend parser micro-benchmarks on synthetic data")
+    parser.add_argument("--scales", default="1,2,5",
+                        help="Comma-separated dataset sizes relative to 2002-today (default: 1,2,5)")
+    parser.add_argument("--repeats", type=int, default=20, help="Repeats for warm benchmarks")
+    parser.add_argument("--cold-repeats", type=int, default=3, help="Repeats for cold (full load) benchmarks")
+    parser.add_argument("--hourly-hours", type=int, default=24 * 30, help="Number of hourly_data objects")
+    parser.add_argument("--data-dir", type=Path, help="Where to generate datasets (default: temporary directory)")
+    parser.add_argument("--output", type=Path, help="Results file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", type=Path, help="Previous results file to compare against")
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(logging.WARNING)
+    scales = [float(scale) for scale in args.scales.split(",") if scale]
+    commit = git_commit()
+
+    with tempfile.TemporaryDirectory(prefix="ieso-bench-") as tmp:
+        data_dir = args.data_dir or Path(tmp)
+        runs = [run_scale(scale, args.repeats, args.cold_repeats, args.hourly_hours, data_dir) for scale in scales]
+
+    report = {
+        "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "runs": runs,
+    }
+
+    output = args.output
+    if output is None:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        output = RESULTS_DIR / f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}-{commit}.json"
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults written to {output}")
+
+    if args.compare and compare(report, args.compare):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,158 @@
+"""
+Startup cost report: per-module import times and the time until /health answers.
+
+Import times come from `python -X importtime -c "import main"`. Time to /health is measured by
+starting uvicorn in a subprocess and polling /health, with fast startup on and off.
+
+Usage (from the backend directory):
+    python -m benchmarks.startup
+    python -m benchmarks.startup --top 30 --runs 5
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmarks import RESULTS_DIR, free_port, git_commit
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+
+def _environment(fast_startup: bool) -> Dict[str, str]:
+    env = dict(os.environ)
+    # Dummy credentials so the boto3 client is actually created; the refresher would call S3, so it's off
+    env.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+    env.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+    env.setdefault("S3_BUCKET_NAME", "benchmark")
+    env["REFRESH_ENABLED"] = "false"
+    env["FAST_STARTUP"] = "true" if fast_startup else "false"
+    env["LOG_LEVEL"] = "WARNING"
+    return env
+
+
+def import_times(fast_startup: bool) -> List[dict]:
+    """Import main in a fresh interpreter and return the per-module timings in milliseconds."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, env=_environment(fast_startup), capture_output=True, text=True, check=True
+    )
+    modules = []
+    for line in proc.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append({
+                "module": name,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                "depth": len(indent) // 2,
+            })
+    return modules
+
+
+def time_to_health(fast_startup: bool, timeout: float = 60.0) -> float:
+    """Start uvicorn and return the milliseconds until /health first answers 200."""
+    port = free_port()
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=_environment(fast_startup)
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - started) * 1000
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError(f"/health did not answer within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def summarize(modules: List[dict], top: int) -> dict:
+    """Total import time, the slowest modules and time per top-level package."""
+    by_package = defaultdict(float)
+    for module in modules:
+        by_package[module["module"].split(".")[0]] += module["self_ms"]
+    # -X importtime lists children before their parent, so main's direct imports are the
+    # depth-1 entries between the previous top-level import and main
+    main, children, direct = None, [], []
+    for module in modules:
+        if module["depth"] == 1:
+            children.append(module)
+        elif module["depth"] == 0:
+            if module["module"] == "main":
+                main, direct = module, children
+            children = []
+    return {
+        "total_ms": round(main["cumulative_ms"], 3) if main else None,
+        "direct_imports": [
+            {"module": m["module"], "cumulative_ms": round(m["cumulative_ms"], 3)}
+            for m in sorted(direct, key=lambda m: -m["cumulative_ms"])[:top]
+        ],
+        "slowest_modules": [
+            {"module": m["module"], "self_ms": round(m["self_ms"], 3)}
+            for m in sorted(modules, key=lambda m: -m["self_ms"])[:top]
+        ],
+        "packages": {
+            name: round(ms, 3) for name, ms in sorted(by_package.items(), key=lambda item: -item[1])[:top]
+        },
+    }
+
+
+def main_cli(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Report backend import times and time to first /health")
+    parser.add_argument("--runs", type=int, default=3, help="Repeats per measurement (median is reported)")
+    parser.add_argument("--top", type=int, default=15, help="Number of modules/packages to list")
+    parser.add_argument("--output", type=Path, help="Results file (default: benchmarks/results/startup-<time>-<commit>.json)")
+    args = parser.parse_args(argv)
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "modes": {},
+    }
+
+    for fast_startup in (True, False):
+        mode = "fast_startup" if fast_startup else "eager_startup"
+        runs = [import_times(fast_startup) for _ in range(args.runs)]
+        # Report the run with the median total import time
+        runs.sort(key=lambda modules: next((m["cumulative_ms"] for m in modules if m["module"] == "main"), 0))
+        summary = summarize(runs[len(runs) // 2], args.top)
+        summary["time_to_health_ms"] = round(statistics.median(time_to_health(fast_startup) for _ in range(args.runs)), 1)
+        report["modes"][mode] = summary
+
+        print(f"\n{mode}: import main {summary['total_ms']:.1f} ms, first /health after {summary['time_to_health_ms']:.1f} ms")
+        print("  Slowest direct imports of main:")
+        for item in summary["direct_imports"]:
+            print(f"    {item['module']:<40} {item['cumulative_ms']:>9.1f} ms")
+        print("  Import time by package (self time):")
+        for name, ms in summary["packages"].items():
+            print(f"    {name:<40} {ms:>9.1f} ms")
+
+    output = args.output
+    if output is None:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        output = RESULTS_DIR / f"startup-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}-{commit}.json"
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
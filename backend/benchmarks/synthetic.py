@@ -0,0 +1,131 @@
+"""
+Synthetic IESO datasets for benchmarks and load tests.
+Generates a training_dataset/daily.csv, a daily_prediction/latest_forecast.csv and
+hourly_data/*.json objects in a directory laid out like the S3 bucket.
+"""
+import json
+import math
+import os
+import random
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+# First date in the real training dataset
+DATASET_START = date(2002, 5, 1)
+
+TRAINING_COLUMNS = [
+    "Date", "Hour", "Market Demand", "Ontario Demand",
+    "Temperature", "Humidity", "Wind Speed", "Day of Week", "Is Holiday"
+]
+
+
+def _demand(day: date, hour: int, rng: random.Random) -> float:
+    """Plausible Ontario Demand (MW) with seasonal and daily cycles plus noise."""
+    seasonal = 1800 * math.cos(2 * math.pi * (day.timetuple().tm_yday - 20) / 365.25)
+    daily = 2500 * math.sin(math.pi * max(hour - 6, 0) / 18)
+    weekend = -1200 if day.weekday() >= 5 else 0
+    return 14000 + seasonal + daily + weekend + rng.gauss(0, 300)
+
+
+def write_training_dataset(path: Path, end_date: date, scale: float = 1.0, seed: int = 42) -> int:
+    """
+    Write a daily.csv covering DATASET_START..end_date, stretched backwards by scale
+    (e.g. scale=2 covers twice as many years, ending on the same date).
+
+    Returns:
+        Number of data rows written
+    """
+    rng = random.Random(seed)
+    span_days = (end_date - DATASET_START).days + 1
+    start_date = end_date - timedelta(days=int(span_days * scale) - 1)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rows = 0
+    with open(path, 'w', newline='') as f:
+        f.write(",".join(TRAINING_COLUMNS) + "\n")
+        day = start_date
+        while day <= end_date:
+            date_str = day.isoformat()
+            weekday = day.weekday()
+            for hour in range(1, 25):
+                ontario = _demand(day, hour, rng)
+                f.write(
+                    f"{date_str},{hour},{ontario + rng.uniform(500, 2500):.0f},{ontario:.0f},"
+                    f"{rng.uniform(-25, 32):.1f},{rng.uniform(20, 100):.0f},{rng.uniform(0, 60):.1f},"
+                    f"{weekday},{int(rng.random() < 0.03)}\n"
+                )
+                rows += 1
+            day += timedelta(days=1)
+    return rows
+
+
+def write_forecast(path: Path, forecast_date: date, seed: int = 7) -> None:
+    """Write a 24-hour latest_forecast.csv for forecast_date."""
+    rng = random.Random(seed)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', newline='') as f:
+        f.write("time,predicted_ontario_demand\n")
+        for hour in range(24):
+            f.write(f"{forecast_date.isoformat()} {hour:02d}:00:00,{_demand(forecast_date, hour + 1, rng):.3f}\n")
+
+
+def write_hourly_data(directory: Path, end_time: datetime, hours: int, seed: int = 11,
+                      padding_bytes: int = 0) -> int:
+    """
+    Write one hourly_data JSON object per hour, ending at end_time.
+    File modification times are set to the fetch time so the newest object is also the latest modified.
+    padding_bytes adds an unused field of that size to each object, to test larger objects.
+
+    Returns:
+        Number of objects written
+    """
+    rng = random.Random(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    for offset in range(hours):
+        fetched_at = end_time - timedelta(hours=hours - 1 - offset)
+        payload = {
+            "fetched_at_utc": fetched_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "data": {
+                "Nuclear": round(rng.uniform(8000, 10500)),
+                "Gas": round(rng.uniform(300, 4000)),
+                "Wind": round(rng.uniform(100, 4500)),
+                "Hydro": round(rng.uniform(3500, 6000)),
+                "Solar": round(rng.uniform(0, 600)),
+                "Biofuel": round(rng.uniform(0, 200)),
+                "HourlyImports": round(rng.uniform(0, 2000)),
+                "HourlyExports": round(rng.uniform(500, 4000)),
+            }
+        }
+        if padding_bytes:
+            payload["padding"] = "x" * padding_bytes
+        path = directory / f"ieso_hourly_{fetched_at.strftime('%Y%m%d_%H%M%S')}.json"
+        path.write_text(json.dumps(payload))
+        timestamp = fetched_at.timestamp()
+        os.utime(path, (timestamp, timestamp))
+    return hours
+
+
+def generate_bucket(root: Path, scale: float = 1.0, hourly_hours: int = 24 * 30,
+                    today: Optional[date] = None, hourly_padding_bytes: int = 0) -> dict:
+    """
+    Generate a complete synthetic bucket under root.
+
+    Returns:
+        Summary of what was generated
+    """
+    now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    today = today or (now - timedelta(hours=5)).date()
+
+    training_path = root / "training_dataset" / "daily.csv"
+    rows = write_training_dataset(training_path, today, scale=scale)
+    write_forecast(root / "daily_prediction" / "latest_forecast.csv", today)
+    hourly_objects = write_hourly_data(root / "hourly_data", now, hourly_hours, padding_bytes=hourly_padding_bytes)
+
+    return {
+        "scale": scale,
+        "training_rows": rows,
+        "training_bytes": training_path.stat().st_size,
+        "hourly_objects": hourly_objects,
+        "today": today.isoformat(),
+    }
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Literal, Optional
 
 class Settings(BaseSettings):
     # AWS S3 Configuration
@@ -8,10 +8,110 @@ class Settings(BaseSettings):
     aws_region: str = "us-east-1"
     s3_bucket_name: Optional[str] = None
     
+    # S3 Transport Configuration
+    s3_max_pool_connections: int = 32  # Keep-alive connections (should cover s3_fetch_concurrency)
+    s3_connect_timeout_seconds: float = 2.0
+    s3_read_timeout_seconds: float = 10.0
+    s3_retry_mode: str = "adaptive"  # "standard" or "adaptive" (client-side rate limiting when throttled)
+    s3_max_attempts: int = 3  # Including the first attempt
+    # Upper bound on one S3 request including retries and the body download; an abandoned
+    # request keeps its worker thread until the connect/read timeouts above give up
+    s3_call_deadline_seconds: float = 20.0
+    s3_breaker_failure_threshold: int = 5  # Consecutive failures that open the circuit (0 disables it)
+    s3_breaker_reset_seconds: float = 30.0  # How long the circuit stays open before a probe call
+    
+    # Local S3 Stand-in Configuration (development and load tests, see services/local_s3.py)
+    s3_local_root: Optional[str] = None  # Serve the bucket from this directory instead of AWS
+    s3_local_latency_ms: float = 0  # Added to every call
+    s3_local_jitter_ms: float = 0  # Extra random latency per call, up to this
+    s3_local_error_rate: float = 0  # Fraction of calls failing with 503 SlowDown
+    
+    # S3 Object Cache Configuration
+    s3_cache_max_bytes: int = 64 * 1024 * 1024  # Set to 0 to disable caching
+    s3_cache_ttl_seconds: float = 60.0  # Entries older than this are revalidated with their ETag
+    s3_fetch_concurrency: int = 16  # Max parallel S3 requests for multi-object reads
+    
+    # Actual Demand Lookup Configuration
+    # "memory": load the full training dataset into memory
+    # "range": binary-search the sorted CSV with S3 Range requests
+    # "auto": use range requests until the in-memory dataset has been loaded in the background
+    actual_demand_lookup_mode: Literal["auto", "range", "memory"] = "auto"
+    range_lookup_block_bytes: int = 64 * 1024
+    
+    # Parsed demand history is written to a local binary snapshot that workers memory-map
+    demand_snapshot_enabled: bool = True
+    demand_snapshot_dir: Optional[str] = None  # Defaults to <tmp>/ieso-demand
+    
+    # Read only the needed columns and row groups of training_dataset/daily.parquet while it is
+    # current (needs pyarrow; write it with `python -m services.columnar_dataset`)
+    columnar_dataset_enabled: bool = False
+    
+    # Background Refresh Configuration
+    refresh_enabled: bool = True  # Keep /api/forecast/latest and /api/hourly-data/latest warm in memory
+    refresh_interval_seconds: float = 60.0
+    sse_heartbeat_seconds: float = 15.0  # Keep-alive comment interval on /api/events streams
+    
+    # Relist the whole hourly_data/ and daily_prediction/ prefixes this often; other refreshes only list new keys
+    hourly_index_full_relist_seconds: float = 6 * 60 * 60
+    forecast_index_full_relist_seconds: float = 24 * 60 * 60
+    
+    # Hourly supply-mix history (/api/hourly-data/history)
+    hourly_history_max_objects: int = 24 * 31  # Hourly objects per request
+    hourly_parsed_cache_entries: int = 24 * 366  # Parsed hourly objects kept in memory (they never change)
+    
+    # Hourly Compaction Configuration
+    # Closed days of hourly_data/ objects are merged into one hourly_segments/<date>.json object each
+    hourly_compaction_enabled: bool = False  # Compact in the background (enable on one worker, or run the CLI instead)
+    hourly_compaction_interval_seconds: float = 60 * 60
+    hourly_compaction_grace_seconds: float = 60 * 60  # Wait this long after midnight UTC before compacting a day
+    hourly_manifest_check_seconds: float = 5 * 60  # Re-read hourly_segments/manifest.json this often
+    
+    # Admission Control Configuration (per client and worker)
+    # /test/* diagnostics are served from a cache and limited tightly; bulk data routes more loosely
+    admission_enabled: bool = True
+    diagnostics_rate_per_minute: float = 6
+    diagnostics_burst: int = 3
+    diagnostics_max_concurrent: int = 1  # Requests in progress across all clients
+    diagnostics_cache_seconds: float = 60  # Reuse diagnostics results this long
+    diagnostics_sample_bytes: int = 8192  # Head of training_dataset/daily.csv read for sample rows
+    costly_rate_per_minute: float = 60
+    costly_burst: int = 20
+    costly_max_concurrent: int = 8
+    admission_max_clients: int = 10000  # Clients whose token buckets are remembered
+    
+    # Profiling Configuration (off by default)
+    # Send "X-Profile: <admin token>" to sample one request's stacks and get a Server-Timing breakdown;
+    # those and slower-than-threshold requests are listed at /api/admin/profiles
+    profiling_enabled: bool = False
+    profiling_slow_ms: float = 1000
+    profiling_buffer_size: int = 50  # Profiles kept in memory
+    profiling_sample_interval_ms: float = 2
+    admin_token: str = ""  # X-Profile and /api/admin/* (as X-Admin-Token) are disabled while unset
+    
+    # Maximum number of days in one /api/forecast/batch request
+    batch_max_days: int = 31
+    
+    # Response Compression Configuration (brotli is used when installed and accepted by the client)
+    compression_min_bytes: int = 1024  # Smaller responses are sent uncompressed
+    gzip_compresslevel: int = 6
+    brotli_quality: int = 9  # Snapshot responses are compressed once per version, so favour ratio
+    
+    # HTTP Caching Configuration (Cache-Control max-age for browsers and CDNs)
+    forecast_cache_max_age: int = 300
+    hourly_cache_max_age: int = 60
+    
+    # Startup Configuration
+    # Create the S3 client (importing boto3) in a background startup task instead of at import time,
+    # so the server binds its port and answers /health sooner after a cold start
+    fast_startup: bool = True
+    
     # API Configuration
     api_host: str = "0.0.0.0"
     api_port: int = 8000
     
+    # Logging Configuration
+    log_level: str = "INFO"  # Set to DEBUG for per-request forecast/actual demand details
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
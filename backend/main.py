@@ -1,18 +1,69 @@
-from fastapi import FastAPI, HTTPException
+import time
+_import_started = time.perf_counter()  # Reported as startup_import_seconds
+
+from fastapi import Depends, FastAPI, HTTPException, Request, Response
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from services.s3_service import s3_service
+from routers import admin, demand, events, forecast, hourly
+from services.s3_service import s3_service, async_s3_service
+from services.admission import AdmissionMiddleware, diagnostics_admission
+from services.demand_store import demand_store
+from services.forecast import (
+    FORECAST_KEY, columnar_forecast_payload, merge_actual_demand, parse_forecast_csv, peak_and_low
+)
+from services.hourly import SUPPLY_SOURCES, parse_hourly_json
+from services.hourly_segments import hourly_compactor, hourly_segments
+from services.ontario_time import get_today_ontario_date
+from services.metrics import MetricsMiddleware, registry
+from services.profiling import ProfilingMiddleware, phase
+from services.refresher import Snapshot, refresher
+from services.single_flight import AsyncSingleFlight
+from services.responses import (
+    CompressionMiddleware, cached_json_response, negotiate_encoding, variant_etag, wants_columnar
+)
 from config import settings
-from botocore.exceptions import ClientError
+from contextlib import asynccontextmanager
+import asyncio
 import csv
 import io
-import json
-from datetime import datetime, date, timedelta
+import logging
+from datetime import date, datetime, timezone
 from typing import List, Dict, Optional
 
+logging.basicConfig(
+    level=settings.log_level.upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+def warm_up() -> None:
+    """Create the S3 client (importing boto3) off the request path."""
+    started = time.perf_counter()
+    client = s3_service.s3_client
+    if client is not None:
+        logger.info(f"S3 client ready in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info(f"Application imported in {import_seconds * 1000:.0f} ms")
+    if settings.fast_startup:
+        # Runs in a worker thread while the server binds its port and starts answering /health
+        app.state.warm_up = asyncio.create_task(asyncio.to_thread(warm_up))
+    # Keep the latest forecast and hourly snapshot warm in the background
+    if settings.refresh_enabled:
+        refresher.start()
+    # Merge closed days of hourly_data/ objects into daily segments
+    if settings.hourly_compaction_enabled:
+        hourly_compactor.start()
+    yield
+    await hourly_compactor.stop()
+    await refresher.stop()
+
 app = FastAPI(
     title="IESO API",
     description="Backend API for IESO energy forecasting application",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Configure CORS to allow frontend requests
@@ -28,8 +79,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Age", "ETag", "Warning", "Server-Timing", "X-Profile-Id"],
 )
 
+# Compress other responses (batch, streaming); snapshot responses arrive already compressed
+app.add_middleware(
+    CompressionMiddleware, minimum_size=settings.compression_min_bytes, compresslevel=settings.gzip_compresslevel
+)
+# Phase timings of every request and stack samples of flagged ones (see services/profiling.py)
+if settings.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware)
+# Hold admission slots of costly routes until streamed responses have been sent
+app.add_middleware(AdmissionMiddleware)
+# Record per-route latency for /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Health check endpoint
 @app.get("/")
 async def root():
@@ -39,26 +103,70 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "IESO API"}
 
-@app.get("/test/s3")
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus-style metrics for this worker process."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+# Diagnostics results are shared by all callers for settings.diagnostics_cache_seconds
+diagnostics_builds = AsyncSingleFlight("diagnostics")
+diagnostics_results: Dict[str, tuple] = {}
+
+async def cached_diagnostics(name: str, build) -> dict:
+    """Return a recent diagnostics result, or build a new one (concurrent callers share the build)."""
+    cached = diagnostics_results.get(name)
+    if cached is not None and time.monotonic() - cached[0] < settings.diagnostics_cache_seconds:
+        return cached[1]
+    result = await diagnostics_builds.do(name, build)
+    diagnostics_results[name] = (time.monotonic(), result)
+    return result
+
+async def probe_bucket() -> dict:
+    """List the first few objects of the bucket and look up its region."""
+    probe = {"checked_at": datetime.now(timezone.utc).isoformat()}
+    try:
+        # One list request, however large the bucket is
+        objects = await async_s3_service.list_objects(max_keys=10)
+        probe["bucket_access"] = "success"
+        probe["sample_objects"] = objects
+        
+        # Also try to get bucket location
+        location = await async_s3_service.get_bucket_location()
+        if location:
+            probe["bucket_location"] = location
+            
+    except Exception as e:
+        probe["bucket_access"] = "failed"
+        probe["error"] = f"Unexpected error: {str(e)}"
+    return probe
+
+@app.get("/test/s3", dependencies=[Depends(diagnostics_admission)])
 async def test_s3():
     """
     Test endpoint to verify S3 connection and configuration.
     Returns detailed status about S3 setup and connectivity.
+    Bucket access is checked with a single small listing, reused for DIAGNOSTICS_CACHE_SECONDS.
     """
+    # Creating the client imports boto3 in fast-startup mode (or waits for the warm-up
+    # thread doing so), so resolve it in a worker thread rather than on the event loop
+    client = await asyncio.to_thread(getattr, s3_service, "s3_client")
     result = {
-        "s3_client_initialized": s3_service.s3_client is not None,
+        "s3_client_initialized": client is not None,
         "config": {
             "aws_access_key_id_set": bool(settings.aws_access_key_id),
             "aws_secret_access_key_set": bool(settings.aws_secret_access_key),
             "aws_region": settings.aws_region,
             "s3_bucket_name": settings.s3_bucket_name,
+            "s3_local_root": settings.s3_local_root,
         },
         "bucket_access": None,
+        "cache": s3_service.cache.stats(),
+        "circuit_breaker": s3_service.breaker.stats(),
         "error": None
     }
     
     # Check if credentials are configured
-    if not settings.aws_access_key_id or not settings.aws_secret_access_key:
+    if not settings.s3_local_root and (not settings.aws_access_key_id or not settings.aws_secret_access_key):
         result["error"] = "AWS credentials not configured in environment variables"
         return result
     
@@ -67,50 +175,21 @@ async def test_s3():
         return result
     
     # Test bucket access
-    if s3_service.s3_client:
-        try:
-            # Try to list objects (limited to first 10 for testing)
-            objects = s3_service.list_objects()
-            result["bucket_access"] = "success"
-            result["object_count"] = len(objects)
-            result["sample_objects"] = objects[:10]  # First 10 objects as sample
-            
-            # Also try to get bucket location
-            try:
-                location = s3_service.s3_client.get_bucket_location(Bucket=settings.s3_bucket_name)
-                result["bucket_location"] = location.get('LocationConstraint', 'us-east-1')
-            except:
-                pass
-                
-        except ClientError as e:
-            error_code = e.response.get('Error', {}).get('Code', 'Unknown')
-            error_message = e.response.get('Error', {}).get('Message', str(e))
-            result["bucket_access"] = "failed"
-            result["error"] = f"AWS Error ({error_code}): {error_message}"
-        except Exception as e:
-            result["bucket_access"] = "failed"
-            result["error"] = f"Unexpected error: {str(e)}"
+    if client is not None:
+        result.update(await cached_diagnostics("s3", probe_bucket))
     else:
         result["error"] = "S3 client failed to initialize"
     
     return result
 
-def get_today_ontario_date() -> date:
-    """
-    Get today's date in Ontario/Eastern timezone.
-    Ontario is UTC-5 (EST) or UTC-4 (EDT), so we subtract 5 hours from UTC.
-    This ensures we get the correct date regardless of server timezone (e.g., UTC on Render).
-    """
-    utc_now = datetime.utcnow()
-    # Subtract 5 hours to get Eastern time
-    ontario_time = utc_now - timedelta(hours=5)
-    return ontario_time.date()
-
 def get_actual_demand_from_training_dataset(target_date: Optional[date] = None) -> Dict[str, Optional[float]]:
     """
     Fetch actual demand values from the training dataset in S3.
     Fetches from the specific file: training_dataset/daily.csv
-    Uses the "Ontario Demand" column and filters for target date and previous day (to handle midnight crossover).
+    Uses the "Ontario Demand" column and filters for the target date.
+    The dataset is parsed once per S3 object version by the demand store, so repeated
+    calls only cost an O(1) lookup into the in-memory hourly series. Until that series
+    is loaded, the day is found with S3 Range requests (see ACTUAL_DEMAND_LOOKUP_MODE).
     Returns a dictionary mapping hour strings (HH:MM) to actual demand values (or None if not available).
     
     Args:
@@ -126,184 +205,37 @@ def get_actual_demand_from_training_dataset(target_date: Optional[date] = None)
         if target_date is None:
             target_date = get_today_ontario_date()
         
-        print(f"Fetching actual demand for date: {target_date}")
-        
-        # Fetch the specific CSV file from S3
-        file_key = "training_dataset/daily.csv"
-        csv_data = s3_service.get_object(file_key)
+        actual_demand_map = demand_store.lookup_day(target_date)
         
-        if csv_data is None:
-            print(f"Error: Could not fetch {file_key} from S3")
-            return actual_demand_map
+        logger.debug(f"Hours with actual demand data for {target_date}: {len(actual_demand_map)}")
+        if not actual_demand_map:
+            logger.warning(f"No actual demand data found for date {target_date}")
         
-        csv_string = csv_data.decode('utf-8')
-        csv_reader = csv.DictReader(io.StringIO(csv_string))
-        
-        # Get column names (case-insensitive matching)
-        fieldnames = csv_reader.fieldnames
-        if not fieldnames:
-            print("Error: CSV has no column headers")
-            return actual_demand_map
-        
-        print(f"CSV columns found: {fieldnames}")
-        
-        # Find Date column (case-insensitive)
-        date_col = None
-        for col in fieldnames:
-            col_lower = col.lower().strip()
-            if col_lower == 'date':
-                date_col = col
-                break
-        
-        # Find Hour column (case-insensitive)
-        hour_col = None
-        for col in fieldnames:
-            col_lower = col.lower().strip()
-            if col_lower == 'hour':
-                hour_col = col
-                break
-        
-        # Find demand column (case-insensitive, looking for "ontario demand")
-        demand_col = None
-        for col in fieldnames:
-            col_lower = col.lower().strip()
-            if 'ontario' in col_lower and 'demand' in col_lower:
-                demand_col = col
-                break
-        
-        if not date_col:
-            print(f"Error: Could not find 'Date' column. Available columns: {fieldnames}")
-            return actual_demand_map
-        
-        if not hour_col:
-            print(f"Error: Could not find 'Hour' column. Available columns: {fieldnames}")
-            return actual_demand_map
-        
-        if not demand_col:
-            print(f"Error: Could not find 'Ontario Demand' column. Available columns: {fieldnames}")
-            return actual_demand_map
-        
-        print(f"Using date column: '{date_col}', hour column: '{hour_col}', demand column: '{demand_col}'")
-        
-        rows_processed = 0
-        rows_matched = 0
-        sample_rows_logged = 0
-        date_mismatches = 0
-        date_matches = 0
-        
-        # Parse the CSV to extract actual demand values from "Ontario Demand" column
-        for row in csv_reader:
-            rows_processed += 1
-            
-            # Log first few rows for debugging
-            if sample_rows_logged < 3:
-                print(f"Sample row {sample_rows_logged + 1}: {dict(row)}")
-                sample_rows_logged += 1
-            
-            try:
-                date_str = row.get(date_col, '').strip()
-                hour_str = row.get(hour_col, '').strip()
-                
-                if not date_str or not hour_str:
-                    if rows_processed <= 5:
-                        print(f"Row {rows_processed}: Missing date or hour - date_str='{date_str}', hour_str='{hour_str}'")
-                    continue
-                
-                # Parse the date (format: "2002-05-01")
-                try:
-                    row_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-                except ValueError:
-                    # Try alternative date formats
-                    try:
-                        row_date = datetime.strptime(date_str, "%Y/%m/%d").date()
-                    except ValueError:
-                        if rows_processed <= 5:
-                            print(f"Row {rows_processed}: Could not parse date '{date_str}'")
-                        continue
-                
-                # Check if this row is for the target date
-                if row_date != target_date:
-                    date_mismatches += 1
-                    if rows_processed <= 5:
-                        print(f"Row {rows_processed}: Date mismatch - row_date={row_date}, target_date={target_date}")
-                    continue
-                
-                date_matches += 1
-                
-                # Parse the hour (format: 1-24)
-                # Note: Hour 1 in dataset = 00:00-01:00, so maps to "00:00"
-                #       Hour 2 in dataset = 01:00-02:00, so maps to "01:00"
-                #       Hour N maps to (N-1):00
-                try:
-                    hour_num = int(hour_str)
-                    if hour_num < 1 or hour_num > 24:
-                        print(f"Row {rows_processed}: Invalid hour number {hour_num}")
-                        continue
-                    # Convert to HH:MM format: hour 1 -> "00:00", hour 2 -> "01:00", etc.
-                    hour_formatted = f"{(hour_num - 1):02d}:00"
-                except (ValueError, TypeError) as e:
-                    print(f"Row {rows_processed}: Could not parse hour '{hour_str}': {e}")
-                    continue
-                
-                # Get demand value from "Ontario Demand" column
-                demand_str = row.get(demand_col, '').strip()
-                if not demand_str or demand_str.lower() in ['', 'na', 'n/a', 'null', 'none']:
-                    if rows_processed <= 5:
-                        print(f"Row {rows_processed}: Empty or invalid demand value '{demand_str}'")
-                    continue
-                
-                try:
-                    demand_value = float(demand_str)
-                except (ValueError, TypeError) as e:
-                    if rows_processed <= 5:
-                        print(f"Row {rows_processed}: Could not convert demand '{demand_str}' to float: {e}")
-                    continue
-                
-                # Store the actual demand value
-                actual_demand_map[hour_formatted] = round(demand_value)
-                rows_matched += 1
-                
-                if rows_matched <= 5:
-                    print(f"✓ Matched row {rows_processed}: date={row_date}, hour={hour_num} -> '{hour_formatted}', demand={demand_value}")
-                        
-            except Exception as e:
-                # Skip rows that can't be parsed
-                if rows_processed <= 10:
-                    print(f"Row {rows_processed}: Exception during parsing: {e}")
-                continue
-        
-        print(f"=" * 60)
-        print(f"ACTUAL DEMAND FETCH SUMMARY:")
-        print(f"  Target date: {target_date}")
-        print(f"  Total rows processed: {rows_processed}")
-        print(f"  Rows with matching date: {date_matches}")
-        print(f"  Rows with non-matching date: {date_mismatches}")
-        print(f"  Rows successfully matched and added: {rows_matched}")
-        print(f"  Hours with actual demand data: {len(actual_demand_map)}")
-        if actual_demand_map:
-            print(f"  Sample hours found: {sorted(list(actual_demand_map.keys()))[:10]}")
-            print(f"  Sample values: {[(k, actual_demand_map[k]) for k in sorted(list(actual_demand_map.keys()))[:5]]}")
-        else:
-            print(f"  WARNING: No actual demand data found for date {target_date}!")
-        print(f"=" * 60)
-        
-    except Exception as e:
+    except Exception:
         # Log error but don't fail - return whatever we have
-        print(f"Error fetching actual demand from training dataset: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error fetching actual demand from training dataset")
     
     return actual_demand_map
 
-@app.get("/api/test/actual-demand")
+@app.get("/api/test/actual-demand", dependencies=[Depends(diagnostics_admission)])
 async def test_actual_demand():
     """
     Test endpoint to debug actual demand fetching from training dataset.
     Returns information about the CSV structure and sample data.
+    Sample rows come from a Range read of the head of the file, and the result is reused
+    for DIAGNOSTICS_CACHE_SECONDS.
     """
+    return await cached_diagnostics("actual_demand", inspect_training_dataset)
+
+async def inspect_training_dataset() -> dict:
     try:
         file_key = "training_dataset/daily.csv"
-        csv_data = s3_service.get_object(file_key)
+        metadata = await async_s3_service.head_object(file_key)
+        csv_data = None
+        if metadata is not None:
+            csv_data = await async_s3_service.get_object_range(
+                file_key, 0, settings.diagnostics_sample_bytes - 1, if_match=metadata['ETag']
+            )
         
         if csv_data is None:
             return {
@@ -311,7 +243,10 @@ async def test_actual_demand():
                 "file_exists": False
             }
         
-        csv_string = csv_data.decode('utf-8')
+        csv_string = csv_data.decode('utf-8', errors='replace')
+        if len(csv_data) < metadata['ContentLength']:
+            # Drop the row cut off by the end of the range
+            csv_string = csv_string[:csv_string.rfind('\n') + 1]
         csv_reader = csv.DictReader(io.StringIO(csv_string))
         
         fieldnames = csv_reader.fieldnames
@@ -327,10 +262,11 @@ async def test_actual_demand():
         
         # Try to get actual demand for today
         today = date.today()
-        actual_demand_map = get_actual_demand_from_training_dataset(today)
+        actual_demand_map = await asyncio.to_thread(get_actual_demand_from_training_dataset, today)
         
         return {
             "file_exists": True,
+            "file_size": metadata['ContentLength'],
             "columns": fieldnames,
             "sample_rows": sample_rows,
             "target_date": str(today),
@@ -346,242 +282,226 @@ async def test_actual_demand():
             "traceback": traceback.format_exc()
         }
 
-@app.get("/api/forecast/latest")
-async def get_latest_forecast():
+async def build_forecast_payload() -> dict:
     """
     Fetch the latest forecast CSV from S3 and return formatted forecast data.
     Merges actual demand values from training_dataset when available.
     Returns forecast data with hour, predicted demand, and actual demand (or N/A if not available).
     """
     try:
-        # Fetch the CSV file from S3
-        csv_key = "daily_prediction/latest_forecast.csv"
-        csv_data = s3_service.get_object(csv_key)
+        # Use today's date in Ontario timezone for fetching actual demand (not the forecast CSV date)
+        # This ensures we get today's actual demand values, even if the forecast is for a different date
+        # Using Ontario timezone accounts for Render using UTC (subtract 5 hours)
+        today_date = get_today_ontario_date()
+        
+        # Fetch the forecast CSV and the actual demand from the training dataset concurrently
+        csv_data, actual_demand_map = await asyncio.gather(
+            async_s3_service.get_object(FORECAST_KEY),
+            asyncio.to_thread(get_actual_demand_from_training_dataset, today_date)
+        )
         
         if csv_data is None:
             raise HTTPException(status_code=404, detail="Forecast file not found in S3")
         
         # Parse CSV data
-        csv_string = csv_data.decode('utf-8')
-        csv_reader = csv.DictReader(io.StringIO(csv_string))
-        
-        forecast_data = []
-        first_time_str = None
-        forecast_date = None
+        rows = parse_forecast_csv(csv_data)
+        if not rows:
+            raise HTTPException(status_code=500, detail="Error processing forecast data: forecast file has no rows")
         
-        # First pass: collect forecast data and determine the date
-        for row in csv_reader:
-            # Parse the time string
-            time_str = row['time'].strip()
-            
-            # Store first time for timestamp
-            if first_time_str is None:
-                first_time_str = time_str
-                try:
-                    forecast_date = datetime.strptime(time_str, "%Y-%m-%d %H:%M:%S").date()
-                except ValueError:
-                    pass
-            
-            try:
-                # Parse datetime (format: "2025-10-17 01:00:00")
-                dt = datetime.strptime(time_str, "%Y-%m-%d %H:%M:%S")
-                # Format hour as HH:MM
-                hour = dt.strftime("%H:%M")
-            except ValueError:
-                # Fallback: try to extract hour if format is different
-                hour = time_str.split()[1][:5] if len(time_str.split()) > 1 else "00:00"
-            
-            # Extract predicted demand (round to integer)
-            predicted = float(row['predicted_ontario_demand'].strip())
-            
-            forecast_data.append({
-                "hour": hour,
-                "predicted": round(predicted),
+        forecast_data = [
+            {
+                "hour": row['hour'],
+                "predicted": row['predicted'],
                 "actual": None  # Will be filled from training dataset
-            })
-        
-        # Use today's date in Ontario timezone for fetching actual demand (not the forecast CSV date)
-        # This ensures we get today's actual demand values, even if the forecast is for a different date
-        # Using Ontario timezone accounts for Render using UTC (subtract 5 hours)
-        today_date = get_today_ontario_date()
-        print(f"Forecast CSV date: {forecast_date}, Using today's date (Ontario time) for actual demand: {today_date}")
-        
-        # Fetch actual demand values from training dataset
-        # Use today's date to get current actual demand values
-        print(f"\n{'='*60}")
-        print(f"FORECAST ENDPOINT: Fetching actual demand for today's date={today_date}")
-        print(f"  (Forecast CSV date was: {forecast_date})")
-        print(f"{'='*60}")
-        actual_demand_map = get_actual_demand_from_training_dataset(today_date)
-        
-        print(f"\nFORECAST ENDPOINT: Received actual_demand_map with {len(actual_demand_map)} entries")
-        if actual_demand_map:
-            print(f"  Sample actual demand hours: {sorted(list(actual_demand_map.keys()))[:10]}")
-            print(f"  Sample actual demand values: {[(k, actual_demand_map[k]) for k in sorted(list(actual_demand_map.keys()))[:5]]}")
+            }
+            for row in rows
+        ]
+        first_dt = rows[0]['datetime']
+        forecast_date = first_dt.date() if first_dt else None
         
         # Merge actual demand values with forecast data
-        merged_count = 0
-        not_found_count = 0
-        forecast_hours = [item['hour'] for item in forecast_data]
-        print(f"\nFORECAST ENDPOINT: Merging actual demand into {len(forecast_data)} forecast data points")
-        print(f"  Forecast hours: {sorted(forecast_hours)[:10]}...")
+        with phase("merge"):
+            missing_hours = merge_actual_demand(forecast_data, actual_demand_map)
         
-        for item in forecast_data:
-            hour = item['hour']
-            if hour in actual_demand_map and actual_demand_map[hour] is not None:
-                item['actual'] = actual_demand_map[hour]
-                merged_count += 1
-                if merged_count <= 5:
-                    print(f"  ✓ Merged hour {hour}: actual={actual_demand_map[hour]}")
-            else:
-                # Keep as None (frontend should handle this as N/A)
-                item['actual'] = None
-                not_found_count += 1
-                if not_found_count <= 5:
-                    print(f"  ✗ No actual data for hour {hour}")
-        
-        print(f"\nFORECAST ENDPOINT MERGE SUMMARY:")
-        print(f"  Total forecast hours: {len(forecast_data)}")
-        print(f"  Hours with actual demand merged: {merged_count}")
-        print(f"  Hours without actual demand: {not_found_count}")
-        print(f"{'='*60}\n")
+        logger.debug(
+            f"Forecast for {forecast_date} merged with actual demand for {today_date} (Ontario time): "
+            f"{len(forecast_data) - len(missing_hours)}/{len(forecast_data)} hours have actuals, "
+            f"missing: {missing_hours}"
+        )
         
         # Find peak and low values (only from predicted for now, since actual might be incomplete)
-        peak_data = max(forecast_data, key=lambda x: x['predicted'])
-        low_data = min(forecast_data, key=lambda x: x['predicted'])
+        peak, low = peak_and_low(forecast_data)
         
         # Get the timestamp from the first row's time
-        timestamp = "N/A"
-        if first_time_str:
-            try:
-                first_dt = datetime.strptime(first_time_str, "%Y-%m-%d %H:%M:%S")
-                timestamp = first_dt.strftime("%I:%M %p")
-            except:
-                pass
+        timestamp = first_dt.strftime("%I:%M %p") if first_dt else "N/A"
         
         return {
             "forecast_data": forecast_data,
-            "peak": {
-                "hour": peak_data['hour'],
-                "demand": peak_data['predicted']
-            },
-            "low": {
-                "hour": low_data['hour'],
-                "demand": low_data['predicted']
-            },
+            "peak": peak,
+            "low": low,
             "timestamp": timestamp,
+            "start": first_dt.isoformat() if first_dt else None,
             "total_hours": len(forecast_data)
         }
         
     except HTTPException:
         raise
-    except ClientError as e:
-        error_code = e.response.get('Error', {}).get('Code', 'Unknown')
-        error_message = e.response.get('Error', {}).get('Message', str(e))
-        raise HTTPException(
-            status_code=500,
-            detail=f"AWS Error ({error_code}): {error_message}"
-        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error processing forecast data: {str(e)}"
         )
 
-@app.get("/api/hourly-data/latest")
-async def get_latest_hourly_data():
+def get_forecast_version() -> tuple:
+    """
+    Version of the inputs to the forecast response: the ETags of the forecast CSV and the
+    training dataset, plus the Ontario date (actual demand is looked up for "today").
+    """
+    forecast = s3_service.get_object_versioned(FORECAST_KEY, max_age=0)
+    series = demand_store.get_series(max_age=0)
+    return (
+        forecast.etag if forecast else None,
+        series.etag if series else None,
+        get_today_ontario_date()
+    )
+
+async def build_hourly_payload() -> dict:
     """
     Fetch the most recent hourly data JSON from S3 and return supply breakdown and import/export data.
     Returns supply breakdown (Nuclear, Wind, Hydro, Solar, Gas, Biofuel) and import/export values.
     """
     try:
-        # List all objects in hourly_data/ folder
-        prefix = "hourly_data/"
-        objects_with_metadata = s3_service.list_objects_with_metadata(prefix=prefix)
+        # Find the most recent file by LastModified timestamp (incremental listing of the
+        # hourly_data/ keys newer than the compacted segments)
+        most_recent = await asyncio.to_thread(hourly_segments.refresh_index)
         
-        if not objects_with_metadata:
+        if most_recent is None:
             raise HTTPException(status_code=404, detail="No hourly data files found in S3")
         
-        # Find the most recent file by LastModified timestamp
-        most_recent = max(objects_with_metadata, key=lambda x: x['LastModified'])
         most_recent_key = most_recent['Key']
         
         # Fetch the JSON file
-        json_data = s3_service.get_object(most_recent_key)
+        json_data = await async_s3_service.get_object(most_recent_key)
         
         if json_data is None:
             raise HTTPException(status_code=404, detail="Failed to fetch hourly data file from S3")
         
-        # Parse JSON data
-        data = json.loads(json_data.decode('utf-8'))
-        
-        # Extract supply breakdown and import/export data
-        supply_data = data.get('data', {})
-        
-        # Map supply sources with their colors
+        # Parse JSON data and map supply sources with their colors
+        hourly_data = parse_hourly_json(json_data)
         supply_breakdown = [
             {
-                "source": "Nuclear",
-                "mw": supply_data.get('Nuclear', 0),
-                "color": "#8B5CF6"
-            },
-            {
-                "source": "Gas",
-                "mw": supply_data.get('Gas', 0),
-                "color": "#EF4444"
-            },
-            {
-                "source": "Wind",
-                "mw": supply_data.get('Wind', 0),
-                "color": "#10B981"
-            },
-            {
-                "source": "Hydro",
-                "mw": supply_data.get('Hydro', 0),
-                "color": "#3B82F6"
-            },
-            {
-                "source": "Solar",
-                "mw": supply_data.get('Solar', 0),
-                "color": "#FBBF24"
-            },
-            {
-                "source": "Biofuel",
-                "mw": supply_data.get('Biofuel', 0),
-                "color": "#84CC16"
+                "source": source,
+                "mw": hourly_data['supply'][source],
+                "color": color
             }
+            for source, color in SUPPLY_SOURCES
         ]
         
-        # Get imports and exports
-        imports = supply_data.get('HourlyImports', 0)
-        exports = supply_data.get('HourlyExports', 0)
-        
         return {
             "supply_breakdown": supply_breakdown,
-            "imports": imports,
-            "exports": exports,
-            "fetched_at": data.get('fetched_at_utc', ''),
+            "imports": hourly_data['imports'],
+            "exports": hourly_data['exports'],
+            "fetched_at": hourly_data['fetched_at'],
             "file_key": most_recent_key
         }
         
     except HTTPException:
         raise
-    except ClientError as e:
-        error_code = e.response.get('Error', {}).get('Code', 'Unknown')
-        error_message = e.response.get('Error', {}).get('Message', str(e))
-        raise HTTPException(
-            status_code=500,
-            detail=f"AWS Error ({error_code}): {error_message}"
-        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error processing hourly data: {str(e)}"
         )
 
-# Future endpoints will be added here
-# app.include_router(data.router, prefix="/api/data", tags=["data"])
-# app.include_router(s3.router, prefix="/api/s3", tags=["s3"])
+def get_hourly_version() -> tuple:
+    """Version of the hourly response: the key and modification time of the newest hourly_data/ object."""
+    most_recent = hourly_segments.refresh_index()
+    if most_recent is None:
+        return (None, None)
+    return (most_recent['Key'], most_recent['LastModified'])
+
+refresher.register("forecast", get_forecast_version, build_forecast_payload)
+refresher.register("hourly", get_hourly_version, build_hourly_payload)
+
+# Coalesces request-path builds when the refresher isn't running
+snapshot_builds = AsyncSingleFlight("snapshot_build")
+# Last successful request-path build of each response, served (marked stale) if a rebuild fails
+last_good_snapshots: Dict[str, Snapshot] = {}
+
+async def build_snapshot(build) -> Snapshot:
+    return Snapshot.create(await build())
+
+async def get_snapshot_response(name: str, build, request: Request, max_age: int, columnar=None) -> Response:
+    """
+    Return the prepared snapshot kept warm by the background refresher as pre-encoded JSON,
+    reporting the time since its version was last confirmed in the Age header (so it stays below
+    max-age while the refresher keeps confirming it) and answering If-None-Match with 304.
+    Falls back to building the payload on the request path.
+    The body is compressed (brotli or gzip) once per snapshot and shape; if columnar is given, it
+    builds the columnar payload for clients asking for ?format=columnar.
+    While S3 is failing, the last good snapshot is served and marked as stale.
+    """
+    stale = False
+    snapshot = refresher.get(name)
+    if snapshot is None and refresher.running:
+        # First request before the refresher's initial pass completed
+        snapshot = await refresher.refresh(name)
+    if snapshot is None:
+        try:
+            snapshot = await snapshot_builds.do(name, lambda: build_snapshot(build))
+            last_good_snapshots[name] = snapshot
+        except HTTPException:
+            snapshot = last_good_snapshots.get(name)
+            if snapshot is None:
+                raise
+            logger.warning(f"Serving last good '{name}' response after a failed rebuild")
+            stale = True
+    stale = stale or refresher.is_stale(name) or s3_service.degraded
+    
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    if columnar is not None and wants_columnar(request):
+        shape = "columnar"
+        body, encoding = snapshot.encoded(encoding, shape, columnar)
+    else:
+        shape = None
+        body, encoding = snapshot.encoded(encoding)
+    etag = variant_etag(snapshot.etag, shape, encoding)
+    
+    cache_control = f"public, max-age={max_age}"
+    return cached_json_response(
+        request, body, etag, cache_control, age=snapshot.age_seconds, encoding=encoding, stale=stale
+    )
+
+@app.get("/api/forecast/latest")
+async def get_latest_forecast(request: Request):
+    """
+    Return today's forecast with predicted and actual demand, plus peak and low hours.
+    Served from the in-memory snapshot kept warm by the background refresher.
+    Pass ?format=columnar (or Accept: application/vnd.ieso.columnar+json) to get forecast_data
+    as parallel "predicted"/"actual" arrays with a start time and step instead of a list of points.
+    """
+    return await get_snapshot_response(
+        "forecast", build_forecast_payload, request, settings.forecast_cache_max_age,
+        columnar=columnar_forecast_payload
+    )
+
+@app.get("/api/hourly-data/latest")
+async def get_latest_hourly_data(request: Request):
+    """
+    Return the supply breakdown and import/export values from the most recent hourly data.
+    Served from the in-memory snapshot kept warm by the background refresher.
+    """
+    return await get_snapshot_response("hourly", build_hourly_payload, request, settings.hourly_cache_max_age)
+
+# API routers
+app.include_router(demand.router, prefix="/api", tags=["demand"])
+app.include_router(forecast.router, prefix="/api", tags=["forecast"])
+app.include_router(events.router, prefix="/api", tags=["events"])
+app.include_router(hourly.router, prefix="/api", tags=["hourly"])
+app.include_router(admin.router, prefix="/api", tags=["admin"])
+
+import_seconds = time.perf_counter() - _import_started
+registry.gauge("startup_import_seconds", "Time taken to import the application module").set(import_seconds)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,39 @@
+"""
+Admin endpoints for inspecting recorded request profiles.
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from config import settings
+from services.profiling import check_token, profile_store
+
+router = APIRouter()
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Only answer when profiling is enabled and settings.admin_token is set, and check X-Admin-Token."""
+    if not settings.profiling_enabled:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if not settings.admin_token:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled (ADMIN_TOKEN is not set)")
+    if not check_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@router.get("/admin/profiles", dependencies=[Depends(require_admin)])
+async def list_profiles():
+    """
+    Return the recorded profiles of this worker, newest first: requests sent with X-Profile,
+    and requests and snapshot refreshes slower than PROFILING_SLOW_MS, with their phase breakdown.
+    """
+    return {"slow_threshold_ms": settings.profiling_slow_ms, "profiles": profile_store.summaries()}
+
+
+@router.get("/admin/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+async def get_profile(profile_id: str):
+    """Return one recorded profile, including its stack samples if it was requested with X-Profile."""
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found (it may have been evicted)")
+    return profile.detail()
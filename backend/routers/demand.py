@@ -0,0 +1,96 @@
+"""
+Historical Ontario Demand endpoints backed by the in-memory demand store.
+"""
+import asyncio
+import json
+from datetime import date
+from typing import Iterator, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from services.admission import costly_admission
+from services.demand_store import DemandSeries, demand_store, format_hour
+from services.ontario_time import get_today_ontario_date
+from services.rollups import demand_rollups
+
+router = APIRouter()
+
+# Days of data encoded per streamed chunk
+STREAM_CHUNK_DAYS = 31
+
+
+def _chunked(lines: Iterator[str]) -> Iterator[str]:
+    """Group lines into chunks of about STREAM_CHUNK_DAYS days to keep per-chunk overhead low."""
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= STREAM_CHUNK_DAYS * 24:
+            yield "".join(buffer)
+            buffer = []
+    if buffer:
+        yield "".join(buffer)
+
+
+def _ndjson_lines(series: DemandSeries, start: date, end: date) -> Iterator[str]:
+    for day, hour_num, value in series.iter_range(start, end):
+        yield json.dumps({"date": day.isoformat(), "hour": format_hour(hour_num), "demand": round(value)}) + "\n"
+
+
+def _csv_lines(series: DemandSeries, start: date, end: date) -> Iterator[str]:
+    yield "date,hour,demand\n"
+    for day, hour_num, value in series.iter_range(start, end):
+        yield f"{day.isoformat()},{format_hour(hour_num)},{round(value)}\n"
+
+
+@router.get("/actual-demand", dependencies=[Depends(costly_admission)])
+async def stream_actual_demand(
+    start: date,
+    end: Optional[date] = None,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$")
+):
+    """
+    Stream hourly actual Ontario Demand between start and end (inclusive, defaults to today)
+    as NDJSON or CSV. Rows are generated on the fly from the in-memory series, so arbitrarily
+    long ranges never build the full result in memory. Hours without data are omitted.
+    """
+    if end is None:
+        end = get_today_ontario_date()
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must be on or after start")
+
+    series = await asyncio.to_thread(demand_store.get_series)
+    if series is None:
+        raise HTTPException(status_code=503, detail="Training dataset is not available")
+
+    if format == "csv":
+        return StreamingResponse(
+            _chunked(_csv_lines(series, start, end)),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="actual_demand_{start}_{end}.csv"'}
+        )
+    return StreamingResponse(_chunked(_ndjson_lines(series, start, end)), media_type="application/x-ndjson")
+
+
+@router.get("/demand/peaks", dependencies=[Depends(costly_admission)])
+async def get_demand_peaks(
+    period: str = Query("daily", pattern="^(daily|weekly|monthly)$"),
+    start: Optional[date] = None,
+    end: Optional[date] = None
+):
+    """
+    Return the peak, low, mean and load factor of actual Ontario Demand per day, ISO week
+    (Monday to Sunday) or calendar month, for the periods overlapping start..end (inclusive;
+    all periods if omitted). Rollups are built once per version of the training dataset, so
+    requests only slice a precomputed table.
+    """
+    if start and end and end < start:
+        raise HTTPException(status_code=400, detail="end must be on or after start")
+
+    series = await asyncio.to_thread(demand_store.get_series)
+    if series is None:
+        raise HTTPException(status_code=503, detail="Training dataset is not available")
+
+    tables = await asyncio.to_thread(demand_rollups.get, series)
+    buckets = tables[period].select(start, end)
+    return {"period": period, "buckets": buckets, "count": len(buckets)}
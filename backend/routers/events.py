@@ -0,0 +1,58 @@
+"""
+Server-Sent Events stream of the forecast and hourly supply snapshots.
+"""
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+
+from config import settings
+from services.refresher import Subscription, refresher
+
+router = APIRouter()
+
+
+def _format_event(name: str, event_id: str, data: bytes) -> bytes:
+    # Encoded JSON has no newlines, so the payload fits on a single data: line
+    return b"event: " + name.encode() + b"\nid: " + event_id.encode() + b"\ndata: " + data + b"\n\n"
+
+
+async def _event_stream(subscription: Subscription) -> AsyncIterator[bytes]:
+    try:
+        # Ask EventSource clients to wait one refresh interval before reconnecting
+        yield f"retry: {int(settings.refresh_interval_seconds * 1000)}\n\n".encode()
+        while True:
+            updates = await subscription.next(settings.sse_heartbeat_seconds)
+            if not updates:
+                # Comment line keeps proxies from closing an idle connection
+                yield b": keep-alive\n\n"
+                continue
+            for name, snapshot in updates.items():
+                yield _format_event(name, snapshot.etag.strip('"'), snapshot.body)
+    finally:
+        refresher.unsubscribe(subscription)
+
+
+@router.get("/events")
+async def stream_events(topics: Optional[str] = None):
+    """
+    Stream snapshot updates as Server-Sent Events.
+    Each event is named after its snapshot ("forecast" or "hourly") and carries the same JSON as
+    /api/forecast/latest or /api/hourly-data/latest. Current snapshots are sent on connect and new ones
+    only when the underlying S3 objects change. All clients share the background refresher's polling,
+    so S3 load does not grow with the number of viewers.
+    Pass topics=forecast,hourly to choose which snapshots to receive (default: all).
+    """
+    if not refresher.running:
+        raise HTTPException(status_code=503, detail="Live updates are disabled (REFRESH_ENABLED=false)")
+
+    names = [name.strip() for name in topics.split(",") if name.strip()] if topics else list(refresher.source_names)
+    unknown = sorted(set(names) - set(refresher.source_names))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown topics: {', '.join(unknown)}")
+
+    return StreamingResponse(
+        _event_stream(refresher.subscribe(names)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,145 @@
+"""
+Multi-day forecast endpoints.
+"""
+import asyncio
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+
+from config import settings
+from services.admission import costly_admission
+from services.demand_store import HOURS_PER_DAY, demand_store, format_hour
+from services.forecast import FORECAST_KEY, parse_forecast_csv, peak_and_low, to_columnar
+from services.latest_index import forecast_index
+from services.responses import encode_json, wants_columnar
+from services.s3_service import async_s3_service
+
+router = APIRouter()
+
+
+def _resolve_dates(dates: Optional[str], start: Optional[date], end: Optional[date]) -> List[date]:
+    """Turn either a comma-separated list of dates or a start/end range into a sorted list of dates."""
+    if dates:
+        try:
+            resolved = {date.fromisoformat(value.strip()) for value in dates.split(",") if value.strip()}
+        except ValueError:
+            raise HTTPException(status_code=400, detail="dates must be comma-separated YYYY-MM-DD values")
+    elif start:
+        end = end or start
+        if end < start:
+            raise HTTPException(status_code=400, detail="end must be on or after start")
+        if (end - start).days + 1 > settings.batch_max_days:
+            raise HTTPException(status_code=400, detail=f"At most {settings.batch_max_days} days per request")
+        resolved = {start + timedelta(days=offset) for offset in range((end - start).days + 1)}
+    else:
+        raise HTTPException(status_code=400, detail="Provide either dates or start (and optionally end)")
+
+    if not resolved:
+        raise HTTPException(status_code=400, detail="No dates requested")
+    if len(resolved) > settings.batch_max_days:
+        raise HTTPException(status_code=400, detail=f"At most {settings.batch_max_days} days per request")
+    return sorted(resolved)
+
+
+def _collect_predictions(forecast_files: List[bytes]) -> Dict[date, Dict[str, int]]:
+    """
+    Group predicted demand from several forecast CSVs by date and hour.
+    Files must be ordered oldest first, so newer forecasts for the same hour win.
+    """
+    predictions: Dict[date, Dict[str, int]] = {}
+    for csv_data in forecast_files:
+        for row in parse_forecast_csv(csv_data):
+            if row['datetime'] is not None:
+                predictions.setdefault(row['datetime'].date(), {})[row['hour']] = row['predicted']
+    return predictions
+
+
+def _forecast_windows(target_dates: List[date]) -> List[Tuple[datetime, datetime]]:
+    """
+    Modification-time windows of the forecast files that may cover the requested dates: from two
+    days before to two days after each date (UTC), with overlapping windows merged.
+    """
+    windows: List[Tuple[datetime, datetime]] = []
+    for target_date in target_dates:
+        start = datetime.combine(target_date - timedelta(days=2), time.min, tzinfo=timezone.utc)
+        end = datetime.combine(target_date + timedelta(days=2), time.min, tzinfo=timezone.utc)
+        if windows and start <= windows[-1][1]:
+            windows[-1] = (windows[-1][0], max(windows[-1][1], end))
+        else:
+            windows.append((start, end))
+    return windows
+
+
+async def _fetch_forecast_files(target_dates: List[date]) -> List[bytes]:
+    """
+    Fetch, in parallel, every forecast CSV that may cover the requested (sorted) dates: the files
+    in daily_prediction/ modified within two days of one of them, plus the latest forecast.
+    The daily_prediction/ listing comes from an incremental index refreshed at most once per
+    cache TTL. Returned oldest first.
+    """
+    await asyncio.to_thread(forecast_index.refresh, settings.s3_cache_ttl_seconds)
+
+    candidates = {}
+    for window_start, window_end in _forecast_windows(target_dates):
+        for obj in forecast_index.objects_between(window_start, window_end):
+            if obj['Key'].endswith('.csv') and obj['LastModified'] < window_end:
+                candidates[obj['Key']] = obj
+    keys = [obj['Key'] for obj in sorted(candidates.values(), key=lambda obj: obj['LastModified'])]
+    # The latest forecast is rewritten in place, so it is always fetched (last, so it wins)
+    keys = [key for key in keys if key != FORECAST_KEY] + [FORECAST_KEY]
+    contents = await async_s3_service.get_objects(keys)
+    return [contents[key] for key in keys if contents[key] is not None]
+
+
+@router.get("/forecast/batch", dependencies=[Depends(costly_admission)])
+async def get_forecast_batch(
+    request: Request,
+    dates: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None
+):
+    """
+    Return predicted and actual hourly demand for several days in one response.
+    Pass either dates=YYYY-MM-DD,YYYY-MM-DD,... or start=YYYY-MM-DD&end=YYYY-MM-DD.
+    Forecast files are fetched from S3 in parallel, and all actuals are served from one load
+    of the training dataset.
+    With ?format=columnar, each day's forecast_data is 24 hourly slots starting at midnight as
+    parallel "predicted"/"actual" arrays.
+    """
+    columnar = wants_columnar(request)
+    target_dates = _resolve_dates(dates, start, end)
+
+    forecast_files, series = await asyncio.gather(
+        _fetch_forecast_files(target_dates),
+        asyncio.to_thread(demand_store.get_series)
+    )
+    predictions = await asyncio.to_thread(_collect_predictions, forecast_files)
+
+    days = []
+    for target_date in target_dates:
+        predicted_by_hour = predictions.get(target_date, {})
+        actual_by_hour = series.get_day(target_date) if series is not None else {}
+        hours = sorted(set(predicted_by_hour) | set(actual_by_hour))
+        if columnar:
+            hours = [format_hour(hour) for hour in range(1, HOURS_PER_DAY + 1)]
+        forecast_data = [
+            {
+                "hour": hour,
+                "predicted": predicted_by_hour.get(hour),
+                "actual": actual_by_hour.get(hour)
+            }
+            for hour in hours
+        ]
+        peak, low = peak_and_low(forecast_data)
+        days.append({
+            "date": target_date.isoformat(),
+            "forecast_data": (
+                to_columnar(forecast_data, f"{target_date.isoformat()}T00:00:00") if columnar else forecast_data
+            ),
+            "peak": peak,
+            "low": low,
+            "total_hours": sum(1 for item in forecast_data if item["predicted"] is not None or item["actual"] is not None)
+        })
+
+    return Response(content=encode_json({"days": days, "total_days": len(days)}), media_type="application/json")
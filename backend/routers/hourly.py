@@ -0,0 +1,67 @@
+"""
+Hourly supply-mix history endpoints.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+
+from config import settings
+from services.admission import costly_admission
+from services.hourly import SUPPLY_SOURCES
+from services.hourly_segments import hourly_segments
+from services.responses import encode_json, wants_columnar
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Treat naive datetimes as UTC (S3 modification times are UTC)."""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+@router.get("/hourly-data/history", dependencies=[Depends(costly_admission)])
+async def get_hourly_history(request: Request, start: datetime, end: Optional[datetime] = None):
+    """
+    Return the supply mix (Nuclear, Gas, Wind, Hydro, Solar, Biofuel) and imports/exports of every
+    hourly_data object written between start and end (ISO datetimes, UTC unless an offset is given;
+    end defaults to now).
+    Pass ?format=columnar to get parallel arrays ("time", one per source, "imports", "exports")
+    instead of a list of points.
+    Compacted days are read from their daily segment; only newer days fetch the hourly objects.
+    """
+    start = _as_utc(start)
+    end = _as_utc(end) if end is not None else datetime.now(timezone.utc)
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must be on or after start")
+
+    await asyncio.to_thread(hourly_segments.refresh_index)
+    segments, objects = await asyncio.to_thread(hourly_segments.plan, start, end)
+    object_count = sum(entry["objects"] for entry in segments) + len(objects)
+    if object_count > settings.hourly_history_max_objects:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Window contains {object_count} hourly objects, at most "
+                   f"{settings.hourly_history_max_objects} per request"
+        )
+
+    points = await hourly_segments.load_points(segments, objects, start, end)
+
+    if wants_columnar(request):
+        data = {"time": [point["time"] for point in points]}
+        for source, _ in SUPPLY_SOURCES:
+            data[source] = [point["supply"][source] for point in points]
+        data["imports"] = [point["imports"] for point in points]
+        data["exports"] = [point["exports"] for point in points]
+    else:
+        data = [
+            {"time": point["time"], "supply": point["supply"], "imports": point["imports"], "exports": point["exports"]}
+            for point in points
+        ]
+
+    payload = {"start": start.isoformat(), "end": end.isoformat(), "count": len(points), "data": data}
+    return Response(content=encode_json(payload), media_type="application/json")
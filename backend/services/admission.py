@@ -0,0 +1,164 @@
+"""
+Admission control for costly routes.
+Each client gets a token bucket per route class, and each route class has a cap on requests in
+progress, so a burst of diagnostics or bulk requests from one client can't take S3 and CPU
+time away from the dashboard endpoints. Limits are per worker process.
+
+Clients are identified by request.client.host; behind a proxy, run uvicorn with
+--proxy-headers (and --forwarded-allow-ips) so that is the caller's address.
+
+FastAPI runs the exit code of yield dependencies before a StreamingResponse body is sent, so
+AdmissionMiddleware releases concurrency slots only once the whole response has been sent.
+"""
+import logging
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException, Request
+
+from config import settings
+from services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Scope key under which AdmissionMiddleware collects the slot releases of a request
+RELEASES_SCOPE_KEY = "admission.releases"
+
+admission_rejections = registry.counter(
+    "admission_rejections_total", "Requests rejected by admission control", ("route_class", "reason")
+)
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average, with bursts of up to `burst` requests."""
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """
+        Take a token if one is available.
+
+        Returns:
+            0 if the request is allowed, otherwise the seconds until the next token
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+
+class Admission:
+    """
+    FastAPI dependency enforcing a per-client rate limit and a concurrency cap for a class of routes.
+    Rate-limited requests get 429 and concurrency-capped requests get 503, both with Retry-After.
+
+    Usage:
+        @router.get("/expensive", dependencies=[Depends(costly_admission)])
+    """
+
+    def __init__(self, route_class: str, rate_per_minute: float, burst: int, max_concurrent: int,
+                 max_clients: int):
+        self.route_class = route_class
+        self.rate = rate_per_minute / 60
+        self.burst = burst
+        self.max_concurrent = max_concurrent
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._in_flight = 0
+
+    def _bucket(self, client: str) -> TokenBucket:
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.rate, self.burst)
+            # Forget the least recently seen clients (a new bucket starts full, so this only loosens limits)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        return bucket
+
+    def _reject(self, status_code: int, reason: str, retry_after: float) -> HTTPException:
+        admission_rejections.inc(route_class=self.route_class, reason=reason)
+        detail = "Too many requests" if status_code == 429 else "Server busy, try again shortly"
+        return HTTPException(status_code=status_code, detail=detail,
+                             headers={"Retry-After": str(max(1, int(retry_after + 0.999)))})
+
+    async def __call__(self, request: Request):
+        if not settings.admission_enabled:
+            yield
+            return
+
+        client = request.client.host if request.client else "unknown"
+        retry_after = self._bucket(client).take()
+        if retry_after:
+            logger.debug(f"Rate limited {client} on {self.route_class} route {request.url.path}")
+            raise self._reject(429, "rate_limited", retry_after)
+
+        # Requests run on one event loop, so the counter needs no lock
+        if self._in_flight >= self.max_concurrent:
+            raise self._reject(503, "busy", 1)
+        self._in_flight += 1
+        releases = request.scope.get(RELEASES_SCOPE_KEY)
+        if releases is not None:
+            # Held until the response body has been sent (see AdmissionMiddleware)
+            releases.append(self._release)
+            yield
+            return
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+
+    def stats(self) -> dict:
+        return {"clients": len(self._buckets), "in_flight": self._in_flight, "max_concurrent": self.max_concurrent}
+
+
+class AdmissionMiddleware:
+    """ASGI middleware releasing the admission slots taken by a request once its response has been sent."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        releases = scope[RELEASES_SCOPE_KEY] = []
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            for release in releases:
+                release()
+
+
+# Global instances
+# /test/* endpoints: rarely needed, so strict limits
+diagnostics_admission = Admission(
+    "diagnostics", settings.diagnostics_rate_per_minute, settings.diagnostics_burst,
+    settings.diagnostics_max_concurrent, settings.admission_max_clients
+)
+# Bulk data endpoints (history exports, multi-day batches)
+costly_admission = Admission(
+    "costly", settings.costly_rate_per_minute, settings.costly_burst,
+    settings.costly_max_concurrent, settings.admission_max_clients
+)
+
+registry.gauge(
+    "admission_in_flight", "Requests in progress by admission-controlled route class", ("route_class",),
+    callback=lambda: {
+        (admission.route_class,): admission.stats()["in_flight"]
+        for admission in (diagnostics_admission, costly_admission)
+    }
+)
@@ -0,0 +1,462 @@
+"""
+Columnar (Parquet) copy of the training dataset, training_dataset/daily.parquet.
+
+The demand history only needs the Date, Hour and Ontario Demand columns, so loading it from the
+Parquet copy downloads just those column chunks with Range requests, and a single-day lookup also
+skips every row group whose Date statistics don't cover the day. Values are decoded by Arrow
+into typed arrays instead of parsing CSV text row by row.
+
+daily.csv stays the source of truth: the Parquet copy is only used when it was written from the
+current version of daily.csv (its "source_etag" metadata), or, if it has no such metadata, when it
+is at least as new. Otherwise, or if anything fails, the CSV is read as before. The metadata also
+records the size, header line and tail of that daily.csv version, so a series loaded from the
+Parquet copy can later be extended with only the rows appended to daily.csv (a delta refresh).
+
+Needs pyarrow (optional dependency) and COLUMNAR_DATASET_ENABLED=true. Write the Parquet copy
+from the current daily.csv with:
+    python -m services.columnar_dataset
+"""
+import argparse
+import base64
+import contextvars
+import io
+import json
+import logging
+import math
+import sys
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+from config import settings
+from services.demand_store import (
+    DEMAND_DATASET_KEY, HOURS_PER_DAY, DemandSeries, RangeLookupFailed, csv_source_position, parse_date,
+    resolve_columns
+)
+from services.profiling import phase
+from services.s3_service import s3_service
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # Optional dependency, only the CSV is read without it
+    pa = pc = pa_csv = pq = None
+
+logger = logging.getLogger(__name__)
+
+COLUMNAR_DATASET_KEY = "training_dataset/daily.parquet"
+PARQUET_CONTENT_TYPE = "application/vnd.apache.parquet"
+# Parquet key-value metadata holding the ETag of the daily.csv version the file was written from
+SOURCE_ETAG_KEY = b"source_etag"
+# ...and how much of it was ingested (see csv_source_position; header and tail are base64-encoded)
+SOURCE_SIZE_KEY = b"source_size"
+SOURCE_HEADER_KEY = b"source_header"
+SOURCE_TAIL_KEY = b"source_tail"
+
+# Rows per row group written by the converter: about a year, so a one-day lookup reads one small group
+ROW_GROUP_ROWS = HOURS_PER_DAY * 366
+# Bytes at the end of the object fetched by the first read; normally covers the whole footer
+FOOTER_PREFETCH_BYTES = 64 * 1024
+# Column chunks closer together than this are fetched with one request (the gap is downloaded too)
+RANGE_COALESCE_GAP_BYTES = 8 * 1024
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+class S3RangeFile(io.RawIOBase):
+    """
+    Read-only, seekable file over one version of an S3 object, read with Range requests pinned to
+    its ETag. The first read also fetches the last FOOTER_PREFETCH_BYTES, so opening a Parquet
+    file costs one request, and prefetch() downloads the byte ranges a read will need in parallel.
+    """
+
+    def __init__(self, key: str, size: int, etag: Optional[str]):
+        super().__init__()
+        self.key = key
+        self.size = size
+        self.etag = etag
+        self.bytes_read = 0
+        self.requests = 0
+        self._position = 0
+        self._blocks: List[Tuple[int, bytes]] = []  # (start offset, data) of prefetched ranges
+
+    def _get(self, start: int, end: int) -> bytes:
+        data = s3_service.get_object_range(self.key, start, end, if_match=self.etag)
+        if data is None:
+            raise RangeLookupFailed(f"Range read of {self.key} bytes {start}-{end} failed")
+        return data
+
+    def _add_block(self, start: int, data: bytes) -> None:
+        self.requests += 1
+        self.bytes_read += len(data)
+        self._blocks.append((start, data))
+
+    def prefetch(self, ranges: List[Tuple[int, int]]) -> None:
+        """
+        Download byte ranges (start, end exclusive) ahead of the reads that need them, with up to
+        settings.s3_fetch_concurrency requests in parallel. Ranges less than
+        RANGE_COALESCE_GAP_BYTES apart are merged into one request.
+        """
+        merged: List[List[int]] = []
+        for start, end in sorted(ranges):
+            if merged and start - merged[-1][1] <= RANGE_COALESCE_GAP_BYTES:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        if not merged:
+            return
+        with ThreadPoolExecutor(max_workers=min(settings.s3_fetch_concurrency, len(merged))) as pool:
+            # Each request runs in a copy of the caller's context, so its S3 time counts towards the caller's profile
+            futures = [
+                (start, pool.submit(contextvars.copy_context().run, self._get, start, end - 1))
+                for start, end in merged
+            ]
+            for start, future in futures:
+                self._add_block(start, future.result())
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError(f"Negative seek position {offset}")
+        self._position = offset
+        return offset
+
+    def read(self, size: int = -1) -> bytes:
+        end = self.size if size is None or size < 0 else min(self._position + size, self.size)
+        start = self._position
+        if start >= end:
+            return b''
+        data = next((block[start - offset:end - offset] for offset, block in self._blocks
+                     if offset <= start and end <= offset + len(block)), None)
+        if data is None:
+            if start >= self.size - FOOTER_PREFETCH_BYTES:
+                # Footer reads: fetch the whole tail once
+                tail_start = max(self.size - FOOTER_PREFETCH_BYTES, 0)
+                self._add_block(tail_start, self._get(tail_start, self.size - 1))
+                data = self._blocks[-1][1][start - tail_start:end - tail_start]
+            else:
+                data = self._get(start, end - 1)
+                self.requests += 1
+                self.bytes_read += len(data)
+        self._position += len(data)
+        return data
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def _as_days(column) -> "pa.ChunkedArray":
+    """Days since 1970-01-01 (int32) of a Date column stored as a date, timestamp or ISO string."""
+    if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+        column = pc.strptime(pc.utf8_trim_whitespace(column), format="%Y-%m-%d", unit="s", error_is_null=True)
+    if pa.types.is_timestamp(column.type):
+        column = pc.cast(column, pa.date32())
+    return pc.cast(column, pa.int32())
+
+
+def _float_values(column) -> array:
+    """Copy a float64 Arrow column without nulls into an array('d')."""
+    chunk = column.combine_chunks() if isinstance(column, pa.ChunkedArray) else column
+    values = array('d')
+    values.frombytes(memoryview(chunk.buffers()[1])[chunk.offset * 8:(chunk.offset + len(chunk)) * 8])
+    return values
+
+
+def series_from_table(table, columns: Tuple[str, str, str], etag: Optional[str],
+                      source: Optional[dict] = None) -> DemandSeries:
+    """
+    Build a series from the Date, Hour and Ontario Demand columns of an Arrow table.
+    Like the CSV parser, rows with a missing/invalid date, hour or demand value are skipped and a
+    later row for the same hour wins.
+
+    Args:
+        source: source_size, source_header and source_tail of the CSV the table was written from
+            (without them the series can't be delta-refreshed)
+    """
+    source = source or {}
+    date_name, hour_name, demand_name = columns
+    days = pc.cast(_as_days(table.column(date_name)), pa.int64())
+    hours = pc.cast(table.column(hour_name), pa.int64())
+    demands = pc.cast(table.column(demand_name), pa.float64())
+
+    valid = pc.and_(
+        pc.and_(pc.is_valid(days), pc.invert(pc.is_nan(demands))),
+        pc.and_(pc.greater_equal(hours, 1), pc.less_equal(hours, HOURS_PER_DAY)),
+    )
+    days, hours, demands = (pc.filter(column, valid) for column in (days, hours, demands))
+    if len(days) == 0:
+        return DemandSeries(date.today(), array('d'), etag=etag, columns=table.column_names,
+                            rows_scanned=table.num_rows, **source)
+
+    first_day = pc.min(days).as_py()
+    count = (pc.max(days).as_py() - first_day + 1) * HOURS_PER_DAY
+    index = pc.add(pc.multiply(pc.subtract(days, first_day), HOURS_PER_DAY), pc.subtract(hours, 1))
+    index = index.combine_chunks()
+
+    # A complete, sorted dataset is already laid out like the series: copy the values in one go
+    contiguous = len(index) == count and index[0].as_py() == 0 and (
+        len(index) == 1 or pc.all(pc.equal(pc.subtract(index[1:], index[:-1]), 1)).as_py()
+    )
+    if contiguous:
+        values = _float_values(demands)
+    else:
+        values = array('d', [math.nan]) * count
+        for position, demand_value in zip(index.to_pylist(), demands.to_pylist()):
+            values[position] = demand_value
+
+    return DemandSeries(date.fromordinal(EPOCH_ORDINAL + first_day), values, etag=etag,
+                        columns=table.column_names, rows_scanned=table.num_rows, **source)
+
+
+def _stat_date(value) -> Optional[date]:
+    """A row group's Date min/max statistic as a date (None if it can't be interpreted)."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, bytes):
+        value = value.decode('utf-8', errors='replace')
+    if isinstance(value, str):
+        return parse_date(value.strip())
+    return None
+
+
+class ColumnarDataset:
+    """Reads the demand history from the Parquet copy of the training dataset."""
+
+    def __init__(self, key: str = COLUMNAR_DATASET_KEY):
+        self.key = key
+        self._warned = False
+
+    @property
+    def available(self) -> bool:
+        """True if the Parquet copy is enabled and pyarrow is installed."""
+        if not settings.columnar_dataset_enabled:
+            return False
+        if pq is None:
+            if not self._warned:
+                logger.warning("COLUMNAR_DATASET_ENABLED is set but pyarrow is not installed, reading the CSV")
+                self._warned = True
+            return False
+        return True
+
+    def _open(self, csv_head: dict) -> Optional[Tuple["pq.ParquetFile", S3RangeFile, Tuple[str, str, str]]]:
+        """
+        Open the Parquet copy if it matches the daily.csv version described by csv_head.
+
+        Returns:
+            Tuple of (Parquet file, underlying range file, (date, hour, demand) column names), or None
+        """
+        head = s3_service.head_object(self.key)
+        if head is None:
+            return None
+
+        source = S3RangeFile(self.key, head['ContentLength'], head['ETag'])
+        parquet = pq.ParquetFile(source)
+        source_etag = (parquet.metadata.metadata or {}).get(SOURCE_ETAG_KEY)
+        if source_etag is not None:
+            current = source_etag.decode('utf-8') == csv_head['ETag']
+        else:
+            current = head['LastModified'] is not None and csv_head['LastModified'] is not None \
+                and head['LastModified'] >= csv_head['LastModified']
+        if not current:
+            logger.info(f"{self.key} is older than {DEMAND_DATASET_KEY}, reading the CSV")
+            return None
+
+        names = parquet.schema_arrow.names
+        date_idx, hour_idx, demand_idx = resolve_columns(names)
+        if date_idx is None or hour_idx is None or demand_idx is None:
+            logger.error(f"{self.key} is missing Date/Hour/Ontario Demand columns. Available columns: {names}")
+            return None
+        return parquet, source, (names[date_idx], names[hour_idx], names[demand_idx])
+
+    @staticmethod
+    def _source_position(parquet: "pq.ParquetFile", csv_head: dict) -> Optional[dict]:
+        """
+        The recorded size, header and tail of daily.csv, if the Parquet copy was written from the
+        version described by csv_head (files written before they were recorded have none).
+        """
+        metadata = parquet.metadata.metadata or {}
+        if metadata.get(SOURCE_ETAG_KEY, b"").decode('utf-8') != csv_head['ETag']:
+            return None
+        try:
+            return {
+                "source_size": int(metadata[SOURCE_SIZE_KEY]),
+                "source_header": base64.b64decode(metadata[SOURCE_HEADER_KEY]),
+                "source_tail": base64.b64decode(metadata[SOURCE_TAIL_KEY]),
+            }
+        except (KeyError, ValueError):
+            return None
+
+    @staticmethod
+    def _prefetch(parquet: "pq.ParquetFile", source: S3RangeFile, columns: Tuple[str, str, str],
+                  row_groups: List[int]) -> None:
+        """Download the chunks of the given columns in the given row groups."""
+        indexes = [parquet.schema_arrow.get_field_index(name) for name in columns]
+        ranges = []
+        for group in row_groups:
+            row_group = parquet.metadata.row_group(group)
+            for index in indexes:
+                chunk = row_group.column(index)
+                start = chunk.data_page_offset
+                if chunk.has_dictionary_page and chunk.dictionary_page_offset is not None:
+                    start = min(start, chunk.dictionary_page_offset)
+                ranges.append((start, start + chunk.total_compressed_size))
+        source.prefetch(ranges)
+
+    def load_series(self, csv_head: dict) -> Optional[DemandSeries]:
+        """
+        Load the full demand history, reading only the three needed columns.
+
+        Args:
+            csv_head: HEAD response of daily.csv; the series gets its ETag
+
+        Returns:
+            The series, or None if the Parquet copy is unavailable, stale or unreadable
+        """
+        if not self.available:
+            return None
+        try:
+            opened = self._open(csv_head)
+            if opened is None:
+                return None
+            parquet, source, columns = opened
+            self._prefetch(parquet, source, columns, list(range(parquet.metadata.num_row_groups)))
+            table = parquet.read(columns=list(columns))
+            with phase("parse"):
+                series = series_from_table(
+                    table, columns, csv_head['ETag'], self._source_position(parquet, csv_head)
+                )
+        except (RangeLookupFailed, pa.ArrowException, OSError, ValueError) as e:
+            logger.warning(f"Could not read {self.key}, reading the CSV: {e}")
+            return None
+
+        logger.info(f"Loaded {len(series.values)} hourly demand values from {self.key} "
+                    f"({series.start_date} to {series.end_date}) with {source.bytes_read} of "
+                    f"{source.size} bytes in {source.requests} requests")
+        return series
+
+    def get_day(self, target_date: date, csv_head: dict) -> Optional[Dict[str, Optional[float]]]:
+        """
+        Look up one day, reading only the row groups whose Date statistics cover it.
+
+        Returns:
+            Dictionary keyed by HH:MM, or None if the caller should fall back to the CSV
+        """
+        if not self.available:
+            return None
+        try:
+            opened = self._open(csv_head)
+            if opened is None:
+                return None
+            parquet, source, columns = opened
+            date_column = parquet.schema_arrow.get_field_index(columns[0])
+            metadata = parquet.metadata
+            row_groups = []
+            for group in range(metadata.num_row_groups):
+                statistics = metadata.row_group(group).column(date_column).statistics
+                if statistics is not None and statistics.has_min_max:
+                    low, high = _stat_date(statistics.min), _stat_date(statistics.max)
+                    if low is not None and high is not None and not low <= target_date <= high:
+                        continue
+                row_groups.append(group)
+
+            if not row_groups:
+                actual_demand_map = {}
+            else:
+                self._prefetch(parquet, source, columns, row_groups)
+                table = parquet.read_row_groups(row_groups, columns=list(columns))
+                with phase("parse"):
+                    actual_demand_map = series_from_table(table, columns, csv_head['ETag']).get_day(target_date)
+        except (RangeLookupFailed, pa.ArrowException, OSError, ValueError) as e:
+            logger.warning(f"Columnar lookup in {self.key} failed: {e}")
+            return None
+
+        logger.info(f"Columnar lookup for {target_date} read {len(row_groups)} of {metadata.num_row_groups} "
+                    f"row groups, {source.bytes_read} of {source.size} bytes in {source.requests} requests")
+        return actual_demand_map
+
+    def write_from_csv(self) -> Optional[dict]:
+        """
+        Write the Parquet copy from the current daily.csv: all columns, sorted by date and hour,
+        zstd-compressed, in row groups of ROW_GROUP_ROWS with min/max statistics. Date, Hour and
+        Ontario Demand come first, so their chunks are adjacent and read with one request per row group.
+
+        Returns:
+            Summary of what was written, or None if daily.csv could not be read or the upload failed
+        """
+        cached = s3_service.get_object_versioned(DEMAND_DATASET_KEY, use_cache=False)
+        if cached is None:
+            return None
+
+        table = pa_csv.read_csv(io.BytesIO(cached.body))
+        names = table.column_names
+        date_idx, hour_idx, demand_idx = resolve_columns(names)
+        if date_idx is not None and hour_idx is not None and demand_idx is not None:
+            first = [names[date_idx], names[hour_idx], names[demand_idx]]
+            table = table.select(first + [name for name in names if name not in first])
+            table = table.sort_by([(first[0], "ascending"), (first[1], "ascending")])
+        source = csv_source_position(cached.body)
+        metadata = dict(table.schema.metadata or {})
+        metadata[SOURCE_ETAG_KEY] = (cached.etag or "").encode('utf-8')
+        metadata[SOURCE_SIZE_KEY] = str(source["source_size"]).encode('ascii')
+        metadata[SOURCE_HEADER_KEY] = base64.b64encode(source["source_header"])
+        metadata[SOURCE_TAIL_KEY] = base64.b64encode(source["source_tail"])
+        table = table.replace_schema_metadata(metadata)
+
+        buffer = io.BytesIO()
+        pq.write_table(table, buffer, row_group_size=ROW_GROUP_ROWS, compression="zstd")
+        body = buffer.getvalue()
+        etag = s3_service.put_object(self.key, body, content_type=PARQUET_CONTENT_TYPE)
+        if etag is None:
+            return None
+        logger.info(f"Wrote {self.key} ({len(body)} bytes) from {DEMAND_DATASET_KEY} ({len(cached.body)} bytes)")
+        return {
+            "key": self.key,
+            "etag": etag,
+            "source_etag": cached.etag,
+            "rows": table.num_rows,
+            "row_groups": math.ceil(table.num_rows / ROW_GROUP_ROWS),
+            "bytes": len(body),
+            "source_bytes": len(cached.body),
+        }
+
+
+# Global instance
+columnar_dataset = ColumnarDataset()
+
+
+def main_cli(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=f"Write {COLUMNAR_DATASET_KEY} from {DEMAND_DATASET_KEY}")
+    parser.parse_args(argv)
+
+    logging.basicConfig(level=settings.log_level.upper(), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if pq is None:
+        print("pyarrow is not installed", file=sys.stderr)
+        return 1
+    summary = columnar_dataset.write_from_csv()
+    if summary is None:
+        return 1
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
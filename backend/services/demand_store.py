@@ -0,0 +1,774 @@
+"""
+In-memory store for the hourly Ontario Demand history in training_dataset/daily.csv.
+The CSV is parsed once per S3 object version into a compact array indexed by
+hour offset from the first date in the dataset, so looking up a day is O(1).
+The dataset only grows by appended rows, so a new version is normally ingested by
+downloading just the bytes added since the version already loaded. Full loads and cold
+lookups can read a columnar copy instead (see services/columnar_dataset.py).
+"""
+import csv
+import hashlib
+import io
+import logging
+import math
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from pathlib import Path
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import settings
+from services.metrics import csv_parse_duration, csv_rows_scanned, registry
+from services.profiling import phase
+from services.s3_service import s3_service
+from services.single_flight import SingleFlight
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; workers then don't coordinate loads
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEMAND_DATASET_KEY = "training_dataset/daily.csv"
+
+HOURS_PER_DAY = 24
+MISSING_VALUES = {'', 'na', 'n/a', 'null', 'none'}
+
+# Binary snapshot layout: header, ETag bytes, source header row and tail bytes, padding to 8 bytes,
+# then native float64 values
+SNAPSHOT_MAGIC = b"IESODMD2"
+# magic, start date ordinal, value count, ETag length, source size, source header length, source tail length
+SNAPSHOT_HEADER = struct.Struct("<8sqqIqII")
+
+# Bytes at the end of the ingested CSV kept to check that a new version only appended rows
+DELTA_OVERLAP_BYTES = 4096
+
+demand_reloads = registry.counter(
+    "demand_dataset_reloads_total", "New training dataset versions ingested, by method", ("method",)
+)
+
+
+def resolve_columns(fieldnames: List[str]) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+    """
+    Find the Date, Hour and Ontario Demand columns (case-insensitive).
+
+    Returns:
+        Tuple of column indexes (date, hour, demand); an entry is None if the column is missing
+    """
+    date_idx = hour_idx = demand_idx = None
+    for idx, col in enumerate(fieldnames):
+        col_lower = col.lower().strip()
+        if date_idx is None and col_lower == 'date':
+            date_idx = idx
+        elif hour_idx is None and col_lower == 'hour':
+            hour_idx = idx
+        elif demand_idx is None and 'ontario' in col_lower and 'demand' in col_lower:
+            demand_idx = idx
+    return date_idx, hour_idx, demand_idx
+
+
+def parse_date(date_str: str) -> Optional[date]:
+    """Parse a dataset date (format: "2002-05-01", or "2002/05/01")."""
+    for fmt in ("%Y-%m-%d", "%Y/%m/%d"):
+        try:
+            return datetime.strptime(date_str, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_hour(hour_str: str) -> Optional[int]:
+    """Parse a dataset hour (1-24), returning None if it is invalid."""
+    try:
+        hour_num = int(hour_str)
+    except (ValueError, TypeError):
+        return None
+    if hour_num < 1 or hour_num > HOURS_PER_DAY:
+        return None
+    return hour_num
+
+
+def parse_demand(demand_str: str) -> Optional[float]:
+    """Parse an Ontario Demand value, returning None for empty or invalid values."""
+    if demand_str.lower() in MISSING_VALUES:
+        return None
+    try:
+        return float(demand_str)
+    except (ValueError, TypeError):
+        return None
+
+
+def format_hour(hour_num: int) -> str:
+    """
+    Convert a dataset hour to HH:MM format.
+    Hour 1 in dataset = 00:00-01:00, so maps to "00:00"; hour N maps to (N-1):00.
+    """
+    return f"{(hour_num - 1):02d}:00"
+
+
+def csv_source_position(csv_data: bytes) -> Dict[str, object]:
+    """
+    Describe how much of a CSV object a series parsed from it has ingested, for delta refreshes.
+    A trailing line without a newline may still be being written, so it is not counted as
+    ingested; it is parsed again as part of the next appended range.
+
+    Returns:
+        Dict with 'source_size' (length up to the last complete line), 'source_header' (the
+        header line) and 'source_tail' (the last DELTA_OVERLAP_BYTES ingested) keys
+    """
+    source_size = csv_data.rfind(b'\n') + 1
+    return {
+        "source_size": source_size,
+        "source_header": csv_data[:csv_data.find(b'\n') + 1],
+        "source_tail": csv_data[max(source_size - DELTA_OVERLAP_BYTES, 0):source_size],
+    }
+
+
+class DemandSeries:
+    """
+    Hourly Ontario Demand values indexed by hour offset from start_date (NaN when missing).
+    source_size, source_header and source_tail describe the CSV bytes the series was parsed from
+    (up to the last complete line): its length, header row and last DELTA_OVERLAP_BYTES bytes.
+    """
+
+    def __init__(self, start_date: date, values: array, etag: Optional[str] = None,
+                 columns: Optional[List[str]] = None, rows_scanned: int = 0,
+                 source_size: int = 0, source_header: bytes = b"", source_tail: bytes = b""):
+        self.start_date = start_date
+        self.values = values
+        self.etag = etag
+        self.columns = columns or []
+        self.rows_scanned = rows_scanned
+        self.source_size = source_size
+        self.source_header = source_header
+        self.source_tail = source_tail
+
+    @property
+    def end_date(self) -> date:
+        """Last date covered by the series (inclusive)."""
+        return self.start_date + timedelta(days=max(len(self.values) // HOURS_PER_DAY - 1, 0))
+
+    def get_day(self, target_date: date) -> Dict[str, Optional[float]]:
+        """
+        Return the actual demand for one day.
+
+        Returns:
+            Dictionary mapping hour strings (HH:MM) to rounded demand; hours without data are omitted
+        """
+        day_offset = (target_date - self.start_date).days
+        if day_offset < 0 or (day_offset + 1) * HOURS_PER_DAY > len(self.values):
+            return {}
+
+        base = day_offset * HOURS_PER_DAY
+        actual_demand_map = {}
+        for hour_idx in range(HOURS_PER_DAY):
+            value = self.values[base + hour_idx]
+            if not math.isnan(value):
+                actual_demand_map[format_hour(hour_idx + 1)] = round(value)
+        return actual_demand_map
+
+    def iter_range(self, start_date: date, end_date: date) -> Iterator[Tuple[date, int, float]]:
+        """
+        Yield (date, dataset hour 1-24, demand) for every hour with data between start_date and
+        end_date (inclusive), without materializing the range.
+        """
+        first_day = max((start_date - self.start_date).days, 0)
+        last_day = min((end_date - self.start_date).days, len(self.values) // HOURS_PER_DAY - 1)
+        values = self.values
+        for day_offset in range(first_day, last_day + 1):
+            day = self.start_date + timedelta(days=day_offset)
+            base = day_offset * HOURS_PER_DAY
+            for hour_idx in range(HOURS_PER_DAY):
+                value = values[base + hour_idx]
+                if not math.isnan(value):
+                    yield day, hour_idx + 1, value
+
+    def save_snapshot(self, path: Path) -> None:
+        """Write the series to a binary snapshot file (atomically, so concurrent readers never see a partial file)."""
+        etag_bytes = (self.etag or "").encode('utf-8')
+        header = SNAPSHOT_HEADER.pack(
+            SNAPSHOT_MAGIC, self.start_date.toordinal(), len(self.values), len(etag_bytes),
+            self.source_size, len(self.source_header), len(self.source_tail)
+        )
+        metadata = etag_bytes + self.source_header + self.source_tail
+        padding = b"\0" * (-(len(header) + len(metadata)) % 8)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(header + metadata + padding)
+                f.write(memoryview(self.values).cast('B'))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load_snapshot(cls, path: Path) -> Optional["DemandSeries"]:
+        """
+        Memory-map a binary snapshot. The values stay in the page cache and are shared by
+        every worker process that maps the same file.
+
+        Returns:
+            The series, or None if the file is missing or not a valid snapshot
+        """
+        try:
+            with open(path, 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        if len(mapped) < SNAPSHOT_HEADER.size:
+            return None
+        magic, start_ordinal, count, etag_length, source_size, header_length, tail_length = \
+            SNAPSHOT_HEADER.unpack_from(mapped, 0)
+        metadata_end = SNAPSHOT_HEADER.size + etag_length + header_length + tail_length
+        data_offset = metadata_end + -metadata_end % 8
+        if magic != SNAPSHOT_MAGIC or len(mapped) != data_offset + count * 8:
+            logger.warning(f"Ignoring invalid demand snapshot {path}")
+            return None
+
+        offset = SNAPSHOT_HEADER.size
+        etag = mapped[offset:offset + etag_length].decode('utf-8') or None
+        offset += etag_length
+        source_header = mapped[offset:offset + header_length]
+        source_tail = mapped[offset + header_length:metadata_end]
+        values = memoryview(mapped)[data_offset:].cast('d')
+        return cls(date.fromordinal(start_ordinal), values, etag=etag, source_size=source_size,
+                   source_header=source_header, source_tail=source_tail)
+
+    @classmethod
+    def from_csv(cls, csv_data: bytes, etag: Optional[str] = None) -> Optional["DemandSeries"]:
+        """
+        Parse the training dataset CSV into a series.
+        Rows with a missing/invalid date, hour or demand value are skipped.
+
+        Returns:
+            The parsed series, or None if the required columns are missing
+        """
+        reader = csv.reader(io.StringIO(csv_data.decode('utf-8')))
+        fieldnames = next(reader, None)
+        if not fieldnames:
+            logger.error("Training dataset CSV has no column headers")
+            return None
+
+        date_idx, hour_idx, demand_idx = resolve_columns(fieldnames)
+        if date_idx is None or hour_idx is None or demand_idx is None:
+            logger.error(f"Training dataset is missing Date/Hour/Ontario Demand columns. Available columns: {fieldnames}")
+            return None
+
+        ordinals, hours, demands, rows_scanned = _parse_rows(reader, date_idx, hour_idx, demand_idx)
+
+        source = csv_source_position(csv_data)
+
+        if not ordinals:
+            return cls(date.today(), array('d'), etag=etag, columns=fieldnames, rows_scanned=rows_scanned, **source)
+
+        first_ordinal = min(ordinals)
+        day_count = max(ordinals) - first_ordinal + 1
+        values = array('d', [math.nan]) * (day_count * HOURS_PER_DAY)
+        for ordinal, hour_num, demand_value in zip(ordinals, hours, demands):
+            values[(ordinal - first_ordinal) * HOURS_PER_DAY + hour_num - 1] = demand_value
+
+        return cls(date.fromordinal(first_ordinal), values, etag=etag, columns=fieldnames,
+                   rows_scanned=rows_scanned, **source)
+
+    def with_appended(self, appended: bytes, etag: Optional[str], source_size: int) -> Optional["DemandSeries"]:
+        """
+        Return a new series with rows appended to the CSV this series was parsed from.
+        The values are copied, so readers of this series are unaffected.
+
+        Args:
+            appended: The CSV bytes after source_size (same columns as source_header); like
+                from_csv, a last line without a newline is parsed but not counted as ingested
+            etag: ETag of the new version
+            source_size: Length of the new version up to its last complete line
+
+        Returns:
+            The extended series, or None if an appended row predates the series (history was
+            rewritten) and the dataset has to be parsed in full
+        """
+        header = next(csv.reader([self.source_header.decode('utf-8').rstrip('\r\n')]), [])
+        date_idx, hour_idx, demand_idx = resolve_columns(header)
+        if date_idx is None or hour_idx is None or demand_idx is None:
+            return None
+
+        reader = csv.reader(io.StringIO(appended.decode('utf-8')))
+        ordinals, hours, demands, rows_scanned = _parse_rows(reader, date_idx, hour_idx, demand_idx)
+
+        # Copy the values (they may be a read-only memory-mapped snapshot) and grow them to the new last day
+        values = array('d')
+        values.frombytes(memoryview(self.values).cast('B'))
+        if not values and ordinals:
+            start_ordinal = min(ordinals)
+        else:
+            start_ordinal = self.start_date.toordinal()
+        if ordinals:
+            if min(ordinals) < start_ordinal:
+                return None
+            day_count = max(ordinals) - start_ordinal + 1
+            if day_count * HOURS_PER_DAY > len(values):
+                values.extend(array('d', [math.nan]) * (day_count * HOURS_PER_DAY - len(values)))
+        for ordinal, hour_num, demand_value in zip(ordinals, hours, demands):
+            values[(ordinal - start_ordinal) * HOURS_PER_DAY + hour_num - 1] = demand_value
+
+        ingested = appended[:source_size - self.source_size]
+        source_tail = (self.source_tail + ingested)[-DELTA_OVERLAP_BYTES:]
+        series = DemandSeries(
+            date.fromordinal(start_ordinal), values, etag=etag, columns=header,
+            rows_scanned=self.rows_scanned + rows_scanned, source_size=source_size,
+            source_header=self.source_header, source_tail=source_tail
+        )
+        return series
+
+
+def _parse_rows(reader: Iterator[List[str]], date_idx: int, hour_idx: int,
+                demand_idx: int) -> Tuple[array, array, array, int]:
+    """
+    Parse dataset rows, skipping rows with a missing/invalid date, hour or demand value.
+
+    Returns:
+        Tuple of (date ordinals, hours 1-24, demand values, rows scanned)
+    """
+    min_width = max(date_idx, hour_idx, demand_idx) + 1
+    ordinals = array('l')
+    hours = array('b')
+    demands = array('d')
+    # Every date appears 24 times, so only parse each distinct date string once
+    date_cache: Dict[str, Optional[int]] = {}
+    rows_scanned = 0
+
+    for row in reader:
+        rows_scanned += 1
+        if len(row) < min_width:
+            continue
+
+        date_str = row[date_idx].strip()
+        ordinal = date_cache.get(date_str, -1)
+        if ordinal == -1:
+            parsed = parse_date(date_str) if date_str else None
+            ordinal = parsed.toordinal() if parsed else None
+            date_cache[date_str] = ordinal
+        if ordinal is None:
+            continue
+
+        hour_num = parse_hour(row[hour_idx].strip())
+        if hour_num is None:
+            continue
+
+        demand_value = parse_demand(row[demand_idx].strip())
+        if demand_value is None:
+            continue
+
+        ordinals.append(ordinal)
+        hours.append(hour_num)
+        demands.append(demand_value)
+
+    return ordinals, hours, demands, rows_scanned
+
+
+class RangeLookupFailed(Exception):
+    """Raised when a range read fails or the object changed during a range lookup."""
+
+
+class _RangeReader:
+    """Reads lines from an S3 object with Range requests, pinned to a single object version."""
+
+    def __init__(self, key: str, size: int, etag: Optional[str], block_bytes: int):
+        self.key = key
+        self.size = size
+        self.etag = etag
+        self.block_bytes = block_bytes
+        self.bytes_read = 0
+        self.requests = 0
+
+    def fetch(self, start: int, length: int) -> bytes:
+        end = min(start + length, self.size) - 1
+        if start > end:
+            return b''
+        data = s3_service.get_object_range(self.key, start, end, if_match=self.etag)
+        if data is None:
+            raise RangeLookupFailed(f"Range read of {self.key} bytes {start}-{end} failed")
+        self.requests += 1
+        self.bytes_read += len(data)
+        return data
+
+    def line_at(self, start: int) -> Tuple[bytes, int]:
+        """Read the complete line starting at byte offset start. Returns (line, offset of next line)."""
+        length = min(4096, self.block_bytes)
+        while True:
+            chunk = self.fetch(start, length)
+            newline = chunk.find(b'\n')
+            if newline != -1:
+                return chunk[:newline], start + newline + 1
+            if start + len(chunk) >= self.size:
+                return chunk, self.size
+            length *= 2
+
+    def line_after(self, offset: int) -> Optional[Tuple[int, bytes, int]]:
+        """
+        Read the first complete line beginning at or after byte offset, usually with a single request.
+
+        Returns:
+            Tuple of (line start, line, offset of next line), or None if no line starts there
+        """
+        position = offset - 1
+        length = min(4096, self.block_bytes)
+        buffer = b''
+        while position + len(buffer) < self.size:
+            buffer += self.fetch(position + len(buffer), length)
+            first_newline = buffer.find(b'\n')
+            if first_newline == -1:
+                continue
+            line_start = position + first_newline + 1
+            if line_start >= self.size:
+                return None
+            second_newline = buffer.find(b'\n', first_newline + 1)
+            if second_newline != -1:
+                return line_start, buffer[first_newline + 1:second_newline], position + second_newline + 1
+            if position + len(buffer) >= self.size:
+                return line_start, buffer[first_newline + 1:], self.size
+        return None
+
+
+def _parse_line(line: bytes) -> List[str]:
+    return next(csv.reader([line.decode('utf-8').rstrip('\r')]), [])
+
+
+class DemandStore:
+    """Keeps the parsed training dataset in memory and reloads it only when the S3 object changes."""
+
+    def __init__(self, key: str = DEMAND_DATASET_KEY):
+        self.key = key
+        self.series: Optional[DemandSeries] = None
+        self._validated_at: Optional[float] = None
+        self._flights = SingleFlight("demand_store")
+        self._loader: Optional[threading.Thread] = None
+
+    def _snapshot_path(self, etag: str) -> Optional[Path]:
+        """Location of the local binary snapshot for one version of the dataset."""
+        if not settings.demand_snapshot_enabled:
+            return None
+        directory = Path(settings.demand_snapshot_dir or os.path.join(tempfile.gettempdir(), "ieso-demand"))
+        key_hash = hashlib.sha1(self.key.encode('utf-8')).hexdigest()[:12]
+        etag_hash = hashlib.sha1(etag.encode('utf-8')).hexdigest()[:16]
+        return directory / f"demand-{key_hash}-{etag_hash}.bin"
+
+    @contextmanager
+    def _snapshot_lock(self, path: Optional[Path]):
+        """
+        Hold an exclusive lock on the dataset across worker processes while loading a version, so
+        only one of them downloads and parses it while the others wait and then map its snapshot.
+        The lock file is shared by all versions and never removed: deleting it while another
+        worker holds or is about to take the lock would let two workers lock different files.
+        """
+        if path is None or fcntl is None:
+            yield
+            return
+        lock_path = path.parent / (path.name.rsplit('-', 1)[0] + ".lock")
+        try:
+            lock_path.parent.mkdir(parents=True, exist_ok=True)
+            lock_file = open(lock_path, 'a')
+        except OSError as e:
+            logger.warning(f"Could not open demand snapshot lock {lock_path}: {e}")
+            yield
+            return
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+        finally:
+            lock_file.close()  # Releases the lock
+
+    def _write_snapshot(self, series: DemandSeries) -> DemandSeries:
+        """
+        Persist a freshly parsed series and remove snapshots of older versions.
+
+        Returns:
+            The series memory-mapped from the written snapshot, so this worker shares the one
+            physical copy with the others (the series itself if the snapshot couldn't be written)
+        """
+        path = self._snapshot_path(series.etag) if series.etag else None
+        if path is None:
+            return series
+        try:
+            series.save_snapshot(path)
+            prefix = path.name.rsplit('-', 1)[0]
+            for old in path.parent.glob(prefix + "-*.bin"):
+                if old != path:
+                    old.unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"Could not write demand snapshot {path}: {e}")
+            return series
+        mapped = DemandSeries.load_snapshot(path)
+        if mapped is None:
+            return series
+        mapped.columns = series.columns
+        mapped.rows_scanned = series.rows_scanned
+        return mapped
+
+    def _load_from_s3(self) -> Optional[DemandSeries]:
+        """Download and parse the full training dataset."""
+        # The parsed series replaces the raw CSV, so don't keep a second copy in the object cache
+        cached = s3_service.get_object_versioned(self.key, use_cache=False)
+        if cached is None:
+            return None
+
+        with csv_parse_duration.time(dataset="training_dataset"), phase("parse"):
+            series = DemandSeries.from_csv(cached.body, etag=cached.etag)
+        if series is not None:
+            csv_rows_scanned.inc(series.rows_scanned, dataset="training_dataset")
+            demand_reloads.inc(method="full")
+            logger.info(f"Loaded {len(series.values)} hourly demand values from {self.key} "
+                        f"({series.start_date} to {series.end_date}, {series.rows_scanned} rows)")
+        return series
+
+    def _load_delta(self, head: dict) -> Optional[DemandSeries]:
+        """
+        Ingest a new version of the dataset by downloading only the bytes appended since the
+        loaded version. The header row and the last DELTA_OVERLAP_BYTES already ingested are
+        read again and must be unchanged; all reads are pinned to the new version's ETag.
+
+        Returns:
+            The extended series, or None if the new version is not an append (or a read failed)
+            and the dataset has to be downloaded in full
+        """
+        current = self.series
+        size = head['ContentLength']
+        if current is None or not current.source_size or size <= current.source_size:
+            return None
+
+        reader = _RangeReader(self.key, size, head['ETag'], settings.range_lookup_block_bytes)
+        overlap_start = current.source_size - len(current.source_tail)
+        try:
+            if reader.fetch(0, len(current.source_header)) != current.source_header:
+                logger.info(f"{self.key} header changed, reloading it in full")
+                return None
+            data = reader.fetch(overlap_start, size - overlap_start)
+        except RangeLookupFailed as e:
+            logger.warning(f"Delta refresh of {self.key} failed: {e}")
+            return None
+        if data[:len(current.source_tail)] != current.source_tail:
+            logger.info(f"{self.key} was rewritten, not appended to, reloading it in full")
+            return None
+
+        # As in a full parse, a last line without a newline is parsed but not counted as
+        # ingested, so it is read again (and overwritten if it grew) with the next append
+        appended = data[len(current.source_tail):]
+        complete = appended.rfind(b'\n') + 1
+        with csv_parse_duration.time(dataset="training_dataset_delta"), phase("parse"):
+            series = current.with_appended(appended, head['ETag'], current.source_size + complete)
+        if series is None:
+            logger.info(f"Rows appended to {self.key} predate the loaded data, reloading it in full")
+            return None
+
+        rows_appended = series.rows_scanned - current.rows_scanned
+        csv_rows_scanned.inc(rows_appended, dataset="training_dataset")
+        demand_reloads.inc(method="delta")
+        logger.info(f"Appended {rows_appended} rows to the demand series from {reader.bytes_read} bytes of {self.key} "
+                    f"(now {series.start_date} to {series.end_date})")
+        return series
+
+    def _load_columnar(self, head: dict) -> Optional[DemandSeries]:
+        """Load the series from the Parquet copy of the dataset, if it is enabled and current."""
+        if not settings.columnar_dataset_enabled:
+            return None
+        # Imported here so pyarrow is only loaded when the columnar copy is used
+        from services.columnar_dataset import columnar_dataset
+
+        series = columnar_dataset.load_series(head)
+        if series is not None:
+            demand_reloads.inc(method="columnar")
+        return series
+
+    def get_series(self, max_age: Optional[float] = None) -> Optional[DemandSeries]:
+        """
+        Return the parsed series for the current version of the dataset.
+        The version is checked with a HEAD request at most once per TTL. A new version is
+        memory-mapped from a local snapshot if another worker already parsed it. Otherwise one
+        worker at a time (under a file lock) loads it: only the rows appended since the loaded
+        version are downloaded and parsed, and the full dataset (from the columnar copy if
+        enabled and current) only if it was rewritten. It then writes the snapshot and
+        maps it too, and workers that waited for the lock map that snapshot instead of loading.
+        If S3 cannot be reached, the previously loaded series (if any) is returned.
+
+        Args:
+            max_age: Revalidate the dataset version if it was checked longer ago than this many seconds
+        """
+        ttl = settings.s3_cache_ttl_seconds if max_age is None else min(max_age, settings.s3_cache_ttl_seconds)
+        if self.series is not None and self._validated_at is not None \
+                and time.monotonic() - self._validated_at < ttl:
+            return self.series
+
+        # Concurrent callers share one version check (and download + parse, if it changed)
+        return self._flights.do("series", self._revalidate)
+
+    @staticmethod
+    def _map_snapshot(path: Optional[Path]) -> Optional[DemandSeries]:
+        series = DemandSeries.load_snapshot(path) if path else None
+        if series is not None:
+            demand_reloads.inc(method="snapshot")
+            logger.info(f"Memory-mapped demand snapshot {path}")
+        return series
+
+    def _revalidate(self) -> Optional[DemandSeries]:
+        """Check the dataset version in S3 and load the series if it changed."""
+        head = s3_service.head_object(self.key)
+        if head is None:
+            if self.series is not None:
+                logger.warning(f"Could not check {self.key} in S3, serving previously loaded data")
+            return self.series
+
+        etag = head['ETag']
+        if self.series is None or not etag or self.series.etag != etag:
+            snapshot_path = self._snapshot_path(etag) if etag else None
+            series = self._map_snapshot(snapshot_path)
+            if series is None:
+                with self._snapshot_lock(snapshot_path):
+                    # Another worker may have written the snapshot while this one waited for the lock
+                    series = self._map_snapshot(snapshot_path)
+                    if series is None:
+                        series = self._load_delta(head) or self._load_columnar(head) or self._load_from_s3()
+                        if series is not None:
+                            series = self._write_snapshot(series)
+            if series is None:
+                return self.series
+            self.series = series
+
+        self._validated_at = time.monotonic()
+        return self.series
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.series is not None
+
+    def get_day(self, target_date: date) -> Dict[str, Optional[float]]:
+        """Return the actual demand for target_date as a dictionary keyed by HH:MM."""
+        series = self.get_series()
+        if series is None:
+            return {}
+        return series.get_day(target_date)
+
+    def lookup_day(self, target_date: date) -> Dict[str, Optional[float]]:
+        """
+        Return the actual demand for target_date using the configured lookup mode.
+        In "auto" mode a cold store answers with a range lookup and loads the full
+        dataset in the background, so later requests are served from memory.
+        """
+        mode = settings.actual_demand_lookup_mode
+        if mode == "range" or (mode == "auto" and not self.is_loaded):
+            if mode == "auto":
+                self.load_in_background()
+            # Concurrent cold requests for the same day share one set of range reads
+            actual_demand_map = self._flights.do(("range", target_date), lambda: self.get_day_by_range(target_date))
+            if actual_demand_map is not None:
+                return actual_demand_map
+            logger.warning("Range lookup failed, falling back to loading the full training dataset")
+        return self.get_day(target_date)
+
+    def load_in_background(self) -> None:
+        """Start loading the full dataset in a daemon thread (no-op if a load is already running)."""
+        if self._loader is not None and self._loader.is_alive():
+            return
+        self._loader = threading.Thread(target=self.get_series, name="demand-store-loader", daemon=True)
+        self._loader.start()
+
+    def get_day_by_range(self, target_date: date) -> Optional[Dict[str, Optional[float]]]:
+        """
+        Look up one day by binary-searching the date-sorted CSV by byte offset with S3 Range requests.
+        Only the header, a few small probes and the block holding the target date are downloaded,
+        so the cost stays flat as the dataset grows. If the columnar copy is enabled and current,
+        the row group holding the target date is read from it instead.
+
+        Returns:
+            Dictionary keyed by HH:MM, or None if the lookup failed and the caller should fall back
+        """
+        head = s3_service.head_object(self.key)
+        if head is None:
+            return None
+
+        if settings.columnar_dataset_enabled:
+            from services.columnar_dataset import columnar_dataset
+
+            actual_demand_map = columnar_dataset.get_day(target_date, head)
+            if actual_demand_map is not None:
+                return actual_demand_map
+
+        reader = _RangeReader(self.key, head['ContentLength'], head['ETag'], settings.range_lookup_block_bytes)
+        try:
+            header_line, data_start = reader.line_at(0)
+            date_idx, hour_idx, demand_idx = resolve_columns(_parse_line(header_line))
+            if date_idx is None or hour_idx is None or demand_idx is None:
+                logger.error(f"Training dataset is missing Date/Hour/Ontario Demand columns: {header_line!r}")
+                return None
+
+            def row_date_at(offset: int) -> Tuple[Optional[int], Optional[date]]:
+                """Return (start, date) of the first parseable row beginning at or after offset."""
+                position = offset
+                while position < reader.size:
+                    found = reader.line_after(position)
+                    if found is None:
+                        break
+                    row_start, line, position = found
+                    fields = _parse_line(line)
+                    row_date = parse_date(fields[date_idx].strip()) if len(fields) > date_idx else None
+                    if row_date is not None:
+                        return row_start, row_date
+                return None, None
+
+            # Invariant: no row for target_date starts before lo
+            lo, hi = data_start, reader.size
+            while hi - lo > reader.block_bytes:
+                mid = (lo + hi) // 2
+                row_start, row_date = row_date_at(mid)
+                if row_start is not None and row_date < target_date:
+                    lo = row_start
+                elif row_start is not None and row_start < hi:
+                    hi = row_start
+                else:
+                    hi = mid
+
+            # Scan forward from lo until we are past the target date
+            actual_demand_map = {}
+            position = lo
+            remainder = b''
+            while position < reader.size:
+                chunk = reader.fetch(position, reader.block_bytes)
+                position += len(chunk)
+                lines = (remainder + chunk).split(b'\n')
+                remainder = lines.pop() if position < reader.size else b''
+                past_target = False
+                for line in lines:
+                    fields = _parse_line(line)
+                    if len(fields) <= max(date_idx, hour_idx, demand_idx):
+                        continue
+                    row_date = parse_date(fields[date_idx].strip())
+                    if row_date is None or row_date < target_date:
+                        continue
+                    if row_date > target_date:
+                        past_target = True
+                        break
+                    hour_num = parse_hour(fields[hour_idx].strip())
+                    demand_value = parse_demand(fields[demand_idx].strip())
+                    if hour_num is not None and demand_value is not None:
+                        actual_demand_map[format_hour(hour_num)] = round(demand_value)
+                if past_target:
+                    break
+        except RangeLookupFailed as e:
+            logger.warning(str(e))
+            return None
+
+        logger.info(f"Range lookup for {target_date} read {reader.bytes_read} of {reader.size} bytes "
+                    f"in {reader.requests} requests")
+        return actual_demand_map
+
+
+# Global instance
+demand_store = DemandStore()
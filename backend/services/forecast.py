@@ -0,0 +1,104 @@
+"""
+Parsing and merging helpers for the daily forecast CSVs in daily_prediction/.
+"""
+import csv
+import io
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from services.metrics import csv_parse_duration, csv_rows_scanned
+from services.profiling import phase
+
+FORECAST_KEY = "daily_prediction/latest_forecast.csv"
+FORECAST_PREFIX = "daily_prediction/"
+FORECAST_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def parse_forecast_csv(csv_data: bytes) -> List[dict]:
+    """
+    Parse a forecast CSV with "time" and "predicted_ontario_demand" columns.
+
+    Returns:
+        List of dicts with 'time' (raw string), 'datetime' (or None if unparseable),
+        'hour' (HH:MM) and 'predicted' (rounded to an integer) keys, in file order
+    """
+    rows = []
+    with csv_parse_duration.time(dataset="forecast"):
+        with phase("decode"):
+            text = csv_data.decode('utf-8')
+        with phase("parse"):
+            csv_reader = csv.DictReader(io.StringIO(text))
+            for row in csv_reader:
+                time_str = row['time'].strip()
+                try:
+                    # Parse datetime (format: "2025-10-17 01:00:00")
+                    dt = datetime.strptime(time_str, FORECAST_TIME_FORMAT)
+                    hour = dt.strftime("%H:%M")
+                except ValueError:
+                    dt = None
+                    # Fallback: try to extract hour if format is different
+                    hour = time_str.split()[1][:5] if len(time_str.split()) > 1 else "00:00"
+
+                rows.append({
+                    "time": time_str,
+                    "datetime": dt,
+                    "hour": hour,
+                    "predicted": round(float(row['predicted_ontario_demand'].strip()))
+                })
+    csv_rows_scanned.inc(len(rows), dataset="forecast")
+    return rows
+
+
+def merge_actual_demand(forecast_data: List[dict], actual_demand_map: Dict[str, Optional[float]]) -> List[str]:
+    """
+    Fill the 'actual' value of each forecast point from a map of HH:MM -> actual demand.
+    Hours without actual data are set to None (the frontend shows them as N/A).
+
+    Returns:
+        The hours that have no actual demand
+    """
+    missing_hours = []
+    for item in forecast_data:
+        actual = actual_demand_map.get(item['hour'])
+        item['actual'] = actual
+        if actual is None:
+            missing_hours.append(item['hour'])
+    return missing_hours
+
+
+def to_columnar(points: List[dict], start: Optional[str], step_seconds: int = 3600,
+                fields: Tuple[str, ...] = ("predicted", "actual")) -> dict:
+    """
+    Convert consecutive points into parallel arrays, so key names aren't repeated for every point.
+    The time of point i is start + i * step_seconds.
+
+    Returns:
+        Dict with 'start', 'step_seconds' and one list per field
+    """
+    columns = {"start": start, "step_seconds": step_seconds}
+    for name in fields:
+        columns[name] = [point.get(name) for point in points]
+    return columns
+
+
+def columnar_forecast_payload(payload: dict) -> dict:
+    """Return a copy of a forecast payload with forecast_data in the columnar shape."""
+    return {**payload, "forecast_data": to_columnar(payload["forecast_data"], payload.get("start"))}
+
+
+def peak_and_low(forecast_data: List[dict]) -> Tuple[Optional[dict], Optional[dict]]:
+    """
+    Find the peak and low hours by predicted demand (actuals might be incomplete).
+
+    Returns:
+        Tuple of {"hour", "demand"} dicts, or (None, None) if there is no forecast data
+    """
+    points = [item for item in forecast_data if item.get('predicted') is not None]
+    if not points:
+        return None, None
+    peak_data = max(points, key=lambda x: x['predicted'])
+    low_data = min(points, key=lambda x: x['predicted'])
+    return (
+        {"hour": peak_data['hour'], "demand": peak_data['predicted']},
+        {"hour": low_data['hour'], "demand": low_data['predicted']}
+    )
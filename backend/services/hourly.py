@@ -0,0 +1,75 @@
+"""
+Parsing helpers for the hourly supply-mix JSON objects in hourly_data/.
+"""
+import json
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+from services.profiling import phase
+
+HOURLY_PREFIX = "hourly_data/"
+
+# Supply sources shown on the dashboard, with their chart colors
+SUPPLY_SOURCES = (
+    ("Nuclear", "#8B5CF6"),
+    ("Gas", "#EF4444"),
+    ("Wind", "#10B981"),
+    ("Hydro", "#3B82F6"),
+    ("Solar", "#FBBF24"),
+    ("Biofuel", "#84CC16"),
+)
+
+
+def parse_hourly_json(json_data: bytes) -> dict:
+    """
+    Parse one hourly_data JSON object.
+
+    Returns:
+        Dict with 'supply' (source -> MW, 0 if missing), 'imports', 'exports' and 'fetched_at' keys
+    """
+    with phase("parse"):
+        data = json.loads(json_data.decode('utf-8'))
+    supply_data = data.get('data', {})
+    return {
+        "supply": {source: supply_data.get(source, 0) for source, _ in SUPPLY_SOURCES},
+        "imports": supply_data.get('HourlyImports', 0),
+        "exports": supply_data.get('HourlyExports', 0),
+        "fetched_at": data.get('fetched_at_utc', ''),
+    }
+
+
+class ParsedObjectCache:
+    """
+    Thread-safe LRU cache of parsed objects keyed by (key, ETag).
+    Historical hourly objects never change, so entries never need revalidation.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, etag: Optional[str]) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get((key, etag))
+            if entry is not None:
+                self._entries.move_to_end((key, etag))
+            return entry
+
+    def put(self, key: str, etag: Optional[str], parsed: dict) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[(key, etag)] = parsed
+            self._entries.move_to_end((key, etag))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all parsed entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,380 @@
+"""
+Daily segments of the hourly supply-mix objects.
+
+hourly_data/ gets one small JSON object per hour, so a month of history costs hundreds of GETs
+and listing the prefix costs a page per thousand objects. Compaction merges the parsed points of
+each closed day (UTC, by modification time) into one hourly_segments/<date>.json object and
+records the segments in hourly_segments/manifest.json. Readers then fetch one segment per
+compacted day, and the hourly_data/ index only lists the keys after the compacted ones.
+The raw objects are left in place.
+
+Run the compaction from the backend directory with:
+    python -m services.hourly_segments [--dry-run]
+or set HOURLY_COMPACTION_ENABLED=true to run it in the background of one API worker.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from config import settings
+from services.hourly import HOURLY_PREFIX, ParsedObjectCache, parse_hourly_json
+from services.latest_index import LatestObjectIndex, hourly_data_index
+from services.s3_service import async_s3_service, s3_service
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = "hourly_segments/"
+MANIFEST_KEY = SEGMENT_PREFIX + "manifest.json"
+SEGMENT_VERSION = 1
+
+# Parsed hourly objects by (key, ETag); historical objects never change
+parsed_hourly_cache = ParsedObjectCache(settings.hourly_parsed_cache_entries)
+
+
+def segment_key(day: date) -> str:
+    return f"{SEGMENT_PREFIX}{day.isoformat()}.json"
+
+
+def _day_of(modified: datetime) -> date:
+    """The UTC day an object belongs to."""
+    return modified.astimezone(timezone.utc).date()
+
+
+def _encode(data: dict) -> bytes:
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+async def fetch_hourly_points(objects: List[dict]) -> Tuple[Dict[str, dict], List[str]]:
+    """
+    Parse hourly objects. Objects not parsed before are fetched concurrently
+    (bounded by settings.s3_fetch_concurrency).
+
+    Returns:
+        Tuple of (parsed points by key, keys that could not be fetched); unparseable objects are in neither
+    """
+    points: Dict[str, dict] = {}
+    missing = []
+    for obj in objects:
+        point = parsed_hourly_cache.get(obj['Key'], obj['ETag'])
+        if point is None:
+            missing.append(obj)
+        else:
+            points[obj['Key']] = point
+
+    unavailable = []
+    if missing:
+        # Parsed results are cached here, so don't also keep the raw bytes in the object cache
+        contents = await async_s3_service.get_objects([obj['Key'] for obj in missing], use_cache=False)
+        for obj in missing:
+            body = contents.get(obj['Key'])
+            if body is None:
+                unavailable.append(obj['Key'])
+                continue
+            try:
+                point = parse_hourly_json(body)
+            except (ValueError, AttributeError) as e:
+                logger.warning(f"Skipping unparseable hourly object {obj['Key']}: {e}")
+                continue
+            point["time"] = point["fetched_at"] or obj['LastModified'].isoformat()
+            parsed_hourly_cache.put(obj['Key'], obj['ETag'], point)
+            points[obj['Key']] = point
+
+    return points, unavailable
+
+
+async def load_hourly_points(objects: List[dict]) -> List[dict]:
+    """Return the parsed contents of hourly objects in the given order, skipping objects that can't be fetched or parsed."""
+    points, _ = await fetch_hourly_points(objects)
+    return [points[obj['Key']] for obj in objects if obj['Key'] in points]
+
+
+class HourlySegmentStore:
+    """Reads the manifest and segments of compacted days, and compacts closed days."""
+
+    def __init__(self, index: LatestObjectIndex, manifest_check_seconds: float, segment_cache_entries: int):
+        self.index = index
+        self.manifest_check_seconds = manifest_check_seconds
+        self._manifest: dict = {"segments": {}}
+        self._manifest_etag: Optional[str] = None
+        self._checked_at: Optional[float] = None
+        # Parsed segments by (key, ETag)
+        self._segments = ParsedObjectCache(segment_cache_entries)
+        self._lock = threading.Lock()
+
+    def manifest(self, force: bool = False) -> dict:
+        """
+        Return the compaction manifest, re-read from S3 at most every manifest_check_seconds.
+
+        Args:
+            force: Revalidate against S3 now
+
+        Returns:
+            Dict with 'compacted_through' (last hourly_data/ key covered by segments) and
+            'segments' (UTC date -> segment entry) keys
+        """
+        with self._lock:
+            if (not force and self._checked_at is not None
+                    and time.monotonic() - self._checked_at < self.manifest_check_seconds):
+                return self._manifest
+            self._checked_at = time.monotonic()
+
+        # No manifest until the first compaction run: every hour is still a separate object
+        cached = s3_service.get_object_versioned(
+            MANIFEST_KEY, max_age=0 if force else self.manifest_check_seconds, missing_ok=True
+        )
+        if cached is not None and cached.etag != self._manifest_etag:
+            try:
+                manifest = json.loads(cached.body)
+            except ValueError as e:
+                logger.error(f"Ignoring unreadable {MANIFEST_KEY}: {e}")
+            else:
+                self._set_manifest(manifest, cached.etag)
+        return self._manifest
+
+    def _set_manifest(self, manifest: dict, etag: Optional[str]) -> None:
+        with self._lock:
+            self._manifest = manifest
+            self._manifest_etag = etag
+
+    def refresh_index(self) -> Optional[dict]:
+        """
+        Pick up new hourly_data/ objects and return the newest one. Keys already compacted into
+        segments are left out of the listing.
+        """
+        self.index.set_floor(self.manifest().get("compacted_through"))
+        return self.index.refresh()
+
+    def plan(self, start: datetime, end: datetime) -> Tuple[List[dict], List[dict]]:
+        """
+        Split a time window into the segments covering it and the raw objects of days without one.
+        Call refresh_index() first to pick up new objects.
+
+        Returns:
+            Tuple of (manifest entries of the overlapping segments, hourly_data/ objects outside them)
+        """
+        segments = self.manifest().get("segments", {})
+        overlapping = [
+            entry for _, entry in sorted(segments.items())
+            if datetime.fromisoformat(entry["start"]) <= end and datetime.fromisoformat(entry["end"]) >= start
+        ]
+        raw = [
+            obj for obj in self.index.objects_between(start, end)
+            if _day_of(obj['LastModified']).isoformat() not in segments
+        ]
+        return overlapping, raw
+
+    async def _load_segments(self, entries: List[dict]) -> Dict[str, Optional[List[Tuple[datetime, dict]]]]:
+        """Return the (modification time, stored point) pairs of each segment, or None for segments that can't be read."""
+        segments = {entry["key"]: self._segments.get(entry["key"], entry.get("etag")) for entry in entries}
+        missing = [entry for entry in entries if segments[entry["key"]] is None]
+        if missing:
+            bodies = await async_s3_service.get_objects([entry["key"] for entry in missing], use_cache=False)
+            for entry in missing:
+                body = bodies.get(entry["key"])
+                if body is None:
+                    continue
+                try:
+                    points = json.loads(body)["points"]
+                    parsed = {"points": [(datetime.fromisoformat(p["last_modified"]), p) for p in points]}
+                except (ValueError, KeyError, TypeError) as e:
+                    logger.error(f"Ignoring unreadable segment {entry['key']}: {e}")
+                    continue
+                self._segments.put(entry["key"], entry.get("etag"), parsed)
+                segments[entry["key"]] = parsed
+        return {key: segment["points"] if segment is not None else None for key, segment in segments.items()}
+
+    async def load_points(self, segments: List[dict], raw: List[dict], start: datetime, end: datetime) -> List[dict]:
+        """
+        Return the points of planned segments and raw objects modified between start and end, oldest first.
+        Segments or objects that can't be read are skipped.
+        """
+        timed = []
+        for key, points in (await self._load_segments(segments)).items():
+            if points is None:
+                logger.warning(f"Segment {key} unavailable, its hours are missing from the response")
+                continue
+            timed.extend(
+                (modified, {field: stored[field] for field in ("time", "supply", "imports", "exports", "fetched_at")})
+                for modified, stored in points if start <= modified <= end
+            )
+
+        parsed, _ = await fetch_hourly_points(raw)
+        timed.extend((obj['LastModified'], parsed[obj['Key']]) for obj in raw if obj['Key'] in parsed)
+
+        timed.sort(key=lambda item: item[0])
+        return [point for _, point in timed]
+
+    async def compact(self, now: Optional[datetime] = None, dry_run: bool = False) -> dict:
+        """
+        Write a segment for every closed day with hourly_data/ objects not compacted yet (oldest
+        first), then the manifest. A day is closed settings.hourly_compaction_grace_seconds after
+        midnight UTC. A day that can't be fully read or written stops the run, so the compacted
+        range never skips over a gap. Objects uploaded to a compacted day later are merged into
+        its segment, unless their key sorts before manifest['compacted_through'].
+
+        Args:
+            now: Current time (defaults to now)
+            dry_run: Only report the days that would be compacted
+
+        Returns:
+            Dict with the compacted 'days', the number of 'objects' merged and 'compacted_through'
+        """
+        now = now or datetime.now(timezone.utc)
+        last_closed = (now - timedelta(seconds=settings.hourly_compaction_grace_seconds)).date() - timedelta(days=1)
+
+        manifest = await asyncio.to_thread(self.manifest, True)
+        segments = dict(manifest.get("segments", {}))
+        floor = manifest.get("compacted_through")
+        objects = await async_s3_service.list_objects_with_metadata(HOURLY_PREFIX, start_after=floor)
+
+        by_day: Dict[date, List[dict]] = {}
+        for obj in objects:
+            by_day.setdefault(_day_of(obj['LastModified']), []).append(obj)
+
+        compacted_days = []
+        merged = 0
+        for day in sorted(day for day in by_day if day <= last_closed):
+            entry = segments.get(day.isoformat())
+            day_objects = sorted(by_day[day], key=lambda obj: (obj['LastModified'], obj['Key']))
+            if entry is not None:
+                # Only objects written after the day was compacted (late uploads)
+                day_objects = [obj for obj in day_objects if not entry["first_key"] <= obj['Key'] <= entry["last_key"]]
+            if not day_objects:
+                continue
+            if dry_run:
+                compacted_days.append(day.isoformat())
+                merged += len(day_objects)
+                continue
+
+            stored = []
+            if entry is not None:
+                existing = (await self._load_segments([entry]))[entry["key"]]
+                if existing is None:
+                    logger.warning(f"Stopping compaction at {day}: segment {entry['key']} unavailable")
+                    break
+                stored = [point for _, point in existing]
+
+            points, unavailable = await fetch_hourly_points(day_objects)
+            if unavailable:
+                logger.warning(f"Stopping compaction at {day}: {len(unavailable)} hourly objects unavailable")
+                break
+            stored.extend(
+                {"key": obj['Key'], "etag": obj['ETag'], "last_modified": obj['LastModified'].isoformat(), **points[obj['Key']]}
+                for obj in day_objects if obj['Key'] in points
+            )
+            stored.sort(key=lambda point: (point["last_modified"], point["key"]))
+            if not stored:
+                continue
+
+            key = segment_key(day)
+            etag = await async_s3_service.put_object(
+                key, _encode({"version": SEGMENT_VERSION, "date": day.isoformat(), "points": stored}),
+                content_type="application/json"
+            )
+            if etag is None:
+                logger.warning(f"Stopping compaction at {day}: could not write {key}")
+                break
+            segments[day.isoformat()] = {
+                "key": key,
+                "etag": etag,
+                "objects": len(stored),
+                "first_key": min(point["key"] for point in stored),
+                "last_key": max(point["key"] for point in stored),
+                "start": stored[0]["last_modified"],
+                "end": stored[-1]["last_modified"],
+            }
+            compacted_days.append(day.isoformat())
+            merged += len(day_objects)
+
+        # Listings may skip every compacted key below the oldest uncompacted one. The newest object
+        # always stays listed so the index can report it as the latest.
+        remaining = [obj['Key'] for obj in objects if _day_of(obj['LastModified']).isoformat() not in segments]
+        compacted_keys = [entry["last_key"] for entry in segments.values()]
+        if compacted_keys:
+            bound = min(remaining) if remaining else max(compacted_keys)
+            floor = max([key for key in compacted_keys if key < bound and (floor is None or key > floor)] or [floor])
+
+        if not dry_run and (compacted_days or floor != manifest.get("compacted_through")):
+            updated = {
+                "version": SEGMENT_VERSION,
+                "updated_at": now.isoformat(),
+                "compacted_through": floor,
+                "segments": dict(sorted(segments.items())),
+            }
+            etag = await async_s3_service.put_object(MANIFEST_KEY, _encode(updated), content_type="application/json")
+            if etag is None:
+                logger.error(f"Could not write {MANIFEST_KEY}; compacted segments will be picked up by the next run")
+            else:
+                self._set_manifest(updated, etag)
+
+        if compacted_days and not dry_run:
+            logger.info(f"Compacted {merged} hourly objects into {len(compacted_days)} daily segments")
+        return {"days": compacted_days, "objects": merged, "compacted_through": floor, "dry_run": dry_run}
+
+
+class HourlyCompactor:
+    """Runs the compaction of closed days periodically in the background."""
+
+    def __init__(self, store: HourlySegmentStore, interval_seconds: float):
+        self.store = store
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.store.compact()
+            except Exception:
+                logger.exception("Hourly compaction failed")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        """Start the background compaction task (must be called from a running event loop)."""
+        if not self.running:
+            self._task = asyncio.create_task(self._run(), name="hourly-compactor")
+            logger.info(f"Hourly compaction started (interval {self.interval_seconds}s)")
+
+    async def stop(self) -> None:
+        """Stop the background compaction task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global instances
+hourly_segments = HourlySegmentStore(
+    hourly_data_index,
+    settings.hourly_manifest_check_seconds,
+    # A segment holds a day of parsed objects
+    max(1, settings.hourly_parsed_cache_entries // 24),
+)
+hourly_compactor = HourlyCompactor(hourly_segments, settings.hourly_compaction_interval_seconds)
+
+
+def main_cli(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compact closed days of hourly_data/ objects into daily segments")
+    parser.add_argument("--dry-run", action="store_true", help="List the days that would be compacted without writing")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=settings.log_level.upper(), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    summary = asyncio.run(hourly_segments.compact(dry_run=args.dry_run))
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
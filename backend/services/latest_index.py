@@ -0,0 +1,125 @@
+"""
+Incremental index of the objects under an S3 prefix.
+The first refresh lists the whole prefix. Later refreshes only list keys after the last key
+seen (StartAfter), so finding the newest object costs one small list call no matter how many
+objects have accumulated. A periodic full listing guards against keys that don't sort chronologically.
+The metadata of every listed object is kept sorted by modification time, so time windows can be
+selected without listing the prefix again.
+Keys at or before a floor (objects served from elsewhere, e.g. compacted hourly segments) are
+skipped by every listing.
+"""
+import bisect
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from config import settings
+from services.forecast import FORECAST_PREFIX
+from services.hourly import HOURLY_PREFIX
+from services.s3_service import s3_service
+
+logger = logging.getLogger(__name__)
+
+
+class LatestObjectIndex:
+    """Tracks the objects under a prefix and the most recently modified one."""
+
+    def __init__(self, prefix: str, full_relist_seconds: float):
+        self.prefix = prefix
+        self.full_relist_seconds = full_relist_seconds
+        self.latest: Optional[dict] = None
+        self.last_key: Optional[str] = None
+        self.floor: Optional[str] = None
+        # (LastModified, Key, ETag) of every object, sorted by LastModified
+        self._entries: List[Tuple[datetime, str, Optional[str]]] = []
+        self._last_full_listing: Optional[float] = None
+        self._refreshed_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _needs_full_listing(self) -> bool:
+        return (
+            self.last_key is None
+            or self._last_full_listing is None
+            or time.monotonic() - self._last_full_listing >= self.full_relist_seconds
+        )
+
+    def set_floor(self, key: Optional[str]) -> None:
+        """
+        Skip keys at or before `key` in future listings. The floor only moves forward; moving it
+        makes the next refresh a full listing so the skipped objects are dropped from the index.
+        """
+        with self._lock:
+            if key is None or (self.floor is not None and key <= self.floor):
+                return
+            self.floor = key
+            self._last_full_listing = None
+
+    def refresh(self, max_age: Optional[float] = None) -> Optional[dict]:
+        """
+        Pick up new objects and return the newest one.
+
+        Args:
+            max_age: Skip listing if the index was refreshed less than this many seconds ago
+
+        Returns:
+            Dict with 'Key', 'LastModified', 'ETag' and 'Size' keys, or None if the prefix is empty
+        """
+        with self._lock:
+            if max_age is not None and self._refreshed_at is not None \
+                    and time.monotonic() - self._refreshed_at < max_age:
+                return self.latest
+            full_listing = self._needs_full_listing()
+            if full_listing:
+                start_after = self.floor
+            else:
+                start_after = max(self.last_key, self.floor) if self.floor else self.last_key
+            objects = s3_service.list_objects_with_metadata(prefix=self.prefix, start_after=start_after)
+
+            if full_listing and objects:
+                # Rebuild from scratch so deleted or rewritten objects don't linger
+                self.latest = None
+                self.last_key = None
+                self._entries = []
+            if full_listing:
+                self._last_full_listing = time.monotonic()
+            self._refreshed_at = time.monotonic()
+
+            for obj in objects:
+                if self.latest is None or obj['LastModified'] >= self.latest['LastModified']:
+                    self.latest = obj
+                if self.last_key is None or obj['Key'] > self.last_key:
+                    self.last_key = obj['Key']
+
+            if objects:
+                new_entries = sorted((obj['LastModified'], obj['Key'], obj.get('ETag')) for obj in objects)
+                if self._entries and new_entries[0] < self._entries[-1]:
+                    self._entries = sorted(self._entries + new_entries)
+                else:
+                    self._entries.extend(new_entries)
+
+            if objects:
+                logger.debug(f"Indexed {len(objects)} new objects under {self.prefix} "
+                              f"({'full' if full_listing else 'incremental'} listing)")
+            return self.latest
+
+    def objects_between(self, start: datetime, end: datetime) -> List[dict]:
+        """
+        Return the indexed objects last modified between start and end (inclusive), oldest first.
+        Call refresh() first to pick up new objects.
+
+        Returns:
+            List of dicts with 'Key', 'LastModified' and 'ETag' keys
+        """
+        with self._lock:
+            lo = bisect.bisect_left(self._entries, (start,))
+            hi = bisect.bisect_right(self._entries, (end, chr(0x10FFFF)))
+            entries = self._entries[lo:hi]
+        return [{'Key': key, 'LastModified': modified, 'ETag': etag} for modified, key, etag in entries]
+
+
+# Global instances
+hourly_data_index = LatestObjectIndex(HOURLY_PREFIX, settings.hourly_index_full_relist_seconds)
+# Forecast files are written once a day, so the batch endpoint lists new keys at most once per cache TTL
+forecast_index = LatestObjectIndex(FORECAST_PREFIX, settings.forecast_index_full_relist_seconds)
@@ -0,0 +1,177 @@
+"""
+File-backed stand-in for the boto3 S3 client.
+Serves objects from a local directory (one directory = one bucket) and implements the subset of
+the S3 API that S3Service uses, including conditional and Range GETs and paginated listings.
+Used by the benchmarks and load tests, and for running the API without AWS (settings.s3_local_root).
+It can add latency and fail a fraction of calls, to see how the API behaves when S3 is slow or flaky.
+"""
+import hashlib
+import io
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+
+def _client_error(code: str, status: int, message: str, operation: str) -> ClientError:
+    return ClientError(
+        {'Error': {'Code': code, 'Message': message}, 'ResponseMetadata': {'HTTPStatusCode': status}},
+        operation
+    )
+
+
+class LocalS3Client:
+    """
+    Implements get_object, head_object, put_object and list_objects_v2 on top of a directory.
+
+    Args:
+        root: Directory holding the bucket's objects
+        latency_seconds: Delay added to every call
+        jitter_seconds: Extra random delay per call, uniform between 0 and this
+        error_rate: Fraction of calls failing with 503 SlowDown (after the delay)
+    """
+
+    def __init__(self, root: str, latency_seconds: float = 0.0, jitter_seconds: float = 0.0,
+                 error_rate: float = 0.0):
+        self.root = Path(root)
+        self.latency_seconds = latency_seconds
+        self.jitter_seconds = jitter_seconds
+        self.error_rate = error_rate
+        self._etags: Dict[Tuple[str, int, int], str] = {}
+
+    def _inject(self, operation: str) -> None:
+        """Simulate S3 round trips and throttling."""
+        delay = self.latency_seconds + (random.uniform(0, self.jitter_seconds) if self.jitter_seconds else 0)
+        if delay > 0:
+            time.sleep(delay)
+        if self.error_rate and random.random() < self.error_rate:
+            raise _client_error('SlowDown', 503, "Please reduce your request rate.", operation)
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if self.root.resolve() not in path.parents:
+            raise _client_error('InvalidArgument', 400, f"Invalid key: {key}", 'GetObject')
+        return path
+
+    def _stat(self, key: str, operation: str):
+        path = self._path(key)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            code = '404' if operation == 'HeadObject' else 'NoSuchKey'
+            raise _client_error(code, 404, "The specified key does not exist.", operation)
+        return path, stat
+
+    def _etag(self, path: Path, stat: os.stat_result) -> str:
+        cache_key = (str(path), stat.st_mtime_ns, stat.st_size)
+        etag = self._etags.get(cache_key)
+        if etag is None:
+            digest = hashlib.md5()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+            etag = self._etags[cache_key] = f'"{digest.hexdigest()}"'
+        return etag
+
+    @staticmethod
+    def _last_modified(stat: os.stat_result) -> datetime:
+        return datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+
+    @staticmethod
+    def _parse_range(range_header: str, size: int) -> Tuple[int, int]:
+        spec = range_header.split('=', 1)[1]
+        first, _, last = spec.partition('-')
+        if not first:
+            # Suffix range: the last N bytes
+            return max(size - int(last), 0), size - 1
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if start >= size:
+            raise _client_error('InvalidRange', 416, "The requested range is not satisfiable", 'GetObject')
+        return start, end
+
+    def get_object(self, Bucket: str, Key: str, Range: Optional[str] = None,
+                   IfMatch: Optional[str] = None, IfNoneMatch: Optional[str] = None, **kwargs) -> dict:
+        self._inject('GetObject')
+        path, stat = self._stat(Key, 'GetObject')
+        etag = self._etag(path, stat)
+        if IfMatch is not None and IfMatch != etag:
+            raise _client_error('PreconditionFailed', 412, "At least one of the preconditions failed", 'GetObject')
+        if IfNoneMatch is not None and IfNoneMatch == etag:
+            raise _client_error('304', 304, "Not Modified", 'GetObject')
+
+        with open(path, 'rb') as f:
+            if Range:
+                start, end = self._parse_range(Range, stat.st_size)
+                f.seek(start)
+                body = f.read(end - start + 1)
+            else:
+                body = f.read()
+
+        return {
+            'Body': io.BytesIO(body),
+            'ETag': etag,
+            'LastModified': self._last_modified(stat),
+            'ContentLength': len(body),
+        }
+
+    def head_object(self, Bucket: str, Key: str, **kwargs) -> dict:
+        self._inject('HeadObject')
+        path, stat = self._stat(Key, 'HeadObject')
+        return {
+            'ETag': self._etag(path, stat),
+            'LastModified': self._last_modified(stat),
+            'ContentLength': stat.st_size,
+        }
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes, **kwargs) -> dict:
+        self._inject('PutObject')
+        path = self._path(Key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write atomically so concurrent readers never see a partial object
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(Body)
+        os.replace(tmp_path, path)
+        return {'ETag': self._etag(path, path.stat())}
+
+    def list_objects_v2(self, Bucket: str, Prefix: str = "", StartAfter: Optional[str] = None,
+                        ContinuationToken: Optional[str] = None, MaxKeys: int = 1000, **kwargs) -> dict:
+        self._inject('ListObjectsV2')
+        # Only walk the directory the prefix points into
+        base = self.root / Prefix.rpartition('/')[0]
+        keys = sorted(
+            path.relative_to(self.root).as_posix()
+            for path in (base.rglob('*') if base.is_dir() else [])
+            if path.is_file() and not path.name.startswith('.tmp-')
+        )
+        after = ContinuationToken or StartAfter
+        keys = [key for key in keys if key.startswith(Prefix) and (after is None or key > after)]
+
+        page = keys[:MaxKeys]
+        contents = []
+        for key in page:
+            path = self.root / key
+            stat = path.stat()
+            contents.append({
+                'Key': key,
+                'LastModified': self._last_modified(stat),
+                'ETag': self._etag(path, stat),
+                'Size': stat.st_size,
+            })
+
+        response = {'KeyCount': len(page), 'IsTruncated': len(keys) > MaxKeys}
+        if contents:
+            response['Contents'] = contents
+        if response['IsTruncated']:
+            response['NextContinuationToken'] = page[-1]
+        return response
+
+    def get_bucket_location(self, Bucket: str, **kwargs) -> dict:
+        self._inject('GetBucketLocation')
+        return {'LocationConstraint': None}
@@ -0,0 +1,124 @@
+"""
+Bounded in-process cache for S3 objects.
+Entries expire after a TTL and are then revalidated against S3 using their ETag.
+When the cache grows past its byte budget, the least recently used entries are evicted.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional, Tuple
+
+
+@dataclass
+class CachedObject:
+    """An S3 object body together with the metadata needed to revalidate it."""
+    body: bytes
+    etag: Optional[str] = None
+    last_modified: Optional[datetime] = None
+    validated_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def size(self) -> int:
+        return len(self.body)
+
+
+class ObjectCache:
+    """Thread-safe TTL + LRU-by-bytes cache keyed by (bucket, key)."""
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str], CachedObject]" = OrderedDict()
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, bucket: str, key: str) -> Optional[CachedObject]:
+        """Return the cached entry (fresh or not) and mark it as recently used."""
+        with self._lock:
+            entry = self._entries.get((bucket, key))
+            if entry is not None:
+                self._entries.move_to_end((bucket, key))
+            return entry
+
+    def is_fresh(self, entry: CachedObject, max_age: Optional[float] = None) -> bool:
+        """Check whether an entry is still within its TTL (or max_age) and can be served without revalidation."""
+        ttl = self.ttl_seconds if max_age is None else min(max_age, self.ttl_seconds)
+        return (time.monotonic() - entry.validated_at) < ttl
+
+    def put(self, bucket: str, key: str, entry: CachedObject) -> None:
+        """Store an entry, evicting least recently used entries until the byte budget is met."""
+        if not self.enabled or entry.size > self.max_bytes:
+            # Too large to ever fit - make sure we don't keep an outdated copy around
+            self.invalidate(bucket, key)
+            return
+
+        with self._lock:
+            previous = self._entries.pop((bucket, key), None)
+            if previous is not None:
+                self._current_bytes -= previous.size
+
+            self._entries[(bucket, key)] = entry
+            self._current_bytes += entry.size
+
+            while self._current_bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._current_bytes -= evicted.size
+                self.evictions += 1
+
+    def mark_validated(self, entry: CachedObject) -> None:
+        """Reset the TTL of an entry after S3 confirmed it is unchanged (304 Not Modified)."""
+        entry.validated_at = time.monotonic()
+
+    def invalidate(self, bucket: str, key: str) -> None:
+        """Drop a single entry from the cache."""
+        with self._lock:
+            entry = self._entries.pop((bucket, key), None)
+            if entry is not None:
+                self._current_bytes -= entry.size
+
+    def clear(self) -> None:
+        """Drop all entries from the cache."""
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+
+    def record_hit(self) -> None:
+        with self._lock:
+            self.hits += 1
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def record_revalidation(self) -> None:
+        with self._lock:
+            self.revalidations += 1
+
+    def stats(self) -> dict:
+        """Return cache counters and current size for diagnostics."""
+        with self._lock:
+            lookups = self.hits + self.misses + self.revalidations
+            return {
+                "entries": len(self._entries),
+                "bytes": self._current_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidations": self.revalidations,
+                "evictions": self.evictions,
+                # Revalidations avoid the download, so they count towards the hit ratio
+                "hit_ratio": (self.hits + self.revalidations) / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,25 @@
+"""
+Date and time helpers for the Ontario (Eastern) timezone.
+"""
+from datetime import date, datetime, timedelta
+
+
+def get_ontario_now() -> datetime:
+    """
+    Get the current time in Ontario/Eastern timezone.
+    Ontario is UTC-5 (EST) or UTC-4 (EDT), so we subtract 5 hours from UTC.
+    This ensures we get the correct time regardless of server timezone (e.g., UTC on Render).
+    """
+    return datetime.utcnow() - timedelta(hours=5)
+
+
+def get_today_ontario_date() -> date:
+    """Get today's date in Ontario/Eastern timezone."""
+    return get_ontario_now().date()
+
+
+def seconds_until_ontario_midnight() -> float:
+    """Seconds until the Ontario date returned by get_today_ontario_date rolls over."""
+    ontario_now = get_ontario_now()
+    next_midnight = datetime.combine(ontario_now.date() + timedelta(days=1), datetime.min.time())
+    return (next_midnight - ontario_now).total_seconds()
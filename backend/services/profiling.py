@@ -0,0 +1,284 @@
+"""
+Opt-in per-request profiling (settings.profiling_enabled).
+
+Code on the request path reports where its time goes through phase() / record_phase(): S3 calls,
+decoding, CSV parsing, merging and serialization. Phases are collected in a context variable, so
+work done in worker threads (asyncio.to_thread, AsyncS3Service) counts towards the request that
+started it.
+
+A request sent with "X-Profile: <settings.admin_token>" also has the stacks of every thread
+sampled while it runs, and gets a Server-Timing header with the phase breakdown plus an
+X-Profile-Id header. Those profiles, requests slower than settings.profiling_slow_ms and slow
+background snapshot refreshes are kept in a ring buffer served at /api/admin/profiles.
+Phase times of parallel S3 calls add up, so they can exceed the request's duration.
+Without an admin token, X-Profile is ignored and the admin endpoints are disabled.
+"""
+import hmac
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Deepest stack frames kept per sample, and entries shown per profile
+MAX_STACK_DEPTH = 64
+TOP_ENTRIES = 25
+# Innermost frames of threads waiting for work (idle pool workers, the event loop's select)
+IDLE_FRAMES = {"thread.py:_worker", "threading.py:wait", "queue.py:get", "selectors.py:select"}
+
+
+class RequestProfile:
+    """Phase timings (and optionally stack samples) of one request or background job."""
+
+    def __init__(self, name: str, trigger: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.trigger = trigger
+        self.started_at = datetime.now(timezone.utc)
+        self.status: Optional[int] = None
+        self.duration = 0.0
+        self.samples: Optional[dict] = None
+        self._started = time.perf_counter()
+        self._phases: Dict[str, List[float]] = {}  # name -> [seconds, calls]
+        self._lock = threading.Lock()
+
+    def add(self, phase_name: str, seconds: float) -> None:
+        with self._lock:
+            totals = self._phases.setdefault(phase_name, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    def finish(self, status: Optional[int] = None) -> None:
+        self.duration = self.elapsed()
+        self.status = status
+
+    def phases(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                name: {"ms": round(seconds * 1000, 3), "calls": calls}
+                for name, (seconds, calls) in sorted(self._phases.items(), key=lambda item: -item[1][0])
+            }
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: one metric per phase plus the total so far."""
+        metrics = [f"{name};dur={phase['ms']}" for name, phase in self.phases().items()]
+        metrics.append(f"total;dur={round(self.elapsed() * 1000, 3)}")
+        return ", ".join(metrics)
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "trigger": self.trigger,
+            "started_at": self.started_at.isoformat(),
+            "status": self.status,
+            "duration_ms": round(self.duration * 1000, 3),
+            "phases": self.phases(),
+        }
+
+    def detail(self) -> dict:
+        return {**self.summary(), "samples": self.samples}
+
+
+_current: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+
+@contextmanager
+def phase(name: str):
+    """Add the duration of a block to the current profile (no-op when nothing is being profiled)."""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(name, time.perf_counter() - started)
+
+
+def record_phase(name: str, seconds: float) -> None:
+    """Add an already measured duration to the current profile."""
+    profile = _current.get()
+    if profile is not None:
+        profile.add(name, seconds)
+
+
+class StackSampler:
+    """
+    Samples the stacks of all other threads at a fixed interval from a background thread.
+    Cheap enough to leave on for one request, and unlike cProfile it sees worker threads.
+    """
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self._stacks: Counter = Counter()
+        self._functions: Counter = Counter()
+        self._samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval_seconds):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                frames = []
+                while frame is not None and len(frames) < MAX_STACK_DEPTH:
+                    code = frame.f_code
+                    frames.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                if not frames or frames[0] in IDLE_FRAMES:
+                    continue
+                self._functions[frames[0]] += 1
+                self._stacks[";".join(reversed(frames))] += 1
+            self._samples += 1
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> dict:
+        """
+        Stop sampling.
+
+        Returns:
+            Dict with the sample count, the busiest functions (innermost frame) and the most common
+            stacks in folded (flame graph) format, root first
+        """
+        self._stop.set()
+        self._thread.join()
+        return {
+            "interval_ms": self.interval_seconds * 1000,
+            "samples": self._samples,
+            "functions": [{"function": name, "samples": count} for name, count in self._functions.most_common(TOP_ENTRIES)],
+            "stacks": [{"stack": stack, "samples": count} for stack, count in self._stacks.most_common(TOP_ENTRIES)],
+        }
+
+
+class ProfileStore:
+    """Ring buffer of recorded profiles."""
+
+    def __init__(self, size: int):
+        self._profiles: "deque[RequestProfile]" = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+
+    def summaries(self) -> List[dict]:
+        """Recorded profiles, newest first."""
+        with self._lock:
+            profiles = list(self._profiles)
+        return [profile.summary() for profile in reversed(profiles)]
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        with self._lock:
+            return next((profile for profile in self._profiles if profile.id == profile_id), None)
+
+
+def is_slow(profile: RequestProfile) -> bool:
+    return profile.duration * 1000 >= settings.profiling_slow_ms
+
+
+@contextmanager
+def track(name: str):
+    """Collect phases of a background job, recording it if it is slow (no-op unless profiling is enabled)."""
+    if not settings.profiling_enabled:
+        yield
+        return
+    profile = RequestProfile(name, "slow")
+    token = _current.set(profile)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+        profile.finish()
+        if is_slow(profile):
+            profile_store.add(profile)
+
+
+def check_token(value: Optional[str]) -> bool:
+    """Check an X-Profile or X-Admin-Token value against settings.admin_token (never matches while it is unset)."""
+    if not value or not settings.admin_token:
+        return False
+    return hmac.compare_digest(value, settings.admin_token)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware collecting phase timings of every request and stack samples of flagged ones."""
+
+    def __init__(self, app):
+        self.app = app
+        # One sampled request at a time; samples cover every thread in the process
+        self._sampling = threading.Lock()
+        if not settings.admin_token:
+            logger.warning("ADMIN_TOKEN is not set: X-Profile is ignored and /api/admin/profiles is disabled")
+
+    @staticmethod
+    def _profile_requested(scope) -> bool:
+        # Header only, so the token doesn't end up in access logs and browser history
+        headers = dict(scope.get("headers") or [])
+        return check_token(headers.get(b"x-profile", b"").decode("latin-1"))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        if b"text/event-stream" in headers.get(b"accept", b""):
+            # Event streams stay open indefinitely
+            await self.app(scope, receive, send)
+            return
+
+        requested = self._profile_requested(scope)
+        profile = RequestProfile(f"{scope.get('method', '')} {scope.get('path', '')}", "requested" if requested else "slow")
+        sampler = None
+        if requested and self._sampling.acquire(blocking=False):
+            sampler = StackSampler(settings.profiling_sample_interval_ms / 1000).start()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if requested:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"server-timing", profile.server_timing().encode("latin-1")),
+                        (b"x-profile-id", profile.id.encode("latin-1")),
+                    ]
+            await send(message)
+
+        token = _current.set(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            profile.finish(status["code"])
+            if sampler is not None:
+                profile.samples = sampler.stop()
+                self._sampling.release()
+            if requested or is_slow(profile):
+                profile_store.add(profile)
+                if not requested:
+                    logger.info(f"Slow request {profile.name} took {profile.duration * 1000:.0f} ms "
+                                f"(profile {profile.id})")
+
+
+# Global instance
+profile_store = ProfileStore(settings.profiling_buffer_size)
@@ -0,0 +1,233 @@
+"""
+Background refresher that keeps prepared API responses warm.
+Each registered source has a cheap version check and a builder. The refresher polls the
+versions on a schedule (and at the Ontario date rollover) and rebuilds a response only
+when its version changed, then swaps the new snapshot in atomically.
+New snapshots are also pushed to subscribers (e.g. Server-Sent Events clients), so one
+watcher serves any number of connected dashboards.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+from config import settings
+from services.metrics import registry
+from services.ontario_time import seconds_until_ontario_midnight
+from services.profiling import track
+from services.responses import compress_body, encode_json, make_etag
+from services.single_flight import AsyncSingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    A prepared response, already encoded as JSON, and the source version it was built from.
+    validated_at is when the source was last confirmed to still have that version.
+    """
+    payload: dict
+    version: Hashable
+    body: bytes
+    etag: str
+    built_at: float = field(default_factory=time.time)
+    validated_at: float = field(default_factory=time.time, compare=False)
+    _encoded: Dict[Tuple[Optional[str], Optional[str]], Tuple[bytes, Optional[str]]] = field(
+        default_factory=dict, init=False, compare=False, repr=False
+    )
+
+    @classmethod
+    def create(cls, payload: dict, version: Hashable = None) -> "Snapshot":
+        """Encode a payload once; the ETag comes from the source version, or the body if unversioned."""
+        body = encode_json(payload)
+        etag = make_etag(version if version is not None else body)
+        return cls(payload=payload, version=version, body=body, etag=etag)
+
+    def encoded(self, encoding: Optional[str], shape: Optional[str] = None,
+                reshape: Optional[Callable[[dict], dict]] = None) -> Tuple[bytes, Optional[str]]:
+        """
+        Return the body in an alternative shape and/or content coding, computed once per snapshot.
+
+        Args:
+            encoding: Negotiated content coding ("br", "gzip" or None)
+            shape: Name of the alternative shape (None for the default body)
+            reshape: Builds the alternative payload from the default one
+
+        Returns:
+            Tuple of (body, content coding actually applied or None)
+        """
+        key = (shape, encoding)
+        cached = self._encoded.get(key)
+        if cached is None:
+            body = encode_json(reshape(self.payload)) if reshape is not None else self.body
+            cached = self._encoded[key] = compress_body(body, encoding)
+        return cached
+
+    def mark_validated(self) -> None:
+        """Record that the source version was checked and is unchanged."""
+        # The only mutable field: the snapshot itself stays the same object while its version is current
+        object.__setattr__(self, "validated_at", time.time())
+
+    @property
+    def age_seconds(self) -> float:
+        """Seconds since the snapshot's version was last confirmed (the HTTP Age of responses built from it)."""
+        return max(0.0, time.time() - self.validated_at)
+
+
+@dataclass
+class RefreshSource:
+    """A response to keep warm: get_version is blocking (runs in a thread), build is async."""
+    name: str
+    get_version: Callable[[], Hashable]
+    build: Callable[[], Awaitable[dict]]
+
+
+class Subscription:
+    """
+    Snapshots waiting to be sent to one subscriber.
+    Only the newest unsent snapshot per source is kept, so slow clients skip intermediate versions
+    instead of queueing them.
+    """
+
+    def __init__(self, names: Iterable[str]):
+        self.names = set(names)
+        self._pending: Dict[str, Snapshot] = {}
+        self._ready = asyncio.Event()
+
+    def push(self, name: str, snapshot: Snapshot) -> None:
+        if name in self.names:
+            self._pending[name] = snapshot
+            self._ready.set()
+
+    async def next(self, timeout: float) -> Dict[str, Snapshot]:
+        """Wait for new snapshots; returns an empty dict if none arrived within the timeout."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return {}
+        self._ready.clear()
+        pending, self._pending = self._pending, {}
+        return pending
+
+
+class SnapshotRefresher:
+    """Polls registered sources and keeps the latest snapshot of each in memory."""
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self._sources: Dict[str, RefreshSource] = {}
+        self._snapshots: Dict[str, Snapshot] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._subscriptions: Set[Subscription] = set()
+        self._failing: Set[str] = set()
+        self._flights = AsyncSingleFlight("snapshot_refresh")
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def register(self, name: str, get_version: Callable[[], Hashable], build: Callable[[], Awaitable[dict]]) -> None:
+        """Register a response to keep warm."""
+        self._sources[name] = RefreshSource(name=name, get_version=get_version, build=build)
+
+    def get(self, name: str) -> Optional[Snapshot]:
+        """Return the current snapshot, or None if the refresher isn't keeping it warm."""
+        if not self.running:
+            return None
+        return self._snapshots.get(name)
+
+    def is_stale(self, name: str) -> bool:
+        """True if the last refresh of this source failed, so its snapshot may be out of date."""
+        return name in self._failing
+
+    def subscribe(self, names: Iterable[str]) -> Subscription:
+        """Subscribe to new snapshots of the given sources, starting with the current ones."""
+        subscription = Subscription(names)
+        for name in subscription.names:
+            snapshot = self._snapshots.get(name)
+            if snapshot is not None:
+                subscription.push(name, snapshot)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscriptions.discard(subscription)
+
+    @property
+    def source_names(self) -> Tuple[str, ...]:
+        return tuple(self._sources)
+
+    async def refresh(self, name: str) -> Optional[Snapshot]:
+        """
+        Rebuild a snapshot if its source version changed.
+        Errors are logged and the previous snapshot (if any) is kept.
+        Concurrent refreshes of the same source (e.g. requests arriving before the first
+        background pass completed) share one version check and build.
+        """
+        return await self._flights.do(name, lambda: self._refresh(name))
+
+    async def _refresh(self, name: str) -> Optional[Snapshot]:
+        source = self._sources[name]
+        current = self._snapshots.get(name)
+        try:
+            with track(f"refresh {name}"):
+                version = await asyncio.to_thread(source.get_version)
+                if current is not None and current.version == version:
+                    current.mark_validated()
+                    self._failing.discard(name)
+                    return current
+
+                payload = await source.build()
+                snapshot = Snapshot.create(payload, version)
+            # Replacing the dict entry is atomic, so readers see either the old or the new snapshot
+            self._snapshots[name] = snapshot
+            self._failing.discard(name)
+            logger.info(f"Refreshed '{name}' snapshot (version {version})")
+            for subscription in list(self._subscriptions):
+                subscription.push(name, snapshot)
+            return snapshot
+        except Exception as e:
+            logger.error(f"Error refreshing '{name}' snapshot: {e}")
+            self._failing.add(name)
+            return current
+
+    async def refresh_all(self) -> None:
+        """Refresh all registered sources concurrently."""
+        await asyncio.gather(*(self.refresh(name) for name in self._sources))
+
+    async def _run(self) -> None:
+        while True:
+            await self.refresh_all()
+            # Wake up early at the Ontario date rollover so "today" snapshots are recomputed promptly
+            await asyncio.sleep(min(self.interval_seconds, seconds_until_ontario_midnight() + 1))
+
+    def start(self) -> None:
+        """Start the background polling task (must be called from a running event loop)."""
+        if not self.running:
+            self._task = asyncio.create_task(self._run(), name="snapshot-refresher")
+            logger.info(f"Snapshot refresher started (interval {self.interval_seconds}s)")
+
+    async def stop(self) -> None:
+        """Stop the background polling task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global instance
+refresher = SnapshotRefresher(settings.refresh_interval_seconds)
+
+registry.gauge(
+    "snapshot_age_seconds", "Seconds since the version of each prepared snapshot was last confirmed", ("name",),
+    callback=lambda: {(name,): snapshot.age_seconds for name, snapshot in refresher._snapshots.items()}
+)
+registry.gauge(
+    "snapshot_subscribers", "Clients subscribed to snapshot updates (Server-Sent Events)",
+    callback=lambda: {(): len(refresher._subscriptions)}
+)
@@ -0,0 +1,139 @@
+"""
+Helpers for serving pre-serialized JSON responses with HTTP caching headers.
+Responses are encoded with orjson and, when the client accepts it, compressed with brotli
+(if installed) or gzip.
+"""
+import gzip
+import hashlib
+from typing import Hashable, Optional, Tuple
+
+import orjson
+from fastapi import Request, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.datastructures import Headers
+
+from config import settings
+from services.profiling import phase
+
+try:
+    import brotli
+except ImportError:  # Optional dependency, gzip is used without it
+    brotli = None
+
+COLUMNAR_MEDIA_TYPE = "application/vnd.ieso.columnar+json"
+
+
+def encode_json(payload) -> bytes:
+    """Serialize a payload to compact JSON bytes."""
+    with phase("serialize"):
+        return orjson.dumps(payload, default=str)
+
+
+def make_etag(version: Hashable) -> str:
+    """Build a strong ETag from a source version (e.g. a tuple of S3 ETags)."""
+    return '"' + hashlib.sha256(repr(version).encode('utf-8')).hexdigest()[:32] + '"'
+
+
+def variant_etag(etag: str, *variant: Optional[str]) -> str:
+    """Derive the ETag of another representation (shape or content coding) of the same response."""
+    suffix = "-".join(part for part in variant if part)
+    return f'{etag[:-1]}-{suffix}"' if suffix else etag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison, as RFC 9110 requires)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return any(tag.removeprefix('W/') == etag.removeprefix('W/') for tag in candidates)
+
+
+def wants_columnar(request: Request) -> bool:
+    """Check whether the client asked for the columnar shape (?format=columnar or the columnar Accept type)."""
+    if request.query_params.get("format") == "columnar":
+        return True
+    return COLUMNAR_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick a content coding from an Accept-Encoding header.
+
+    Returns:
+        "br" (only if brotli is installed), "gzip", or None for an uncompressed response
+    """
+    if not accept_encoding:
+        return None
+    accepted = set()
+    for item in accept_encoding.split(','):
+        coding, *params = [part.strip() for part in item.split(';')]
+        quality = 1.0
+        for param in params:
+            if param.startswith('q='):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(coding.lower())
+
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress_body(body: bytes, encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """
+    Compress a body with the negotiated content coding. Bodies smaller than
+    settings.compression_min_bytes are left uncompressed.
+
+    Returns:
+        Tuple of (body, content coding actually applied or None)
+    """
+    if encoding is None or len(body) < settings.compression_min_bytes:
+        return body, None
+    with phase("compress"):
+        if encoding == 'br':
+            return brotli.compress(body, quality=settings.brotli_quality), 'br'
+        return gzip.compress(body, compresslevel=settings.gzip_compresslevel, mtime=0), 'gzip'
+
+
+def cached_json_response(request: Request, body: bytes, etag: str, cache_control: str,
+                         age: Optional[float] = None, encoding: Optional[str] = None,
+                         stale: bool = False) -> Response:
+    """
+    Return pre-encoded JSON with ETag and Cache-Control headers,
+    or an empty 304 Not Modified if the client already has this version.
+    The body must already be compressed with the given content coding (if any).
+    A stale response (the last good data, served while S3 is failing) carries a Warning header
+    and must be revalidated by clients, so they pick up fresh data as soon as S3 recovers.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept, Accept-Encoding"}
+    if age is not None:
+        headers["Age"] = str(int(age))
+    if stale:
+        headers["Cache-Control"] = "no-cache"
+        headers["Warning"] = '110 - "Response is Stale"'
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware that leaves Server-Sent Events streams alone: gzip buffers output,
+    which would hold events back until enough data accumulated.
+    """
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and "text/event-stream" in Headers(scope=scope).get("accept", ""):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
@@ -0,0 +1,164 @@
+"""
+Peak/low rollups of the Ontario Demand history.
+Daily, weekly (ISO weeks, starting Monday) and monthly peak, low, mean and load factor are
+computed once per version of the training dataset, so historical peaks are served by slicing
+a small sorted table instead of scanning every hour.
+"""
+import bisect
+import logging
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from services.demand_store import HOURS_PER_DAY, DemandSeries, format_hour
+from services.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+PERIODS = ("daily", "weekly", "monthly")
+
+
+class _Accumulator:
+    """Running peak, low, sum and hour count of one period."""
+    __slots__ = ("start", "peak", "peak_at", "low", "low_at", "total", "hours")
+
+    def __init__(self, start: date):
+        self.start = start
+        self.peak = float('-inf')
+        self.peak_at = None
+        self.low = float('inf')
+        self.low_at = None
+        self.total = 0.0
+        self.hours = 0
+
+    def add(self, value: float, day: date, hour_num: int) -> None:
+        if value > self.peak:
+            self.peak, self.peak_at = value, (day, hour_num)
+        if value < self.low:
+            self.low, self.low_at = value, (day, hour_num)
+        self.total += value
+        self.hours += 1
+
+    def merge(self, other: "_Accumulator") -> None:
+        if other.peak > self.peak:
+            self.peak, self.peak_at = other.peak, other.peak_at
+        if other.low < self.low:
+            self.low, self.low_at = other.low, other.low_at
+        self.total += other.total
+        self.hours += other.hours
+
+    def to_dict(self, end: date) -> dict:
+        mean = self.total / self.hours
+        return {
+            "period_start": self.start.isoformat(),
+            "period_end": end.isoformat(),
+            "peak": {"date": self.peak_at[0].isoformat(), "hour": format_hour(self.peak_at[1]), "demand": round(self.peak)},
+            "low": {"date": self.low_at[0].isoformat(), "hour": format_hour(self.low_at[1]), "demand": round(self.low)},
+            "mean": round(mean, 1),
+            # Average load relative to the peak: 1.0 means demand was flat over the period
+            "load_factor": round(mean / self.peak, 4) if self.peak > 0 else None,
+            "hours": self.hours,
+        }
+
+
+class RollupTable:
+    """Rollup rows of one period length, sorted by period start."""
+
+    def __init__(self, period: str, rows: List[dict]):
+        self.period = period
+        self.rows = rows
+        self._starts = [row["period_start"] for row in rows]
+        self._ends = [row["period_end"] for row in rows]
+
+    def select(self, start: Optional[date] = None, end: Optional[date] = None) -> List[dict]:
+        """Return the periods overlapping [start, end] with two binary searches."""
+        lo = bisect.bisect_left(self._ends, start.isoformat()) if start else 0
+        hi = bisect.bisect_right(self._starts, end.isoformat()) if end else len(self.rows)
+        return self.rows[lo:hi]
+
+
+def _week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def _week_end(start: date) -> date:
+    return start + timedelta(days=6)
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _month_end(start: date) -> date:
+    next_month = (start + timedelta(days=32)).replace(day=1)
+    return next_month - timedelta(days=1)
+
+
+def _group(daily: List[_Accumulator], period_start: Callable[[date], date],
+           period_end: Callable[[date], date]) -> List[dict]:
+    """Combine daily accumulators into longer periods (cost proportional to the number of days)."""
+    rows = []
+    current: Optional[_Accumulator] = None
+    for day in daily:
+        start = period_start(day.start)
+        if current is None or current.start != start:
+            if current is not None:
+                rows.append(current.to_dict(period_end(current.start)))
+            current = _Accumulator(start)
+        current.merge(day)
+    if current is not None:
+        rows.append(current.to_dict(period_end(current.start)))
+    return rows
+
+
+def build_rollups(series: DemandSeries) -> Dict[str, RollupTable]:
+    """Compute daily, weekly and monthly rollups in one pass over the hourly values."""
+    values = series.values
+    daily: List[_Accumulator] = []
+    for day_offset in range(len(values) // HOURS_PER_DAY):
+        day = series.start_date + timedelta(days=day_offset)
+        base = day_offset * HOURS_PER_DAY
+        accumulator = _Accumulator(day)
+        for hour_idx in range(HOURS_PER_DAY):
+            value = values[base + hour_idx]
+            if value == value:  # Skip missing hours (NaN)
+                accumulator.add(value, day, hour_idx + 1)
+        if accumulator.hours:
+            daily.append(accumulator)
+
+    return {
+        "daily": RollupTable("daily", [day.to_dict(day.start) for day in daily]),
+        "weekly": RollupTable("weekly", _group(daily, _week_start, _week_end)),
+        "monthly": RollupTable("monthly", _group(daily, _month_start, _month_end)),
+    }
+
+
+class RollupStore:
+    """Keeps the rollups of the current dataset version; rebuilt only when the series changes."""
+
+    def __init__(self):
+        # The series and its tables, published together so readers never pair them wrongly
+        self._built: Optional[Tuple[DemandSeries, Dict[str, RollupTable]]] = None
+        self._flights = SingleFlight("rollups")
+
+    def get(self, series: DemandSeries) -> Dict[str, RollupTable]:
+        """Return the rollups of a series, building them (once, even under concurrency) for a new version."""
+        built = self._built
+        if built is not None and built[0] is series:
+            return built[1]
+        return self._flights.do(series.etag or id(series), lambda: self._build(series))
+
+    def _build(self, series: DemandSeries) -> Dict[str, RollupTable]:
+        built = self._built
+        if built is not None and built[0] is series:
+            return built[1]
+        started = time.perf_counter()
+        tables = build_rollups(series)
+        self._built = (series, tables)
+        logger.info(f"Built demand rollups for {series.start_date} to {series.end_date} "
+                    f"({len(tables['daily'].rows)} days) in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return tables
+
+
+# Global instance
+demand_rollups = RollupStore()
@@ -2,40 +2,153 @@
 AWS S3 service for fetching data from S3 buckets.
 This service will be implemented when AWS S3 integration is needed.
 """
-import boto3
-from botocore.exceptions import ClientError
-from typing import Optional
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from botocore.exceptions import BotoCoreError, ClientError
+from typing import Callable, Dict, List, Optional
 from config import settings
+from services.circuit_breaker import CLOSED, CircuitBreaker
+from services.object_cache import CachedObject, ObjectCache
+from services.metrics import key_prefix, registry, s3_errors, s3_request_duration, s3_response_bytes
+from services.profiling import record_phase
+from services.single_flight import SingleFlight
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+class S3DeadlineExceeded(BotoCoreError):
+    """An S3 call (including retries and reading the body) took longer than settings.s3_call_deadline_seconds."""
+    fmt = "S3 {operation} of {key} exceeded the {deadline}s deadline"
+
 class S3Service:
     """Service for interacting with AWS S3 buckets."""
     
     def __init__(self):
-        self.s3_client = None
-        self._initialize_client()
+        self._s3_client = None
+        self._client_initialized = False
+        self._client_lock = threading.Lock()
+        self.cache = ObjectCache(
+            max_bytes=settings.s3_cache_max_bytes,
+            ttl_seconds=settings.s3_cache_ttl_seconds
+        )
+        self._flights = SingleFlight("s3_get_object")
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.s3_breaker_failure_threshold,
+            reset_seconds=settings.s3_breaker_reset_seconds
+        )
+        self._requests = ThreadPoolExecutor(
+            max_workers=settings.s3_max_pool_connections, thread_name_prefix="s3-request"
+        )
+        if not settings.fast_startup:
+            self._initialize_client()
+    
+    @property
+    def s3_client(self):
+        """
+        The boto3 S3 client (None if credentials are not configured).
+        In fast-startup mode it is created on first use, since importing boto3 and
+        loading the S3 service model dominate import time.
+        """
+        if not self._client_initialized:
+            self._initialize_client()
+        return self._s3_client
+    
+    @s3_client.setter
+    def s3_client(self, client) -> None:
+        self._s3_client = client
+        self._client_initialized = True
+    
+    @property
+    def client_initialized(self) -> bool:
+        return self._client_initialized
     
     def _initialize_client(self):
         """Initialize the S3 client with credentials from settings."""
+        with self._client_lock:
+            if self._client_initialized:
+                return
+            try:
+                if settings.s3_local_root:
+                    from services.local_s3 import LocalS3Client
+                    
+                    self._s3_client = LocalS3Client(
+                        settings.s3_local_root,
+                        latency_seconds=settings.s3_local_latency_ms / 1000,
+                        jitter_seconds=settings.s3_local_jitter_ms / 1000,
+                        error_rate=settings.s3_local_error_rate
+                    )
+                    logger.warning(f"Serving S3 objects from local directory {settings.s3_local_root}")
+                elif settings.aws_access_key_id and settings.aws_secret_access_key:
+                    import boto3
+                    from botocore.config import Config
+                    
+                    self._s3_client = boto3.client(
+                        's3',
+                        aws_access_key_id=settings.aws_access_key_id,
+                        aws_secret_access_key=settings.aws_secret_access_key,
+                        region_name=settings.aws_region,
+                        config=Config(
+                            max_pool_connections=settings.s3_max_pool_connections,
+                            connect_timeout=settings.s3_connect_timeout_seconds,
+                            read_timeout=settings.s3_read_timeout_seconds,
+                            retries={'mode': settings.s3_retry_mode, 'total_max_attempts': settings.s3_max_attempts},
+                            tcp_keepalive=True
+                        )
+                    )
+                    logger.info("S3 client initialized successfully")
+                else:
+                    logger.warning("AWS credentials not configured. S3 client not initialized.")
+            except Exception as e:
+                logger.error(f"Error initializing S3 client: {e}")
+            finally:
+                self._client_initialized = True
+    
+    @property
+    def degraded(self) -> bool:
+        """True while S3 is failing: the last call failed or the circuit breaker is open or probing."""
+        return self.breaker.state != CLOSED or self.breaker.failures > 0
+    
+    def _allow_call(self, operation: str, key: str) -> bool:
+        """Check the circuit breaker before calling S3."""
+        if self.breaker.allow():
+            return True
+        logger.warning(f"S3 circuit breaker open, skipping {operation} for {key}")
+        return False
+    
+    def _with_deadline(self, operation: str, key: str, request: Callable):
+        """
+        Run one S3 request, including its retries and reading the response body, in a worker
+        thread and give up after settings.s3_call_deadline_seconds by raising S3DeadlineExceeded
+        (a transient error, so it counts towards the circuit breaker).
+        
+        This bounds every caller, including synchronous ones running in to_thread or the
+        background refresher. An abandoned request keeps its worker thread until botocore's
+        connect/read timeouts and retries give up; while all workers are stuck, new requests
+        queue and fail at their own deadline instead of waiting indefinitely.
+        """
+        future = self._requests.submit(request)
         try:
-            if settings.aws_access_key_id and settings.aws_secret_access_key:
-                self.s3_client = boto3.client(
-                    's3',
-                    aws_access_key_id=settings.aws_access_key_id,
-                    aws_secret_access_key=settings.aws_secret_access_key,
-                    region_name=settings.aws_region
-                )
-                logger.info("S3 client initialized successfully")
-            else:
-                logger.warning("AWS credentials not configured. S3 client not initialized.")
-        except Exception as e:
-            logger.error(f"Error initializing S3 client: {e}")
+            return future.result(timeout=settings.s3_call_deadline_seconds)
+        except FutureTimeoutError:
+            future.cancel()
+            raise S3DeadlineExceeded(
+                operation=operation, key=key, deadline=settings.s3_call_deadline_seconds
+            ) from None
+    
+    def _record_outcome(self, error: Optional[Exception] = None) -> None:
+        """Feed the outcome of an S3 call to the circuit breaker (only transient errors count as failures)."""
+        if error is not None and _is_transient(error):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
     
     def get_object(self, key: str, bucket_name: Optional[str] = None) -> Optional[bytes]:
         """
-        Retrieve an object from S3.
+        Retrieve an object from S3, served from the in-process cache when possible.
         
         Args:
             key: The S3 object key
@@ -44,6 +157,32 @@ class S3Service:
         Returns:
             The object content as bytes, or None if error
         """
+        cached = self.get_object_versioned(key, bucket_name=bucket_name)
+        return cached.body if cached is not None else None
+    
+    def get_object_versioned(self, key: str, bucket_name: Optional[str] = None,
+                             max_age: Optional[float] = None, use_cache: bool = True,
+                             missing_ok: bool = False) -> Optional[CachedObject]:
+        """
+        Retrieve an object from S3 together with its ETag and last modified date.
+        
+        Fresh cache entries are returned without contacting S3. Expired entries are
+        revalidated with a conditional GET (If-None-Match), so an unchanged object
+        costs a 304 response instead of a full download. Concurrent misses for the same
+        object share a single request. While S3 is failing, an expired cached copy is
+        returned rather than nothing.
+        
+        Args:
+            key: The S3 object key
+            bucket_name: The bucket name (defaults to configured bucket)
+            max_age: Revalidate cache entries older than this many seconds (defaults to the cache TTL)
+            use_cache: Set to False to always download and not store the object in the cache
+            missing_ok: The object may not exist yet; a missing key is logged at DEBUG rather than
+                counted as an S3 error
+        
+        Returns:
+            The cached object (body, etag, last_modified), or None if error
+        """
         if not self.s3_client:
             logger.error("S3 client not initialized")
             return None
@@ -53,20 +192,282 @@ class S3Service:
             logger.error("S3 bucket name not configured")
             return None
         
+        cached = self.cache.get(bucket, key) if self.cache.enabled and use_cache else None
+        if cached is not None and self.cache.is_fresh(cached, max_age):
+            self.cache.record_hit()
+            return cached
+        
+        return self._flights.do(
+            (bucket, key), lambda: self._fetch_object(bucket, key, cached, use_cache, missing_ok)
+        )
+    
+    def _fetch_object(self, bucket: str, key: str, cached: Optional[CachedObject],
+                      use_cache: bool, missing_ok: bool = False) -> Optional[CachedObject]:
+        """Download an object, or revalidate the cached entry with a conditional GET."""
+        if not self._allow_call("get_object", key):
+            return self._stale_fallback(key, cached)
+        
+        request = {'Bucket': bucket, 'Key': key}
+        if cached is not None and cached.etag:
+            request['IfNoneMatch'] = cached.etag
+        
+        client = self.s3_client
+        
+        def download():
+            response = client.get_object(**request)
+            return response, response['Body'].read()
+        
+        started = time.perf_counter()
         try:
-            response = self.s3_client.get_object(Bucket=bucket, Key=key)
-            return response['Body'].read()
-        except ClientError as e:
+            response, body = self._with_deadline("get_object", key, download)
+        except (ClientError, BotoCoreError) as e:
+            self._record_outcome(e)
+            if cached is not None and isinstance(e, ClientError) and _is_not_modified(e):
+                _observe("get_object", key, started)
+                self.cache.mark_validated(cached)
+                self.cache.record_revalidation()
+                return cached
+            if missing_ok and isinstance(e, ClientError) and _is_missing(e):
+                _observe("get_object", key, started)
+                logger.debug(f"S3 object {key} does not exist")
+                return None
+            _observe("get_object", key, started, failed=True)
             logger.error(f"Error retrieving object from S3: {e}")
+            return self._stale_fallback(key, cached) if _is_transient(e) else None
+        
+        self._record_outcome()
+        _observe("get_object", key, started, len(body))
+        entry = CachedObject(
+            body=body,
+            etag=response.get('ETag'),
+            last_modified=response.get('LastModified')
+        )
+        if use_cache:
+            self.cache.record_miss()
+            self.cache.put(bucket, key, entry)
+        return entry
+    
+    def _stale_fallback(self, key: str, cached: Optional[CachedObject]) -> Optional[CachedObject]:
+        """Serve an expired cached copy when S3 can't be reached (its TTL is not reset)."""
+        if cached is not None:
+            logger.warning(f"Serving stale cached copy of {key} while S3 is unavailable")
+        return cached
+    
+    def head_object(self, key: str, bucket_name: Optional[str] = None) -> Optional[dict]:
+        """
+        Retrieve an object's metadata without downloading its content.
+        
+        Args:
+            key: The S3 object key
+            bucket_name: The bucket name (defaults to configured bucket)
+        
+        Returns:
+            Dict with 'ETag', 'ContentLength' and 'LastModified' keys, or None if error
+        """
+        if not self.s3_client:
+            logger.error("S3 client not initialized")
+            return None
+        
+        bucket = bucket_name or settings.s3_bucket_name
+        if not bucket:
+            logger.error("S3 bucket name not configured")
             return None
+        
+        if not self._allow_call("head_object", key):
+            return None
+        
+        started = time.perf_counter()
+        try:
+            response = self._with_deadline(
+                "head_object", key, functools.partial(self.s3_client.head_object, Bucket=bucket, Key=key)
+            )
+            self._record_outcome()
+            _observe("head_object", key, started)
+            return {
+                'ETag': response.get('ETag'),
+                'ContentLength': response.get('ContentLength', 0),
+                'LastModified': response.get('LastModified')
+            }
+        except (ClientError, BotoCoreError) as e:
+            self._record_outcome(e)
+            _observe("head_object", key, started, failed=True)
+            logger.error(f"Error retrieving object metadata from S3: {e}")
+            return None
+    
+    def put_object(self, key: str, body: bytes, content_type: Optional[str] = None,
+                   bucket_name: Optional[str] = None) -> Optional[str]:
+        """
+        Upload an object to S3, replacing any existing object with the same key.
+        
+        Args:
+            key: The S3 object key
+            body: The object content
+            content_type: Content-Type stored with the object (optional)
+            bucket_name: The bucket name (defaults to configured bucket)
+        
+        Returns:
+            The ETag of the uploaded object, or None if error
+        """
+        if not self.s3_client:
+            logger.error("S3 client not initialized")
+            return None
+        
+        bucket = bucket_name or settings.s3_bucket_name
+        if not bucket:
+            logger.error("S3 bucket name not configured")
+            return None
+        
+        if not self._allow_call("put_object", key):
+            return None
+        
+        request = {'Bucket': bucket, 'Key': key, 'Body': body}
+        if content_type:
+            request['ContentType'] = content_type
+        
+        started = time.perf_counter()
+        try:
+            response = self._with_deadline(
+                "put_object", key, functools.partial(self.s3_client.put_object, **request)
+            )
+        except (ClientError, BotoCoreError) as e:
+            self._record_outcome(e)
+            _observe("put_object", key, started, failed=True)
+            logger.error(f"Error uploading object to S3: {e}")
+            return None
+        
+        self._record_outcome()
+        _observe("put_object", key, started)
+        # Don't serve the previous version from this process's cache
+        self.cache.invalidate(bucket, key)
+        return response.get('ETag')
     
-    def list_objects(self, prefix: str = "", bucket_name: Optional[str] = None) -> list:
+    def get_object_range(self, key: str, start: int, end: int, if_match: Optional[str] = None,
+                         bucket_name: Optional[str] = None) -> Optional[bytes]:
+        """
+        Retrieve a byte range of an object from S3 (bypasses the object cache).
+        
+        Args:
+            key: The S3 object key
+            start: First byte offset (inclusive)
+            end: Last byte offset (inclusive)
+            if_match: Only return data if the object still has this ETag
+            bucket_name: The bucket name (defaults to configured bucket)
+        
+        Returns:
+            The requested bytes (may be shorter than requested at the end of the object), or None if error
+        """
+        if not self.s3_client:
+            logger.error("S3 client not initialized")
+            return None
+        
+        bucket = bucket_name or settings.s3_bucket_name
+        if not bucket:
+            logger.error("S3 bucket name not configured")
+            return None
+        
+        if not self._allow_call("get_object_range", key):
+            return None
+        
+        request = {'Bucket': bucket, 'Key': key, 'Range': f"bytes={start}-{end}"}
+        if if_match:
+            request['IfMatch'] = if_match
+        
+        client = self.s3_client
+        started = time.perf_counter()
+        try:
+            data = self._with_deadline(
+                "get_object_range", key, lambda: client.get_object(**request)['Body'].read()
+            )
+            self._record_outcome()
+            _observe("get_object_range", key, started, len(data))
+            return data
+        except (ClientError, BotoCoreError) as e:
+            self._record_outcome(e)
+            _observe("get_object_range", key, started, failed=True)
+            logger.error(f"Error retrieving object range from S3: {e}")
+            return None
+    
+    def get_bucket_location(self, bucket_name: Optional[str] = None) -> Optional[str]:
+        """
+        Look up the region of a bucket.
+        
+        Args:
+            bucket_name: The bucket name (defaults to configured bucket)
+        
+        Returns:
+            The bucket's region, or None if error
+        """
+        if not self.s3_client:
+            logger.error("S3 client not initialized")
+            return None
+        
+        bucket = bucket_name or settings.s3_bucket_name
+        if not bucket:
+            logger.error("S3 bucket name not configured")
+            return None
+        
+        if not self._allow_call("get_bucket_location", bucket):
+            return None
+        
+        started = time.perf_counter()
+        try:
+            response = self._with_deadline(
+                "get_bucket_location", bucket,
+                functools.partial(self.s3_client.get_bucket_location, Bucket=bucket)
+            )
+            self._record_outcome()
+            _observe("get_bucket_location", bucket, started)
+            # S3 reports us-east-1 as an empty location constraint
+            return response.get('LocationConstraint') or 'us-east-1'
+        except (ClientError, BotoCoreError) as e:
+            self._record_outcome(e)
+            _observe("get_bucket_location", bucket, started, failed=True)
+            logger.error(f"Error retrieving bucket location from S3: {e}")
+            return None
+    
+    def _iter_objects(self, bucket: str, prefix: str, start_after: Optional[str] = None,
+                      max_keys: Optional[int] = None):
+        """
+        Yield object summaries from list_objects_v2, following continuation tokens across pages
+        (or only the first max_keys objects, in a single request).
+        Raises ClientError if S3 fails or the circuit breaker is open.
+        """
+        request = {'Bucket': bucket, 'Prefix': prefix}
+        if start_after:
+            request['StartAfter'] = start_after
+        if max_keys:
+            request['MaxKeys'] = max_keys
+        
+        while True:
+            if not self._allow_call("list_objects", prefix):
+                raise _circuit_open_error('ListObjectsV2')
+            started = time.perf_counter()
+            try:
+                response = self._with_deadline(
+                    "list_objects", prefix, functools.partial(self.s3_client.list_objects_v2, **request)
+                )
+            except (ClientError, BotoCoreError) as e:
+                self._record_outcome(e)
+                _observe("list_objects", prefix, started, failed=True)
+                if isinstance(e, BotoCoreError):
+                    raise _client_error_from(e, 'ListObjectsV2') from e
+                raise
+            self._record_outcome()
+            _observe("list_objects", prefix, started)
+            yield from response.get('Contents', [])
+            if max_keys or not response.get('IsTruncated'):
+                break
+            request['ContinuationToken'] = response['NextContinuationToken']
+    
+    def list_objects(self, prefix: str = "", bucket_name: Optional[str] = None,
+                     max_keys: Optional[int] = None) -> list:
         """
         List objects in S3 bucket with optional prefix filter.
         
         Args:
             prefix: Prefix to filter objects
             bucket_name: The bucket name (defaults to configured bucket)
+            max_keys: Only list the first max_keys objects (a single request)
         
         Returns:
             List of object keys
@@ -81,24 +482,23 @@ class S3Service:
             return []
         
         try:
-            response = self.s3_client.list_objects_v2(Bucket=bucket, Prefix=prefix)
-            if 'Contents' in response:
-                return [obj['Key'] for obj in response['Contents']]
-            return []
+            return [obj['Key'] for obj in self._iter_objects(bucket, prefix, max_keys=max_keys)]
         except ClientError as e:
             logger.error(f"Error listing objects from S3: {e}")
             return []
     
-    def list_objects_with_metadata(self, prefix: str = "", bucket_name: Optional[str] = None) -> list:
+    def list_objects_with_metadata(self, prefix: str = "", bucket_name: Optional[str] = None,
+                                   start_after: Optional[str] = None) -> list:
         """
-        List objects in S3 bucket with metadata (key and last modified date).
+        List objects in S3 bucket with metadata (key, last modified date, ETag and size).
         
         Args:
             prefix: Prefix to filter objects
             bucket_name: The bucket name (defaults to configured bucket)
+            start_after: Only list keys that sort after this key
         
         Returns:
-            List of dicts with 'Key' and 'LastModified' keys
+            List of dicts with 'Key', 'LastModified', 'ETag' and 'Size' keys
         """
         if not self.s3_client:
             logger.error("S3 client not initialized")
@@ -110,20 +510,162 @@ class S3Service:
             return []
         
         try:
-            response = self.s3_client.list_objects_v2(Bucket=bucket, Prefix=prefix)
-            if 'Contents' in response:
-                return [
-                    {
-                        'Key': obj['Key'],
-                        'LastModified': obj['LastModified']
-                    }
-                    for obj in response['Contents']
-                ]
-            return []
+            return [
+                {
+                    'Key': obj['Key'],
+                    'LastModified': obj['LastModified'],
+                    'ETag': obj.get('ETag'),
+                    'Size': obj.get('Size', 0)
+                }
+                for obj in self._iter_objects(bucket, prefix, start_after=start_after)
+            ]
         except ClientError as e:
             logger.error(f"Error listing objects from S3: {e}")
             return []
 
-# Global instance
+def _observe(operation: str, key: str, started: float, nbytes: int = 0, failed: bool = False) -> None:
+    """Record latency, downloaded bytes and failures of an S3 call, grouped by key prefix."""
+    prefix = key_prefix(key)
+    elapsed = time.perf_counter() - started
+    s3_request_duration.observe(elapsed, operation=operation, prefix=prefix)
+    record_phase("s3", elapsed)
+    if nbytes:
+        s3_response_bytes.inc(nbytes, operation=operation, prefix=prefix)
+    if failed:
+        s3_errors.inc(operation=operation, prefix=prefix)
+
+def _is_transient(error: Exception) -> bool:
+    """
+    Check whether an S3 error means S3 is unavailable (connection errors, timeouts, throttling,
+    5xx) rather than a problem with the request itself (e.g. missing key, 304, 412).
+    """
+    if isinstance(error, BotoCoreError):
+        return True
+    if not isinstance(error, ClientError):
+        return False
+    code = error.response.get('Error', {}).get('Code')
+    status = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode') or 0
+    return status >= 500 or code in ('SlowDown', 'Throttling', 'ThrottlingException', 'RequestTimeout',
+                                     'ServiceUnavailable', 'InternalError', 'CircuitOpen')
+
+def _circuit_open_error(operation: str) -> ClientError:
+    return ClientError(
+        {'Error': {'Code': 'CircuitOpen', 'Message': "S3 circuit breaker is open"},
+         'ResponseMetadata': {'HTTPStatusCode': 503}},
+        operation
+    )
+
+def _client_error_from(error: BotoCoreError, operation: str) -> ClientError:
+    """Wrap a connection-level error so callers that handle ClientError also handle it."""
+    return ClientError(
+        {'Error': {'Code': type(error).__name__, 'Message': str(error)},
+         'ResponseMetadata': {'HTTPStatusCode': 503}},
+        operation
+    )
+
+def _is_not_modified(error: ClientError) -> bool:
+    """Check whether a ClientError is S3's 304 response to a conditional GET."""
+    code = error.response.get('Error', {}).get('Code')
+    status = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+    return code in ('304', 'NotModified') or status == 304
+
+def _is_missing(error: ClientError) -> bool:
+    """Check whether a ClientError means the requested key does not exist."""
+    code = error.response.get('Error', {}).get('Code')
+    status = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+    return code in ('NoSuchKey', 'NotFound', '404') or status == 404
+
+class AsyncS3Service:
+    """
+    Awaitable facade over S3Service for use in async endpoints.
+    boto3 is blocking, so each call runs in a worker thread instead of stalling the event loop.
+    The threads come from a dedicated pool sized like the S3 connection pool: asyncio's default
+    executor is sized by CPU count, which would cap parallel downloads on small instances.
+    Each S3 request is bounded by settings.s3_call_deadline_seconds inside S3Service, so a
+    stalled request returns its error value (None or []) once the deadline passes; the S3
+    service's own request thread stays busy until botocore gives up.
+    """
+    
+    def __init__(self, service: S3Service):
+        self._service = service
+        self._executor = ThreadPoolExecutor(max_workers=settings.s3_max_pool_connections, thread_name_prefix="s3")
+    
+    async def _call(self, fn: Callable, *args):
+        loop = asyncio.get_running_loop()
+        # Like asyncio.to_thread, run with a copy of the caller's context variables
+        call = functools.partial(contextvars.copy_context().run, fn, *args)
+        return await loop.run_in_executor(self._executor, call)
+    
+    async def get_object(self, key: str, bucket_name: Optional[str] = None) -> Optional[bytes]:
+        return await self._call(self._service.get_object, key, bucket_name)
+    
+    async def get_object_versioned(self, key: str, bucket_name: Optional[str] = None,
+                                   max_age: Optional[float] = None) -> Optional[CachedObject]:
+        return await self._call(self._service.get_object_versioned, key, bucket_name, max_age)
+    
+    async def head_object(self, key: str, bucket_name: Optional[str] = None) -> Optional[dict]:
+        return await self._call(self._service.head_object, key, bucket_name)
+    
+    async def get_object_range(self, key: str, start: int, end: int, if_match: Optional[str] = None,
+                               bucket_name: Optional[str] = None) -> Optional[bytes]:
+        return await self._call(self._service.get_object_range, key, start, end, if_match, bucket_name)
+    
+    async def put_object(self, key: str, body: bytes, content_type: Optional[str] = None,
+                         bucket_name: Optional[str] = None) -> Optional[str]:
+        return await self._call(self._service.put_object, key, body, content_type, bucket_name)
+    
+    async def get_bucket_location(self, bucket_name: Optional[str] = None) -> Optional[str]:
+        return await self._call(self._service.get_bucket_location, bucket_name)
+    
+    async def get_objects(self, keys: List[str], concurrency: Optional[int] = None,
+                          bucket_name: Optional[str] = None, use_cache: bool = True) -> Dict[str, Optional[bytes]]:
+        """
+        Fetch several objects in parallel, with at most `concurrency` requests in flight.
+        
+        Args:
+            use_cache: Set to False for objects the caller caches itself in parsed form
+        
+        Returns:
+            Dict mapping each key to its content (or None if it could not be fetched)
+        """
+        semaphore = asyncio.Semaphore(concurrency or settings.s3_fetch_concurrency)
+        
+        async def fetch(key: str) -> Optional[bytes]:
+            async with semaphore:
+                cached = await self._call(self._service.get_object_versioned, key, bucket_name, None, use_cache)
+                return cached.body if cached is not None else None
+        
+        results = await asyncio.gather(*(fetch(key) for key in keys))
+        return dict(zip(keys, results))
+    
+    async def list_objects(self, prefix: str = "", bucket_name: Optional[str] = None,
+                           max_keys: Optional[int] = None) -> list:
+        return await self._call(self._service.list_objects, prefix, bucket_name, max_keys)
+    
+    async def list_objects_with_metadata(self, prefix: str = "", bucket_name: Optional[str] = None,
+                                         start_after: Optional[str] = None) -> list:
+        return await self._call(self._service.list_objects_with_metadata, prefix, bucket_name, start_after)
+
+# Global instances
 s3_service = S3Service()
+async_s3_service = AsyncS3Service(s3_service)
 
+registry.gauge(
+    "s3_cache_lookups", "S3 object cache lookups by result", ("result",),
+    callback=lambda: {
+        (result,): s3_service.cache.stats()[stat]
+        for result, stat in (("hit", "hits"), ("miss", "misses"), ("revalidated", "revalidations"))
+    }
+)
+registry.gauge(
+    "s3_cache_hit_ratio", "Share of S3 object cache lookups served without a download",
+    callback=lambda: {(): s3_service.cache.stats()["hit_ratio"]}
+)
+registry.gauge(
+    "s3_cache_bytes", "Bytes held in the S3 object cache",
+    callback=lambda: {(): s3_service.cache.stats()["bytes"]}
+)
+registry.gauge(
+    "s3_circuit_open", "1 while the S3 circuit breaker is open or probing",
+    callback=lambda: {(): 0 if s3_service.breaker.state == CLOSED else 1}
+)
@@ -0,0 +1,85 @@
+"""
+Request coalescing ("single flight").
+Concurrent callers asking for the same key share one in-flight execution: the first caller runs
+the function and the others wait for, and receive, its result or exception. Used so that a burst
+of requests for the same S3 object or derived result costs one fetch and one parse.
+"""
+import asyncio
+import threading
+from typing import Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+from services.metrics import registry
+
+T = TypeVar("T")
+
+single_flight_coalesced = registry.counter(
+    "single_flight_coalesced_total", "Calls that waited for an identical in-flight call instead of running", ("group",)
+)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls from worker threads."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """Run fn, unless a call with the same key is already running, in which case wait for its result."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            single_flight_coalesced.inc(group=self.name)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+class AsyncSingleFlight:
+    """Coalesces concurrent coroutine calls on one event loop."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Await fn(), unless a call with the same key is already running, in which case await its result."""
+        future = self._calls.get(key)
+        if future is not None:
+            single_flight_coalesced.inc(group=self.name)
+            return await asyncio.shield(future)
+
+        future = self._calls[key] = asyncio.ensure_future(fn())
+        future.add_done_callback(lambda done: self._finish(key, done))
+        # shield: if the first caller is cancelled, the call keeps running for the others
+        return await asyncio.shield(future)
+
+    def _finish(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        if not future.cancelled():
+            future.exception()  # Mark as retrieved even if every caller went away
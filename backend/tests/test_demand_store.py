@@ -0,0 +1,99 @@
+"""
+Tests for loading the training dataset into a DemandSeries: delta refreshes of appended rows
+must produce the same series as a full parse of the same object.
+
+Run from the backend directory with `python -m unittest` (or pytest).
+"""
+import math
+import tempfile
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+
+from config import settings
+from services.demand_store import DEMAND_DATASET_KEY, DemandSeries, DemandStore
+from services.local_s3 import LocalS3Client
+from services.s3_service import s3_service
+
+HEADER = b"Date,Hour,Market Demand,Ontario Demand\n"
+FIRST_DAY = date(2024, 1, 1)
+
+
+def day_rows(day: date) -> bytes:
+    """CSV rows for the 24 hours of a day, each terminated by a newline."""
+    return b"".join(
+        f"{day.isoformat()},{hour},{18000 + day.day * 100 + hour},{15000 + day.day * 100 + hour}\n".encode()
+        for hour in range(1, 25)
+    )
+
+
+def hourly_values(series: DemandSeries) -> list:
+    return [None if math.isnan(value) else value for value in series.values]
+
+
+class DeltaRefreshTest(unittest.TestCase):
+    def setUp(self):
+        self._saved = (s3_service.s3_client, settings.s3_bucket_name, settings.demand_snapshot_enabled)
+        root = Path(tempfile.mkdtemp())
+        self.path = root / DEMAND_DATASET_KEY
+        self.path.parent.mkdir(parents=True)
+        s3_service.s3_client = LocalS3Client(str(root))
+        settings.s3_bucket_name = "test"
+        settings.demand_snapshot_enabled = False
+        self.store = DemandStore()
+
+    def tearDown(self):
+        s3_service.s3_client, settings.s3_bucket_name, settings.demand_snapshot_enabled = self._saved
+
+    def write(self, data: bytes) -> None:
+        self.path.write_bytes(data)
+
+    def assert_matches_full_parse(self, series: DemandSeries) -> None:
+        expected = DemandSeries.from_csv(self.path.read_bytes())
+        self.assertEqual(series.start_date, expected.start_date)
+        self.assertEqual(hourly_values(series), hourly_values(expected))
+        self.assertEqual(series.source_size, expected.source_size)
+        self.assertEqual(series.source_tail, expected.source_tail)
+
+    def test_append_complete_lines(self):
+        data = HEADER + day_rows(FIRST_DAY)
+        self.write(data)
+        first = self.store.get_series(max_age=0)
+
+        self.write(data + day_rows(FIRST_DAY + timedelta(days=1)))
+        series = self.store.get_series(max_age=0)
+
+        self.assertIsNot(series, first)
+        self.assertEqual(series.source_header, HEADER)
+        self.assert_matches_full_parse(series)
+
+    def test_unterminated_last_line_is_parsed_and_read_again(self):
+        data = HEADER + day_rows(FIRST_DAY)
+        self.write(data)
+        self.store.get_series(max_age=0)
+
+        # The appended day's last row (hour 24) has no trailing newline
+        data += day_rows(FIRST_DAY + timedelta(days=1))[:-1]
+        self.write(data)
+        series = self.store.get_series(max_age=0)
+        self.assert_matches_full_parse(series)
+        self.assertEqual(len(series.get_day(FIRST_DAY + timedelta(days=1))), 24)
+
+        # The next append completes that line and must not lose or duplicate it
+        data += b"\n" + day_rows(FIRST_DAY + timedelta(days=2))
+        self.write(data)
+        series = self.store.get_series(max_age=0)
+        self.assert_matches_full_parse(series)
+        self.assertEqual(len(series.get_day(FIRST_DAY + timedelta(days=1))), 24)
+
+    def test_rewritten_history_is_parsed_in_full(self):
+        self.write(HEADER + day_rows(FIRST_DAY) + day_rows(FIRST_DAY + timedelta(days=1)))
+        self.store.get_series(max_age=0)
+
+        self.write(HEADER + day_rows(FIRST_DAY + timedelta(days=5)) + day_rows(FIRST_DAY + timedelta(days=6)))
+        series = self.store.get_series(max_age=0)
+        self.assert_matches_full_parse(series)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import * as React from "react"
+import { useQueryClient } from "@tanstack/react-query"
+
+/**
+ * Subscribe to the backend's Server-Sent Events stream and write pushed snapshots
+ * straight into the react-query cache, so open dashboards update without polling.
+ * `topics` maps an event name (e.g. "forecast") to the query key it updates.
+ */
+export function useLiveUpdates(url: string, topics: Record<string, readonly unknown[]>) {
+  const queryClient = useQueryClient()
+  const topicsKey = JSON.stringify(topics)
+
+  React.useEffect(() => {
+    if (typeof EventSource === "undefined") {
+      return
+    }
+    const queryKeys: Record<string, readonly unknown[]> = JSON.parse(topicsKey)
+    const source = new EventSource(`${url}?topics=${Object.keys(queryKeys).join(",")}`)
+
+    const listeners = Object.entries(queryKeys).map(([topic, queryKey]) => {
+      const onMessage = (event: MessageEvent) => {
+        queryClient.setQueryData(queryKey, JSON.parse(event.data))
+      }
+      source.addEventListener(topic, onMessage)
+      return [topic, onMessage] as const
+    })
+
+    return () => {
+      listeners.forEach(([topic, onMessage]) => source.removeEventListener(topic, onMessage))
+      source.close()
+    }
+  }, [url, topicsKey, queryClient])
+}
@@ -8,6 +8,7 @@ import ImportsExports from '@/components/ImportsExports';
 import PeakForecast from '@/components/PeakForecast';
 import PredictedLow from '@/components/PredictedLow';
 import { getApiBaseUrl } from '@/lib/apiConfig';
+import { useLiveUpdates } from '@/hooks/use-live-updates';
 
 interface ForecastDataPoint {
   hour: string;
@@ -69,6 +70,12 @@ export default function Analytics() {
     },
   });
 
+  // Pushes new forecast/hourly snapshots into the queries above when the data changes in S3
+  useLiveUpdates(`${apiBaseUrl}/api/events`, {
+    forecast: [`${apiBaseUrl}/api/forecast/latest`],
+    hourly: [`${apiBaseUrl}/api/hourly-data/latest`],
+  });
+
   const lastUpdated = new Date().toLocaleTimeString('en-US', { 
     hour: '2-digit', 
     minute: '2-digit' 